@@ -0,0 +1,3 @@
+from .compaction_service import CompactionResult, CompactionService
+
+__all__ = ["CompactionResult", "CompactionService"]
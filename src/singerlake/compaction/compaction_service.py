@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+import shutil
+import typing as t
+from uuid import uuid4
+
+import singerlake.singer.utils as su
+from singerlake.config import RolloverConfig
+from singerlake.store.base import CommitConflict, CommitError, snapshot_version
+from singerlake.stream.dedupe import DEDUPE_DIRNAME, Deduplicator
+from singerlake.stream.file_writer import SingerFile, SingerFileWriter
+from singerlake.stream.parallel_reader import ParallelReader
+
+if t.TYPE_CHECKING:
+    from singerlake import Singerlake
+    from singerlake.config import CompactionConfig
+    from singerlake.store.manifest import StreamFileEntry
+    from singerlake.store.path_manager.base import Partition
+    from singerlake.stream import Stream
+    from singerlake.tap import Tap
+
+COMPACTION_DIRNAME = ".compaction"
+
+
+class CompactionTask(t.NamedTuple):
+    """Small files of one schema hash and partition to merge."""
+
+    schema_hash: str
+    partitions: t.Tuple["Partition", ...]
+    entries: t.List["StreamFileEntry"]
+    # names of all files in the partition, which merged files must not reuse
+    reserved_names: t.Set[str]
+    # stream log version the files were planned from
+    base_version: int = -1
+
+
+class CompactionResult(t.NamedTuple):
+    """Result of compacting the small files of one schema hash and partition."""
+
+    schema_hash: str
+    partitions: t.Tuple["Partition", ...]
+    removed: t.List[str]
+    added: t.List[SingerFile]
+
+
+class CompactionService:
+    """Compaction Service.
+
+    This service merges small committed files of a stream into target-sized
+    files, per schema hash and partition. Merged files keep records sorted by
+    time extracted and are named after their merged min/max time extracted.
+    """
+
+    def __init__(self, singerlake: "Singerlake"):
+        self.singerlake = singerlake
+
+    @property
+    def config(self) -> "CompactionConfig":
+        """Return the compaction config."""
+        return self.singerlake.config.compaction
+
+    @property
+    def small_file_bytes(self) -> int:
+        """Return the size below which a file is compacted."""
+        if self.config.small_file_bytes is None:
+            return self.config.target_file_bytes // 2
+        return self.config.small_file_bytes
+
+    def _uncompressed_size(self, stream: "Stream", entry: "StreamFileEntry") -> int:
+        """Return the uncompressed size of a committed file in bytes.
+
+        Merged files are capped by uncompressed size, so small files are picked
+        by it too; otherwise compressed merged files would count as small again.
+        Entries that don't record it fall back to the stored size.
+        """
+        if entry.uncompressed_bytes is not None:
+            return entry.uncompressed_bytes
+        return self.singerlake.store.get_stream_file_size(
+            stream.tap.tap_id, stream.stream_id, entry
+        )
+
+    def plan_stream(self, stream: "Stream") -> t.List[CompactionTask]:
+        """Plan which small files of a stream to merge.
+
+        The small files of a partition are split into tasks of up to
+        `max_files` files, in time order. A remainder of fewer than `min_files`
+        files is left for a later compaction.
+        """
+        store = self.singerlake.store
+        tap_id, stream_id = stream.tap.tap_id, stream.stream_id
+        # files are planned from this snapshot, or a later one
+        base_version = snapshot_version(
+            store.get_stream_manifest(tap_id=tap_id, stream_id=stream_id, fresh=True)
+        )
+        groups: t.Dict[
+            t.Tuple[str, t.Tuple["Partition", ...]], t.List["StreamFileEntry"]
+        ] = {}
+        for entry in store.plan_stream_files(tap_id=tap_id, stream_id=stream_id):
+            groups.setdefault((entry.schema_hash, entry.partitions), []).append(entry)
+
+        min_files = max(self.config.min_files, 2)
+        max_files = max(self.config.max_files, min_files)
+        tasks = []
+        for (schema_hash, partitions), entries in groups.items():
+            small_entries = [
+                entry
+                for entry in entries
+                if self._uncompressed_size(stream, entry) < self.small_file_bytes
+            ]
+            reserved_names = {entry.path.rsplit("/", 1)[-1] for entry in entries}
+            for offset in range(0, len(small_entries), max_files):
+                task_entries = small_entries[offset : offset + max_files]
+                if len(task_entries) < min_files:
+                    continue
+                tasks.append(
+                    CompactionTask(
+                        schema_hash=schema_hash,
+                        partitions=partitions,
+                        entries=task_entries,
+                        reserved_names=reserved_names,
+                        base_version=base_version,
+                    )
+                )
+        return tasks
+
+    def compact_stream(self, stream: "Stream") -> t.List[CompactionResult]:
+        """Compact the small files of a stream under a lock on the stream."""
+        with self.singerlake.store.locker.lock(
+            tap_id=stream.tap.tap_id, stream_id=stream.stream_id
+        ):
+            return [self._compact(stream, task) for task in self.plan_stream(stream)]
+
+    def compact_tap(self, tap: "Tap") -> t.List[CompactionResult]:
+        """Compact the small files of every stream of a tap."""
+        results = []
+        for stream in tap.discover_streams().values():
+            results.extend(self.compact_stream(stream))
+        return results
+
+    def _write_merged(
+        self, stream: "Stream", task: CompactionTask, output_dir: t.Any
+    ) -> t.List[SingerFile]:
+        """Merge a task's files into target-sized files in the output directory."""
+        schema = stream.schema_registry.get_schema(task.schema_hash, task.entries[0])
+        rollover = RolloverConfig(
+            max_records=None, max_bytes=self.config.target_file_bytes
+        )
+        # shared by the tasks of a partition, so their merged files get new names
+        reserved_names = task.reserved_names
+
+        def read_records() -> t.Iterable[dict]:
+            return ParallelReader(stream=stream, entries=task.entries, ordered=True)
+
+        records = read_records()
+        if self.config.dedupe:
+            records = Deduplicator(
+                key_properties=schema.get("key_properties") or [],
+                dumps=self.singerlake.codec.dumps,
+                working_dir=self.singerlake.working_dir / DEDUPE_DIRNAME,
+            ).dedupe(read_records)
+
+        singer_files = []
+        writer: SingerFileWriter | None = None
+        for record in records:
+            if writer is not None and writer.is_full:
+                singer_files.append(writer.close(output_dir, reserved_names))
+                writer = None
+            if writer is None:
+                writer = SingerFileWriter(
+                    stream=stream, partitions=task.partitions, rollover=rollover
+                ).open(staging_dir=output_dir)
+                writer.write_schema(schema)
+            writer.write_record(record, time_extracted=su.get_time_extracted(record))
+        if writer is not None:
+            singer_files.append(writer.close(output_dir, reserved_names))
+        return singer_files
+
+    def _compact(self, stream: "Stream", task: CompactionTask) -> CompactionResult:
+        """Swap a task's files for merged files, then delete the originals.
+
+        The merged files replace the originals in a single Stream Manifest write.
+        If any merged file fails to commit, or a manifest change since the
+        originals were planned touched them, the committed ones are removed
+        again and the originals are kept.
+        """
+        store = self.singerlake.store
+        tap_id, stream_id = stream.tap.tap_id, stream.stream_id
+        removed = [entry.path for entry in task.entries]
+        output_dir = self.singerlake.working_dir / COMPACTION_DIRNAME / str(uuid4())
+        output_dir.mkdir(parents=True)
+        try:
+            singer_files = self._write_merged(stream, task, output_dir)
+            try:
+                results = store.commit_stream_files(
+                    singer_files, replaces=removed, base_version=task.base_version
+                )
+            except CommitConflict:
+                store.remove_stream_files(
+                    tap_id,
+                    stream_id,
+                    [
+                        store.path_manager.get_stream_file_relative_path(singer_file)
+                        for singer_file in singer_files
+                    ],
+                )
+                raise
+            if not all(result.success for result in results):
+                store.remove_stream_files(
+                    tap_id,
+                    stream_id,
+                    [
+                        store.path_manager.get_stream_file_relative_path(
+                            result.stream_file
+                        )
+                        for result in results
+                        if result.success
+                    ],
+                )
+                raise CommitError(results)
+        finally:
+            shutil.rmtree(output_dir, ignore_errors=True)
+
+        store.remove_stream_files(tap_id, stream_id, removed)
+        return CompactionResult(
+            schema_hash=task.schema_hash,
+            partitions=task.partitions,
+            removed=removed,
+            added=singer_files,
+        )
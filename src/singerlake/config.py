@@ -33,6 +33,42 @@ class LockConfig(BaseModel):
     """Singer Lake Lock Config."""
 
     lock_type: str = "local"
+    timeout: t.Optional[float] = None
+    # seconds a lock is held without a refresh before other holders may take it
+    lease_seconds: float = 60.0
+    # seconds between background lease refreshes, a third of the lease if None
+    refresh_interval: t.Optional[float] = None
+    # local directory of lock and lease files, the lake root if None
+    path: t.Optional[GenericPathModel] = None
+
+
+class RolloverConfig(BaseModel):
+    """Singer Lake File Rollover Config.
+
+    A stream file is finalized as soon as any configured limit is reached.
+    """
+
+    max_records: t.Optional[int] = 10000
+    max_bytes: t.Optional[int] = None
+    max_age_seconds: t.Optional[float] = None
+
+
+class S3Config(BaseModel):
+    """Singer Lake S3 Store Config.
+
+    The first lake root segment is the bucket, the rest the key prefix.
+    Credentials are found by boto3 as usual (environment, profile or role).
+    """
+
+    endpoint_url: t.Optional[str] = None
+    region_name: t.Optional[str] = None
+    # files at least this large are uploaded in concurrent parts
+    multipart_threshold: int = 8 * 1024 * 1024
+    multipart_chunksize: int = 8 * 1024 * 1024
+    # concurrent part uploads of one file
+    max_concurrency: int = 10
+    # connections shared by all threads, commit workers x concurrency if None
+    max_pool_connections: t.Optional[int] = None
 
 
 class StoreConfig(BaseModel):
@@ -41,10 +77,58 @@ class StoreConfig(BaseModel):
     store_type: str = "local"
     path: PathConfig
     lock: LockConfig
+    rollover: RolloverConfig = RolloverConfig()
+    commit_workers: int = 8
+    fsync: bool = True
+    # seconds a validated cached manifest is trusted without re-checking it
+    manifest_cache_ttl: t.Optional[float] = None
+    # checkpoint a stream log every N versions
+    checkpoint_interval: int = 10
+    # times a manifest change is rebased onto concurrent changes before failing
+    commit_retries: int = 10
+    s3: S3Config = S3Config()
+
+
+class WriterConfig(BaseModel):
+    """Singer Lake File Writer Config."""
+
+    json_codec: t.Literal["auto", "orjson", "ujson", "json"] = "auto"
+    buffer_size: int = 1024 * 1024
+    compression: t.Literal["none", "gz", "bz2", "zst"] = "none"
+    compression_level: t.Optional[int] = None
+    threaded_compression: bool = False
+    max_open_files: t.Optional[int] = 256
+    # sample a sidecar line offset index every N records of uncompressed files
+    index_interval: t.Optional[int] = 1000
+    # record fields to collect min/max and null count zone maps of, per file
+    zone_map_fields: t.List[str] = []
+    threaded: bool = False
+    thread_batch_size: int = 1000
+    thread_queue_size: int = 8
+
+
+class CompactionConfig(BaseModel):
+    """Singer Lake Compaction Config.
+
+    Committed files of fewer than `small_file_bytes` uncompressed bytes (half
+    the target by default) are merged, once a partition has at least
+    `min_files` of them, into files of up to `target_file_bytes` uncompressed
+    bytes. At most `max_files` files are merged at once; a partition with more
+    is merged in several tasks. With `dedupe`, only the latest version of each
+    primary key among the merged files is kept.
+    """
+
+    target_file_bytes: int = 128 * 1024 * 1024
+    small_file_bytes: t.Optional[int] = None
+    min_files: int = 2
+    max_files: int = 32
+    dedupe: bool = False
 
 
 class SingerlakeConfig(BaseModel):
     """Singer Lake Config."""
 
     store: StoreConfig
+    writer: WriterConfig = WriterConfig()
+    compaction: CompactionConfig = CompactionConfig()
     working_dir: t.Optional[GenericPathModel] = None
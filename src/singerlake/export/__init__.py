@@ -0,0 +1,3 @@
+from .parquet import ParquetExporter
+
+__all__ = ["ParquetExporter"]
@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+import os
+import re
+import typing as t
+from datetime import datetime, timezone
+from itertools import islice
+from pathlib import Path
+from uuid import uuid4
+
+from singerlake.stream.file_reader import SingerFileReader
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover
+    pa = None  # type: ignore[assignment]
+    pq = None  # type: ignore[assignment]
+
+if t.TYPE_CHECKING:
+    from singerlake.store.manifest import StreamFileEntry
+    from singerlake.stream.stream import Stream
+
+Converter = t.Callable[[t.Any], t.Any]
+
+STREAM_FILE_SUFFIX_PATTERN = re.compile(r"\.singer(?:\.(?:gz|bz2|zst))?$")
+
+
+def _require_pyarrow() -> None:
+    if pa is None:
+        raise ImportError(
+            "Parquet export requires the pyarrow package. "
+            "Install python-singerlake with the 'parquet' extra."
+        )
+
+
+def _json_types(schema: dict) -> t.Tuple[t.List[str], bool]:
+    """Return the non-null JSON types of a schema, and whether it is nullable."""
+    types = schema.get("type", [])
+    if isinstance(types, str):
+        types = [types]
+    non_null = [type_ for type_ in types if type_ != "null"]
+    return non_null, len(non_null) < len(types) or not non_null
+
+
+def _parse_datetime(value: str) -> datetime:
+    """Parse an ISO 8601 date-time, as UTC if it has no time zone."""
+    if value.endswith("Z"):
+        value = value[:-1] + "+00:00"
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        return parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def _nullable(converter: Converter) -> Converter:
+    return lambda value: None if value is None else converter(value)
+
+
+def json_schema_to_arrow(
+    schema: dict, dumps: t.Callable[[t.Any], str]
+) -> t.Tuple["pa.DataType", Converter | None]:
+    """Return the Arrow type of a Singer JSON schema, and a value converter.
+
+    The converter maps JSON values to values Arrow accepts for the type, or is
+    None if values can be used as they are. Schemas without a single concrete
+    type (e.g. `anyOf` or multiple types) are stored as JSON-encoded strings.
+
+    Args:
+        schema: JSON schema of a value.
+        dumps: Function encoding any value as a JSON string.
+    """
+    _require_pyarrow()
+    types, _ = _json_types(schema)
+    if len(types) != 1:
+        return pa.string(), _nullable(dumps)
+
+    type_ = types[0]
+    if type_ == "string":
+        if schema.get("format") == "date-time":
+            return pa.timestamp("us", tz="UTC"), _nullable(_parse_datetime)
+        return pa.string(), None
+    if type_ == "integer":
+        return pa.int64(), None
+    if type_ == "number":
+        return pa.float64(), _nullable(float)
+    if type_ == "boolean":
+        return pa.bool_(), None
+    if type_ == "array" and isinstance(schema.get("items"), dict):
+        item_type, converter = json_schema_to_arrow(schema["items"], dumps)
+        if converter is None:
+            return pa.list_(item_type), None
+        item_converter: Converter = converter
+        return pa.list_(item_type), _nullable(
+            lambda values: [item_converter(value) for value in values]
+        )
+    if type_ == "object" and schema.get("properties"):
+        arrow_schema, converter = json_schema_to_arrow_schema(schema, dumps)
+        return pa.struct(list(arrow_schema)), converter
+    return pa.string(), _nullable(dumps)
+
+
+def json_schema_to_arrow_schema(
+    schema: dict, dumps: t.Callable[[t.Any], str]
+) -> t.Tuple["pa.Schema", Converter | None]:
+    """Return the Arrow schema of a JSON object schema, and a record converter."""
+    _require_pyarrow()
+    fields = []
+    converters: t.Dict[str, Converter] = {}
+    for name, property_schema in schema.get("properties", {}).items():
+        arrow_type, converter = json_schema_to_arrow(property_schema, dumps)
+        fields.append(pa.field(name, arrow_type))
+        if converter is not None:
+            converters[name] = converter
+
+    if not converters:
+        return pa.schema(fields), None
+
+    def _convert(record: dict) -> dict:
+        converted = dict(record)
+        for name, converter in converters.items():
+            if name in converted:
+                converted[name] = converter(converted[name])
+        return converted
+
+    return pa.schema(fields), _nullable(_convert)
+
+
+class ParquetExporter:
+    """Export a stream's committed singer files to Parquet.
+
+    Each singer file is converted to a Parquet file at the same path relative to
+    the stream, below `{output_dir}/{tap_id}/{stream_id}`, so the copy keeps the
+    schema hash and partition directories. Records are converted in batches of
+    `batch_size`, each written as a row group, and the Arrow schema is derived
+    once per schema hash from the stream's schema registry.
+    """
+
+    def __init__(
+        self, stream: "Stream", output_dir: Path, batch_size: int = 10000
+    ) -> None:
+        _require_pyarrow()
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+
+        self.stream = stream
+        self.output_dir = Path(output_dir)
+        self.batch_size = batch_size
+        self._schemas: t.Dict[str, t.Tuple["pa.Schema", Converter | None]] = {}
+
+    @property
+    def stream_dir(self) -> Path:
+        """Return the output directory of the stream."""
+        return self.output_dir / self.stream.tap.tap_id / self.stream.stream_id
+
+    def get_output_path(self, entry: "StreamFileEntry") -> Path:
+        """Return the Parquet path of a committed singer file."""
+        relative_path = STREAM_FILE_SUFFIX_PATTERN.sub(".parquet", entry.path)
+        return self.stream_dir.joinpath(*relative_path.split("/"))
+
+    def _get_schema(
+        self, entry: "StreamFileEntry"
+    ) -> t.Tuple["pa.Schema", Converter | None]:
+        """Return the Arrow schema and record converter of a file's schema hash."""
+        if entry.schema_hash not in self._schemas:
+            codec = self.stream.singerlake.codec
+            schema = self.stream.schema_registry.get_schema(entry.schema_hash, entry)
+            self._schemas[entry.schema_hash] = json_schema_to_arrow_schema(
+                schema["schema"],
+                dumps=lambda value: codec.dumps(value).decode(),
+            )
+        return self._schemas[entry.schema_hash]
+
+    def export_file(self, entry: "StreamFileEntry") -> Path:
+        """Convert a committed singer file to Parquet, returning its path."""
+        reader = SingerFileReader(stream=self.stream, entry=entry)
+        arrow_schema, converter = self._get_schema(entry)
+        output_path = self.get_output_path(entry)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        partial_path = output_path.parent / f".{output_path.name}.{uuid4().hex}.partial"
+
+        records = (message["record"] for message in reader.read_records())
+        try:
+            with pq.ParquetWriter(partial_path, arrow_schema) as writer:
+                while True:
+                    batch = list(islice(records, self.batch_size))
+                    if not batch:
+                        break
+                    if converter is not None:
+                        batch = [converter(record) for record in batch]
+                    writer.write_batch(
+                        pa.RecordBatch.from_pylist(batch, schema=arrow_schema)
+                    )
+            os.replace(partial_path, output_path)
+        except BaseException:
+            partial_path.unlink(missing_ok=True)
+            raise
+        return output_path
+
+    def export(
+        self, start: datetime | None = None, end: datetime | None = None
+    ) -> t.List[Path]:
+        """Export committed files overlapping the range [start, end).
+
+        Files are exported whole, so the copy of each file is complete.
+        """
+        entries = self.stream.singerlake.store.plan_stream_files(
+            tap_id=self.stream.tap.tap_id,
+            stream_id=self.stream.stream_id,
+            start=start,
+            end=end,
+        )
+        return [self.export_file(entry) for entry in entries]
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import json
+import typing as t
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None  # type: ignore[assignment]
+
+try:
+    import ujson
+except ImportError:  # pragma: no cover
+    ujson = None  # type: ignore[assignment]
+
+
+class BaseJSONCodec:
+    """Base JSON codec.
+
+    Codecs encode straight to UTF-8 bytes, so files can be written in binary mode
+    without a second text-encoding pass.
+    """
+
+    name: str = "base"
+
+    def dumps(self, obj: t.Any) -> bytes:
+        """Serialize an object to UTF-8 encoded JSON."""
+        raise NotImplementedError()
+
+    def dumps_line(self, obj: t.Any) -> bytes:
+        """Serialize an object to a newline-terminated JSON line."""
+        return self.dumps(obj) + b"\n"
+
+    def loads(self, data: bytes | str) -> t.Any:
+        """Deserialize JSON bytes or text."""
+        raise NotImplementedError()
+
+
+class StdlibJSONCodec(BaseJSONCodec):
+    """JSON codec backed by the standard library `json` module."""
+
+    name = "json"
+
+    def dumps(self, obj: t.Any) -> bytes:
+        return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+    def loads(self, data: bytes | str) -> t.Any:
+        return json.loads(data)
+
+
+class OrjsonCodec(BaseJSONCodec):
+    """JSON codec backed by `orjson`.
+
+    Objects orjson cannot serialize (e.g. integers wider than 64 bits) fall back
+    to the standard library.
+    """
+
+    name = "orjson"
+
+    def __init__(self) -> None:
+        if orjson is None:
+            raise ImportError("The 'orjson' codec requires the orjson package.")
+        self._fallback = StdlibJSONCodec()
+
+    def dumps(self, obj: t.Any) -> bytes:
+        try:
+            return orjson.dumps(obj)
+        except TypeError:
+            return self._fallback.dumps(obj)
+
+    def dumps_line(self, obj: t.Any) -> bytes:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_APPEND_NEWLINE)
+        except TypeError:
+            return self._fallback.dumps_line(obj)
+
+    def loads(self, data: bytes | str) -> t.Any:
+        return orjson.loads(data)
+
+
+class UjsonCodec(BaseJSONCodec):
+    """JSON codec backed by `ujson`."""
+
+    name = "ujson"
+
+    def __init__(self) -> None:
+        if ujson is None:
+            raise ImportError("The 'ujson' codec requires the ujson package.")
+
+    def dumps(self, obj: t.Any) -> bytes:
+        return ujson.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+    def loads(self, data: bytes | str) -> t.Any:
+        return ujson.loads(data)
+
+
+CODECS: t.Dict[str, t.Type[BaseJSONCodec]] = {
+    "json": StdlibJSONCodec,
+    "orjson": OrjsonCodec,
+    "ujson": UjsonCodec,
+}
+
+
+def get_codec(name: str = "auto") -> BaseJSONCodec:
+    """Return a JSON codec by name.
+
+    `auto` selects the fastest installed backend: orjson, then ujson, then the
+    standard library.
+    """
+    if name == "auto":
+        if orjson is not None:
+            return OrjsonCodec()
+        if ujson is not None:
+            return UjsonCodec()
+        return StdlibJSONCodec()
+
+    if name not in CODECS:
+        raise ValueError(f"Unknown JSON codec: {name}")
+
+    return CODECS[name]()
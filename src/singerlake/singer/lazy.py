@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import json
+import re
+import typing as t
+from datetime import datetime
+from functools import lru_cache
+
+# JSON strings, skipped when measuring nesting depth, and brackets
+_TOKEN_PATTERN = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"|[{}\[\]]')
+_DECODER = json.JSONDecoder()
+_MISSING = object()
+
+
+@lru_cache(maxsize=1024)
+def _key_pattern(key: str) -> t.Pattern[str]:
+    """Return a pattern matching an object key and its separator.
+
+    Non-ASCII characters of the key may be encoded raw or as escapes.
+    """
+    forms = {json.dumps(key, ensure_ascii=False), json.dumps(key)}
+    return re.compile(
+        r"(?:%s)\s*:\s*" % "|".join(re.escape(form) for form in sorted(forms))
+    )
+
+
+def _find_value(text: str, key: str, start: int) -> int | None:
+    """Return the index of the value of a key of the object opening at `start`.
+
+    Only keys directly in that object match; keys of nested objects, and of
+    objects after it, are skipped.
+    """
+    depth = 0
+    position = start
+    for match in _key_pattern(key).finditer(text, start):
+        # an escaped quote is part of a string, not the start of a key
+        if text[match.start() - 1] == "\\":
+            continue
+        for token in _TOKEN_PATTERN.finditer(text, position, match.start()):
+            bracket = token.group()
+            if bracket in ("{", "["):
+                depth += 1
+            elif bracket in ("}", "]"):
+                depth -= 1
+                if depth == 0:
+                    # the object closed before the key
+                    return None
+        position = match.start()
+        if depth == 1:
+            return match.end()
+    return None
+
+
+def project_message(message: dict, fields: t.Iterable[str]) -> dict:
+    """Return a decoded RECORD message with only the given record fields."""
+    record = message["record"]
+    return {
+        "type": "RECORD",
+        "stream": message.get("stream"),
+        "record": {field: record[field] for field in fields if field in record},
+        "time_extracted": message.get("time_extracted")
+        or record.get("_sdc_extracted_at"),
+    }
+
+
+class LazyRecord:
+    """A RECORD message line, decoded only as far as fields are accessed.
+
+    Top-level fields of the record are located in the raw line and only their
+    values are decoded, so the full line is never parsed unless `message` is
+    accessed. Works with lines in any valid JSON layout.
+    """
+
+    __slots__ = ("line", "_loads", "_text", "_record_start", "_message", "_values")
+
+    def __init__(
+        self, line: bytes, loads: t.Callable[[bytes], t.Any] = json.loads
+    ) -> None:
+        self.line = line
+        self._loads = loads
+        self._text: str | None = None
+        self._record_start: int | None = None
+        self._message: dict | None = None
+        self._values: t.Dict[str, t.Any] = {}
+
+    @property
+    def text(self) -> str:
+        """Return the line as text."""
+        if self._text is None:
+            self._text = self.line.decode("utf-8")
+        return self._text
+
+    @property
+    def message(self) -> dict:
+        """Return the fully decoded message."""
+        if self._message is None:
+            self._message = self._loads(self.line)
+        return self._message
+
+    def _get_message_value(self, key: str) -> t.Any:
+        """Return the decoded value of a top-level message key, or None."""
+        if self._message is not None:
+            return self._message.get(key)
+        text = self.text
+        message_start = len(text) - len(text.lstrip())
+        index = _find_value(text, key, message_start)
+        if index is None:
+            return None
+        return _DECODER.raw_decode(text, index)[0]
+
+    @property
+    def record_start(self) -> int | None:
+        """Return the index of the record object in the line, if any."""
+        if self._record_start is None:
+            text = self.text
+            message_start = len(text) - len(text.lstrip())
+            index = _find_value(text, "record", message_start)
+            if index is None or not text.startswith("{", index):
+                return None
+            self._record_start = index
+        return self._record_start
+
+    def get(self, field: str, default: t.Any = None) -> t.Any:
+        """Return the value of a top-level record field, decoding only it."""
+        if self._message is not None:
+            return self._message.get("record", {}).get(field, default)
+        if field not in self._values:
+            value = _MISSING
+            record_start = self.record_start
+            if record_start is not None:
+                index = _find_value(self.text, field, record_start)
+                if index is not None:
+                    value = _DECODER.raw_decode(self.text, index)[0]
+            self._values[field] = value
+        value = self._values[field]
+        return default if value is _MISSING else value
+
+    def __getitem__(self, field: str) -> t.Any:
+        value = self.get(field, _MISSING)
+        if value is _MISSING:
+            raise KeyError(field)
+        return value
+
+    def __contains__(self, field: str) -> bool:
+        return self.get(field, _MISSING) is not _MISSING
+
+    @property
+    def time_extracted_value(self) -> str:
+        """Return the raw time extracted of the message, or of the record."""
+        value = self._get_message_value("time_extracted")
+        if not value:
+            value = self.get("_sdc_extracted_at")
+        if not value:
+            raise ValueError("Record does not contain time_extracted")
+        return value
+
+    @property
+    def time_extracted(self) -> datetime:
+        """Return the time extracted of the message, or of the record."""
+        return datetime.fromisoformat(self.time_extracted_value)
+
+    def project(self, fields: t.Iterable[str]) -> dict:
+        """Return a RECORD message with only the given record fields.
+
+        The message's time extracted is kept, so projected records can still be
+        ordered.
+        """
+        if self._message is not None:
+            return project_message(self._message, fields)
+        return {
+            "type": "RECORD",
+            "stream": self._get_message_value("stream"),
+            "record": {field: self[field] for field in fields if field in self},
+            "time_extracted": self.time_extracted_value,
+        }
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.line!r})"
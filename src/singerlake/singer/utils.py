@@ -1,12 +1,28 @@
 from datetime import datetime
 
 
-def get_time_extracted(record: dict) -> datetime:
-    """Return the time extracted from a record."""
+def get_time_extracted_value(record: dict) -> str:
+    """Return the ISO 8601 time extracted of a record, unparsed."""
     time_extracted = record.get("time_extracted") or record.get("record", {}).get(
         "_sdc_extracted_at"
     )
     if not time_extracted:
         raise ValueError("Record does not contain time_extracted")
 
-    return datetime.fromisoformat(time_extracted)
+    return time_extracted
+
+
+def get_time_extracted(record: dict) -> datetime:
+    """Return the time extracted from a record."""
+    return datetime.fromisoformat(get_time_extracted_value(record))
+
+
+def naive_time(time_extracted: datetime) -> datetime:
+    """Return a datetime's wall-clock value without time zone information.
+
+    Partitions and file names are derived from the wall-clock fields of time
+    extracted, so time ranges are compared on the same basis.
+    """
+    if time_extracted.tzinfo is None:
+        return time_extracted
+    return time_extracted.replace(tzinfo=None)
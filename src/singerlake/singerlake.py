@@ -6,6 +6,7 @@ from pathlib import Path
 from uuid import uuid4
 
 from singerlake.config import SingerlakeConfig
+from singerlake.singer.codec import BaseJSONCodec, get_codec
 from singerlake.store import BaseStore, StoreService
 
 from singerlake.discovery import DiscoveryService  # isort:skip
@@ -27,6 +28,7 @@ class Singerlake:
 
         self._store: BaseStore | None = None
         self._lake_id: str | None = None
+        self._codec: BaseJSONCodec | None = None
 
     @property
     def lake_id(self) -> str:
@@ -50,6 +52,13 @@ class Singerlake:
         working_dir.mkdir(parents=True, exist_ok=True)
         return working_dir
 
+    @property
+    def codec(self) -> BaseJSONCodec:
+        """Return the JSON codec used to encode and decode Singer messages."""
+        if self._codec is None:
+            self._codec = get_codec(self.config.writer.json_codec)
+        return self._codec
+
     @property
     def store(self) -> BaseStore:
         """Return the store instance."""
@@ -1,16 +1,23 @@
-from .base import BaseStore
+from .base import BaseStore, CommitConflict, CommitError, CommitResult
 from .local import LocalStore
 from .path_manager.constant import (
     LAKE_MANIFEST_FILENAME,
     STREAM_MANIFEST_FILENAME,
     TAP_MANIFEST_FILENAME,
 )
+from .s3 import S3Path, S3PathTransformer, S3Store
 from .store_service import StoreService
 
 __all__ = [
     "StoreService",
     "BaseStore",
+    "CommitConflict",
+    "CommitError",
+    "CommitResult",
     "LocalStore",
+    "S3Path",
+    "S3PathTransformer",
+    "S3Store",
     "LAKE_MANIFEST_FILENAME",
     "TAP_MANIFEST_FILENAME",
     "STREAM_MANIFEST_FILENAME",
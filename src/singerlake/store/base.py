@@ -1,17 +1,192 @@
 from __future__ import annotations
 
+import os
+import random
+import time
 import typing as t
 from abc import ABC
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 
-from singerlake.store.manifest import LakeManifest, TapManifest
+from singerlake.singer.utils import naive_time
+from singerlake.store.manifest import (
+    LakeManifest,
+    LastCheckpoint,
+    SchemaVersion,
+    StreamFileEntry,
+    StreamLogAction,
+    StreamManifest,
+    TapManifest,
+)
+from singerlake.store.manifest_cache import ManifestCache
+from singerlake.store.path_manager.base import STREAM_FILE_INDEX_SUFFIX
+from singerlake.store.path_manager.constant import (
+    STREAM_LOG_LAST_CHECKPOINT_FILENAME,
+)
+from singerlake.store.path_manager.partition import Partition, partition_interval
 
 if t.TYPE_CHECKING:
     from singerlake import Singerlake
+    from singerlake.config import StoreConfig
     from singerlake.store.locker.base import BaseLocker
     from singerlake.store.path_manager.base import BasePathManager
+    from singerlake.store.zone_map import Predicate
     from singerlake.stream.file_writer import SingerFile
     from singerlake.tap.tap import Tap
 
+# base of the exponential backoff between optimistic commit attempts
+COMMIT_BACKOFF_SECONDS = 0.005
+
+ManifestT = t.TypeVar("ManifestT", LakeManifest, TapManifest, StreamManifest)
+
+
+class CommitResult(t.NamedTuple):
+    """Result of committing a single stream file."""
+
+    stream_file: "SingerFile"
+    path: t.Any
+    error: BaseException | None = None
+
+    @property
+    def success(self) -> bool:
+        """Return True if the file was committed."""
+        return self.error is None
+
+
+class CommitError(Exception):
+    """Raised when one or more stream files fail to commit."""
+
+    def __init__(self, results: t.List[CommitResult]) -> None:
+        self.results = results
+        failed = [result for result in results if not result.success]
+        super().__init__(
+            f"Failed to commit {len(failed)} of {len(results)} stream files: "
+            + ", ".join(f"{result.path} ({result.error!r})" for result in failed)
+        )
+
+
+class CommitConflict(Exception):
+    """Raised when a Stream Manifest change conflicts with a concurrent one."""
+
+
+def _conflicting_paths(action: StreamLogAction, other: StreamLogAction) -> t.Set[str]:
+    """Return the paths two stream log actions both add or remove.
+
+    Actions touching no common path commute, so either can be applied first.
+    """
+    paths = {entry.path for entry in action.add} | set(action.remove)
+    other_paths = {entry.path for entry in other.add} | set(other.remove)
+    return paths & other_paths
+
+
+def snapshot_version(manifest: StreamManifest | None) -> int:
+    """Return the stream log version a Stream Manifest snapshot was read at.
+
+    Changes computed from a snapshot commit with it as their base version. The
+    files of a stream without a log, from its manifest file or listed in
+    storage, are imported as version 0.
+    """
+    if manifest is None or manifest.version is None:
+        return 0
+    return manifest.version
+
+
+def _rename_stream_file(stream_file: "SingerFile") -> None:
+    """Give a stream file the next free sequence number, and rename its local files.
+
+    Sequence numbers are skipped while their local names are taken, so another
+    local file is never replaced.
+    """
+    source, index_source = stream_file.path, stream_file.index_path
+    stream_file.sequence += 1
+    while stream_file.path.exists() or (
+        stream_file.indexed and stream_file.index_path.exists()
+    ):
+        stream_file.sequence += 1
+    os.replace(source, stream_file.path)
+    if stream_file.indexed:
+        os.replace(index_source, stream_file.index_path)
+
+
+def _overlaps(
+    interval_start: "datetime",
+    interval_end: "datetime",
+    start: "datetime" | None,
+    end: "datetime" | None,
+) -> bool:
+    """Return True if [interval_start, interval_end) overlaps [start, end)."""
+    return (end is None or interval_start < end) and (
+        start is None or interval_end > start
+    )
+
+
+def _schema_versions(
+    versions: t.Sequence[SchemaVersion], entries: t.Iterable[StreamFileEntry]
+) -> t.List[SchemaVersion]:
+    """Return schema versions, plus a version for each unregistered schema hash.
+
+    An unregistered schema hash is first observed at the min time extracted of
+    its files. Versions are sorted by first observed time; the sort is stable,
+    so versions first observed together keep their registration order.
+    """
+    registered = {version.schema_hash for version in versions}
+    first_observed: t.Dict[str, datetime] = {}
+    for entry in entries:
+        if entry.schema_hash in registered:
+            continue
+        observed = first_observed.get(entry.schema_hash)
+        if observed is None or entry.min_time_extracted < observed:
+            first_observed[entry.schema_hash] = entry.min_time_extracted
+    versions = list(versions) + [
+        SchemaVersion(first_observed=observed.isoformat(), schema_hash=schema_hash)
+        for schema_hash, observed in sorted(
+            first_observed.items(), key=lambda item: (item[1], item[0])
+        )
+    ]
+    return sorted(
+        versions,
+        key=lambda version: naive_time(datetime.fromisoformat(version.first_observed)),
+    )
+
+
+def _replay_stream_log(
+    stream_id: str,
+    manifest: StreamManifest | None,
+    actions: t.Sequence[StreamLogAction],
+) -> StreamManifest:
+    """Return a snapshot with stream log actions applied to another snapshot."""
+    files: t.Dict[str, StreamFileEntry] = {}
+    versions: t.List[SchemaVersion] = []
+    if manifest is not None:
+        files = {entry.path: entry for entry in manifest.files}
+        versions = list(manifest.versions)
+    registered = {version.schema_hash for version in versions}
+    for action in actions:
+        for path in action.remove:
+            files.pop(path, None)
+        for entry in action.add:
+            # a replaced entry moves to the end, as if removed and added
+            files.pop(entry.path, None)
+            files[entry.path] = entry
+        for version in action.versions:
+            if version.schema_hash not in registered:
+                registered.add(version.schema_hash)
+                versions.append(version)
+    # entries are already validated
+    return StreamManifest.construct(
+        stream_id=stream_id,
+        files=list(files.values()),
+        versions=_schema_versions(versions, ()),
+        version=actions[-1].version,
+    )
+
+
+def _partition_sort_key(partition: Partition) -> t.Tuple[int, int, str]:
+    """Sort numeric partition values numerically, before any others."""
+    if isinstance(partition.value, int):
+        return (0, partition.value, "")
+    return (1, 0, str(partition.value))
+
 
 class BaseStore(ABC):
     """Base SingerLake storage interface."""
@@ -26,31 +201,786 @@ class BaseStore(ABC):
         self.singerlake = singerlake
         self.locker = locker
         self.path_manager = path_manager
+        self.manifest_cache = ManifestCache(ttl=self.config.manifest_cache_ttl)
 
-        self._lake_manifest: LakeManifest | None = None
-        self._lake_manifest_checksum: str | None = None
+    @property
+    def config(self) -> "StoreConfig":
+        """Return the store config."""
+        return self.singerlake.config.store
 
     @property
     def lake_root(self) -> t.Any:
         """Return the Lake root path."""
         return self.path_manager.lake_root
 
+    def _get_manifest(
+        self,
+        path: t.Any,
+        read: t.Callable[[], dict | None],
+        parse: t.Callable[[dict], ManifestT],
+        fresh: bool = False,
+    ) -> ManifestT | None:
+        """Get a manifest through the manifest cache.
+
+        Manifests are parsed once per stored version, and shallow copies of the
+        cached models are returned.
+
+        Args:
+            path: Path of the manifest file.
+            read: Function reading the manifest.
+            parse: Function parsing a read manifest.
+            fresh: Check the stored version even within the cache TTL.
+        """
+
+        def _load() -> ManifestT | None:
+            data = read()
+            return None if data is None else parse(data)
+
+        manifest = self.manifest_cache.get(
+            path,
+            get_version=lambda: self.get_file_version(path),
+            load=_load,
+            use_ttl=not fresh,
+        )
+        return None if manifest is None else manifest.copy()
+
     @property
     def lake_manifest(self) -> LakeManifest:
         """Return the Lake Manifest."""
-        if self._lake_manifest is None:
-            read_lake_manifest = self.read_lake_manifest()
-            if read_lake_manifest is not None:
-                self._lake_manifest = LakeManifest(**read_lake_manifest)
-            else:
-                raise ValueError("Lake Manifest not found.")
-        return self._lake_manifest
+        lake_manifest = self._get_manifest(
+            self.path_manager.lake_manifest_path,
+            read=self.read_lake_manifest,
+            parse=lambda data: LakeManifest(**data),
+        )
+        if lake_manifest is None:
+            raise ValueError("Lake Manifest not found.")
+        return lake_manifest
+
+    @property
+    def lake_manifest_has_changed(self) -> bool:
+        """Return True if the Lake Manifest changed since it was last read."""
+        path = self.path_manager.lake_manifest_path
+        return not self.manifest_cache.is_valid(path, self.get_file_version(path))
+
+    @t.final
+    def get_tap_manifest(self, tap_id: str, fresh: bool = False) -> TapManifest | None:
+        """Get a Tap Manifest by ID.
+
+        Args:
+            tap_id: Tap ID.
+            fresh: Check the stored manifest even within the cache TTL.
+        """
+        return self._get_manifest(
+            self.path_manager.get_tap_manifest_path(tap_id=tap_id),
+            read=lambda: self.read_tap_manifest(tap_id=tap_id),
+            parse=lambda data: TapManifest(**data),
+            fresh=fresh,
+        )
+
+    @t.final
+    def get_stream_manifest(
+        self, tap_id: str, stream_id: str, fresh: bool = False
+    ) -> StreamManifest | None:
+        """Get a Stream Manifest by ID.
+
+        The manifest is a snapshot of the stream log: its latest checkpoint
+        with the log versions after it replayed. A cached snapshot is brought up
+        to date by replaying only the versions added since. Streams without a
+        log fall back to a manifest file.
+
+        Args:
+            tap_id: Tap ID.
+            stream_id: Stream ID.
+            fresh: Check the stored manifest even within the cache TTL.
+        """
+        manifest = self.manifest_cache.update(
+            ("log", tap_id, stream_id),
+            lambda cached: self._read_stream_log(tap_id, stream_id, cached),
+            use_ttl=not fresh,
+        )
+        if manifest is not None:
+            return manifest.copy()
+        return self._get_manifest(
+            self.path_manager.get_stream_manifest_path(
+                tap_id=tap_id, stream_id=stream_id
+            ),
+            read=lambda: self.read_stream_manifest(tap_id=tap_id, stream_id=stream_id),
+            parse=lambda data: StreamManifest(**{"stream_id": stream_id, **data}),
+            fresh=fresh,
+        )
+
+    def _read_json_file(self, path: t.Any) -> dict | None:
+        """Read a JSON file, or return None if it doesn't exist."""
+        try:
+            with self.open_file(path) as json_file:
+                return self.singerlake.codec.loads(json_file.read())
+        except FileNotFoundError:
+            return None
+
+    def _file_exists(self, path: t.Any) -> bool:
+        """Return True if a file exists."""
+        try:
+            self.open_file(path).close()
+        except FileNotFoundError:
+            return False
+        return True
+
+    def _read_stream_log(
+        self, tap_id: str, stream_id: str, cached: StreamManifest | None
+    ) -> StreamManifest | None:
+        """Return a snapshot of the stream log, or None if the stream has none.
+
+        Args:
+            tap_id: Tap ID.
+            stream_id: Stream ID.
+            cached: A snapshot to replay later versions onto, if any.
+        """
+        path_manager = self.path_manager
+        manifest = cached
+        if manifest is None:
+            pointer = self._read_json_file(
+                path_manager.get_stream_log_path(
+                    tap_id, stream_id, STREAM_LOG_LAST_CHECKPOINT_FILENAME
+                )
+            )
+            if pointer is not None:
+                checkpoint = self._read_json_file(
+                    path_manager.get_stream_log_path(
+                        tap_id,
+                        stream_id,
+                        path_manager.stream_checkpoint_file_name(
+                            LastCheckpoint(**pointer).version
+                        ),
+                    )
+                )
+                if checkpoint is not None:
+                    manifest = StreamManifest(**{**checkpoint, "stream_id": stream_id})
+
+        actions = self._read_stream_log_actions(
+            tap_id,
+            stream_id,
+            after=-1
+            if manifest is None or manifest.version is None
+            else manifest.version,
+        )
+        if not actions:
+            return manifest
+        return _replay_stream_log(stream_id, manifest, actions)
+
+    def _read_stream_log_actions(
+        self, tap_id: str, stream_id: str, after: int
+    ) -> t.List[StreamLogAction]:
+        """Read the stream log versions after a version, in order."""
+        actions: t.List[StreamLogAction] = []
+        while True:
+            action = self._read_json_file(
+                self.path_manager.get_stream_log_path(
+                    tap_id,
+                    stream_id,
+                    self.path_manager.stream_log_file_name(after + len(actions) + 1),
+                )
+            )
+            if action is None:
+                return actions
+            actions.append(StreamLogAction(**action))
+
+    def _get_stream_log_version(self, tap_id: str, stream_id: str) -> int | None:
+        """Return the latest version of a stream log, or None if it has none.
+
+        Versions after the cached snapshot, or else the latest checkpoint, are
+        probed for without being read or replayed.
+        """
+        path_manager = self.path_manager
+        cached = self.manifest_cache.peek(("log", tap_id, stream_id))
+        if cached is not None:
+            version = cached.version
+        else:
+            pointer = self._read_json_file(
+                path_manager.get_stream_log_path(
+                    tap_id, stream_id, STREAM_LOG_LAST_CHECKPOINT_FILENAME
+                )
+            )
+            version = -1 if pointer is None else LastCheckpoint(**pointer).version
+        while self._file_exists(
+            path_manager.get_stream_log_path(
+                tap_id, stream_id, path_manager.stream_log_file_name(version + 1)
+            )
+        ):
+            version += 1
+        return None if version < 0 else version
+
+    def _write_stream_log_action(
+        self, tap_id: str, stream_id: str, action: StreamLogAction
+    ) -> None:
+        """Create a stream log version file, failing if it already exists."""
+        self.write_file(
+            self.path_manager.get_stream_log_path(
+                tap_id,
+                stream_id,
+                self.path_manager.stream_log_file_name(action.version),
+            ),
+            action.json().encode("utf-8"),
+            exclusive=True,
+        )
+
+    @t.final
+    def checkpoint_stream_log(self, tap_id: str, stream_id: str) -> int | None:
+        """Write a checkpoint of the stream log's latest version.
+
+        Returns:
+            The version checkpointed, or None if the stream has no log.
+        """
+        manifest = self.manifest_cache.update(
+            ("log", tap_id, stream_id),
+            lambda cached: self._read_stream_log(tap_id, stream_id, cached),
+            use_ttl=False,
+        )
+        if manifest is None:
+            return None
+        path_manager = self.path_manager
+        self.write_file(
+            path_manager.get_stream_log_path(
+                tap_id,
+                stream_id,
+                path_manager.stream_checkpoint_file_name(manifest.version),
+            ),
+            manifest.json().encode("utf-8"),
+        )
+        self.write_file(
+            path_manager.get_stream_log_path(
+                tap_id, stream_id, STREAM_LOG_LAST_CHECKPOINT_FILENAME
+            ),
+            LastCheckpoint(version=manifest.version).json().encode("utf-8"),
+        )
+        return manifest.version
+
+    @t.final
+    def add_stream_manifest_files(
+        self,
+        tap_id: str,
+        stream_id: str,
+        entries: t.Sequence[StreamFileEntry],
+        remove_paths: t.Collection[str] = (),
+        base_version: int | None = None,
+    ) -> StreamLogAction:
+        """Add (or replace) file entries in a Stream Manifest.
+
+        The change is appended to the stream log as the next version, so its
+        cost doesn't grow with the number of files in the stream. The schema
+        hashes of the entries are registered in the same version, and every
+        `checkpoint_interval` versions the log is checkpointed. The files of a
+        stream without a log are first imported as version 0.
+
+        No lock is held: the version file is created exclusively, so of
+        concurrent writers of a version only one succeeds. Every version
+        committed after the change's base version is checked, and if none
+        touches its paths the change is rebased onto them and retried as the
+        next version, up to `commit_retries` times.
+
+        Args:
+            tap_id: Tap ID.
+            stream_id: Stream ID.
+            entries: Entries to add, replacing any with the same path.
+            remove_paths: Paths of entries to remove in the same manifest write.
+            base_version: Stream log version of the snapshot the change was
+                computed from (see `snapshot_version`). None for changes that
+                don't depend on a snapshot, e.g. adding new files, which are
+                based on the latest version.
+
+        Raises:
+            CommitConflict: If a version after the base touched the same paths,
+                or retries ran out.
+        """
+        version = self._get_stream_log_version(tap_id, stream_id)
+        if version is None:
+            version = self._import_stream_manifest(
+                tap_id, stream_id, exclude={entry.path for entry in entries}
+            )
+        if base_version is None or base_version > version:
+            base_version = version
+        action = StreamLogAction(
+            version=base_version + 1,
+            base_version=base_version,
+            add=list(entries),
+            remove=list(remove_paths),
+            versions=_schema_versions([], entries),
+        )
+        # whether versions were committed after those checked
+        stale = version > base_version
+        for attempt in range(self.config.commit_retries + 1):
+            if attempt:
+                # back off, so contending writers don't collide in lockstep
+                time.sleep(random.uniform(0, COMMIT_BACKOFF_SECONDS * 2**attempt))
+            if stale:
+                committed = self._read_stream_log_actions(
+                    tap_id, stream_id, after=action.version - 1
+                )
+                for other in committed:
+                    paths = _conflicting_paths(action, other)
+                    if paths:
+                        raise CommitConflict(
+                            f"Stream log version {other.version} of {stream_id} "
+                            f"also changed: {', '.join(sorted(paths))}"
+                        )
+                # rebase onto the versions committed since
+                action = action.copy(
+                    update={"version": action.version + len(committed)}
+                )
+            try:
+                self._write_stream_log_action(tap_id, stream_id, action)
+            except FileExistsError:
+                stale = True
+                continue
+            interval = self.config.checkpoint_interval
+            if interval > 0 and action.version and action.version % interval == 0:
+                self.checkpoint_stream_log(tap_id, stream_id)
+            return action
+        raise CommitConflict(
+            f"Stream log of {stream_id} changed on each of "
+            f"{self.config.commit_retries + 1} commit attempts."
+        )
+
+    def _import_stream_manifest(
+        self, tap_id: str, stream_id: str, exclude: t.Collection[str] = ()
+    ) -> int:
+        """Import a stream's files as the first version of its log.
+
+        Files listed in storage are imported together with the entries of the
+        stream's manifest file, if any, so files committed before the stream
+        had a log stay visible.
+
+        Args:
+            tap_id: Tap ID.
+            stream_id: Stream ID.
+            exclude: Paths of listed files not to import, e.g. files about to
+                be added by the first commit to the log.
+
+        Returns:
+            The version imported, or -1 if there was nothing to import.
+        """
+        manifest = self._get_manifest(
+            self.path_manager.get_stream_manifest_path(
+                tap_id=tap_id, stream_id=stream_id
+            ),
+            read=lambda: self.read_stream_manifest(tap_id=tap_id, stream_id=stream_id),
+            parse=lambda data: StreamManifest(**{"stream_id": stream_id, **data}),
+            fresh=True,
+        )
+        entries = {
+            entry.path: entry
+            for entry in self.list_stream_files(tap_id=tap_id, stream_id=stream_id)
+            if entry.path not in exclude
+        }
+        versions: t.List[SchemaVersion] = []
+        if manifest is not None:
+            # manifest entries carry more metadata than file names
+            entries.update((entry.path, entry) for entry in manifest.files)
+            versions = manifest.versions
+        if not (entries or versions):
+            return -1
+        try:
+            self._write_stream_log_action(
+                tap_id,
+                stream_id,
+                StreamLogAction(
+                    version=0,
+                    add=list(entries.values()),
+                    versions=_schema_versions(versions, entries.values()),
+                ),
+            )
+        except FileExistsError:
+            # imported, or first committed to, by another writer
+            version = self._get_stream_log_version(tap_id, stream_id)
+            return 0 if version is None else version
+        return 0
+
+    @t.final
+    def get_stream_schema_versions(
+        self, tap_id: str, stream_id: str
+    ) -> t.List[SchemaVersion]:
+        """Get the schema versions of a stream, in first observed order.
+
+        Versions are read from the Stream Manifest. Schema hashes of files it
+        doesn't register yet, or of listed files if it lists none, are first
+        observed at the min time extracted of their files.
+        """
+        manifest = self.get_stream_manifest(tap_id=tap_id, stream_id=stream_id)
+        if manifest is None or not manifest.files:
+            return _schema_versions(
+                [] if manifest is None else manifest.versions,
+                self.list_stream_files(tap_id=tap_id, stream_id=stream_id),
+            )
+        return _schema_versions(manifest.versions, manifest.files)
+
+    @t.final
+    def commit_stream_files(
+        self,
+        stream_files: list["SingerFile"],
+        replaces: t.Collection[str] = (),
+        base_version: int | None = None,
+    ) -> t.List[CommitResult]:
+        """Commit stream files to storage.
+
+        Target paths are computed up front and their directories created in one
+        pass. Files are then committed concurrently on a pool of
+        `commit_workers` threads, to their final paths, and synced in one batch.
+        Committed files are never replaced: a file whose path is taken, e.g.
+        by another writer's file of the same name, gets the next sequence
+        number and is committed under that name instead. Finally, an entry for
+        each committed file is added to its Stream Manifest, optimistically and
+        without holding a lock.
+
+        Args:
+            stream_files: Stream files to commit.
+            replaces: Stream-relative paths of files the committed files replace.
+                If every file committed, their entries are removed from the
+                Stream Manifests in the same write that adds the new entries.
+            base_version: Stream log version of the snapshot `replaces` was
+                chosen from.
+
+        Returns:
+            One result per stream file, in the order given.
+
+        Raises:
+            CommitConflict: If a Stream Manifest change after the base version
+                touched the same paths. The committed files are left
+                unreferenced.
+        """
+        schema_hashes = self.path_manager.hash_stream_schemas(stream_files)
+        paths = self.path_manager.get_stream_file_paths(
+            stream_files, schema_hashes=schema_hashes
+        )
+        self.create_directories(paths)
+
+        def _commit(
+            stream_file: "SingerFile", path: t.Any, schema_hash: str
+        ) -> CommitResult:
+            try:
+                while True:
+                    try:
+                        self.commit_stream_file(stream_file=stream_file, path=path)
+                    except FileExistsError:
+                        _rename_stream_file(stream_file)
+                        (path,) = self.path_manager.get_stream_file_paths(
+                            [stream_file], schema_hashes=[schema_hash]
+                        )
+                        continue
+                    return CommitResult(stream_file=stream_file, path=path)
+            except Exception as ex:  # noqa: BLE001
+                return CommitResult(stream_file=stream_file, path=path, error=ex)
+
+        workers = max(1, min(self.config.commit_workers, len(stream_files)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_commit, stream_files, paths, schema_hashes))
+
+        if self.config.fsync:
+            self.sync_paths([result.path for result in results if result.success])
+
+        stream_entries: dict[t.Tuple[str, str], list[StreamFileEntry]] = {}
+        for result, schema_hash in zip(results, schema_hashes):
+            if result.success:
+                stream_file = result.stream_file
+                stream_entries.setdefault(
+                    (stream_file.tap_id, stream_file.stream_id), []
+                ).append(self._stream_file_entry(stream_file, schema_hash))
+        all_committed = all(result.success for result in results)
+        for (tap_id, stream_id), entries in stream_entries.items():
+            self.add_stream_manifest_files(
+                tap_id=tap_id,
+                stream_id=stream_id,
+                entries=entries,
+                remove_paths=replaces if all_committed else (),
+                base_version=base_version,
+            )
+
+        return results
+
+    def _stream_file_entry(
+        self, stream_file: "SingerFile", schema_hash: str
+    ) -> StreamFileEntry:
+        """Return the Stream Manifest entry of a stream file."""
+        return StreamFileEntry(
+            path=self.path_manager.get_stream_file_relative_path(
+                stream_file, schema_hash=schema_hash
+            ),
+            schema_hash=schema_hash,
+            partitions=stream_file.partitions,
+            min_time_extracted=naive_time(stream_file.min_time_extracted),
+            max_time_extracted=naive_time(stream_file.max_time_extracted),
+            compression=stream_file.encryption,
+            record_count=stream_file.record_count,
+            size_bytes=stream_file.size_bytes,
+            uncompressed_bytes=stream_file.uncompressed_bytes,
+            checksum=stream_file.checksum,
+            is_sorted=stream_file.is_sorted,
+            indexed=stream_file.indexed,
+            zone_maps=stream_file.zone_maps,
+        )
+
+    @t.final
+    def plan_stream_files(
+        self,
+        tap_id: str,
+        stream_id: str,
+        start: "datetime" | None = None,
+        end: "datetime" | None = None,
+        predicates: t.Sequence["Predicate"] = (),
+    ) -> t.Iterator[StreamFileEntry]:
+        """Plan which committed stream files to read for the range [start, end).
+
+        Files are chosen from the Stream Manifest alone when it lists any, so no
+        directories are listed. Otherwise this falls back to `list_stream_files`.
+        Files whose zone maps rule out any of the predicates are skipped.
+        """
+        entries = self._plan_stream_files(tap_id, stream_id, start, end)
+        if not predicates:
+            yield from entries
+            return
+
+        for entry in entries:
+            if all(
+                predicate.might_match(
+                    entry.zone_maps.get(predicate.field), entry.record_count
+                )
+                for predicate in predicates
+            ):
+                yield entry
+
+    def _plan_stream_files(
+        self,
+        tap_id: str,
+        stream_id: str,
+        start: "datetime" | None,
+        end: "datetime" | None,
+    ) -> t.Iterator[StreamFileEntry]:
+        manifest = self.get_stream_manifest(tap_id=tap_id, stream_id=stream_id)
+        if manifest is None or not manifest.files:
+            yield from self.list_stream_files(
+                tap_id=tap_id, stream_id=stream_id, start=start, end=end
+            )
+            return
+
+        start = None if start is None else naive_time(start)
+        end = None if end is None else naive_time(end)
+        version_order = {
+            version.schema_hash: position
+            for position, version in enumerate(
+                _schema_versions(manifest.versions, manifest.files)
+            )
+        }
+        entries = []
+        for entry in manifest.files:
+            interval = partition_interval(entry.partitions)
+            if interval is not None and not _overlaps(*interval, start, end):
+                continue
+            if not _overlaps(
+                entry.min_time_extracted,
+                entry.max_time_extracted + timedelta(microseconds=1),
+                start,
+                end,
+            ):
+                continue
+            entries.append(entry)
+
+        # schema versions in first observed order, so a stream reads as one
+        entries.sort(
+            key=lambda entry: (
+                version_order[entry.schema_hash],
+                entry.schema_hash,
+                tuple(map(_partition_sort_key, entry.partitions)),
+                entry.min_time_extracted,
+                entry.max_time_extracted,
+                entry.path,
+            )
+        )
+        yield from entries
+
+    @t.final
+    def list_stream_files(
+        self,
+        tap_id: str,
+        stream_id: str,
+        start: "datetime" | None = None,
+        end: "datetime" | None = None,
+    ) -> t.Iterator[StreamFileEntry]:
+        """List committed stream files overlapping the time range [start, end).
+
+        Only partition directories whose time interval overlaps the range are
+        listed, and files are pruned on the min/max time extracted in their
+        names. Files are yielded in partition, then time order.
+        """
+        start = None if start is None else naive_time(start)
+        end = None if end is None else naive_time(end)
+        partition_names: t.Sequence[str] = [
+            partition_by.by for partition_by in self.path_manager.file_partition_by
+        ] or ["default"]
+        schema_hashes, _ = self.list_dir(
+            self.path_manager.get_stream_relative_path(tap_id, stream_id, "")
+        )
+        for schema_hash in schema_hashes:
+            if schema_hash.startswith("_"):
+                # e.g. the stream log
+                continue
+            yield from self._list_partition_files(
+                tap_id=tap_id,
+                stream_id=stream_id,
+                relative_path=schema_hash,
+                schema_hash=schema_hash,
+                partition_names=partition_names,
+                partitions=(),
+                start=start,
+                end=end,
+            )
+
+    def _list_partition_files(
+        self,
+        tap_id: str,
+        stream_id: str,
+        relative_path: str,
+        schema_hash: str,
+        partition_names: t.Sequence[str],
+        partitions: t.Tuple[Partition, ...],
+        start: "datetime" | None,
+        end: "datetime" | None,
+    ) -> t.Iterator[StreamFileEntry]:
+        """Recursively list stream files below a partition directory."""
+        path_manager = self.path_manager
+        dir_names, file_names = self.list_dir(
+            path_manager.get_stream_relative_path(tap_id, stream_id, relative_path)
+        )
+
+        if len(partitions) == len(partition_names):
+            entries = []
+            for file_name in file_names:
+                parsed = path_manager.parse_stream_file_name(file_name)
+                if parsed is None or not _overlaps(
+                    parsed.min_time_extracted,
+                    # file names are truncated to the second
+                    parsed.max_time_extracted + timedelta(seconds=1),
+                    start,
+                    end,
+                ):
+                    continue
+                entries.append(
+                    (
+                        parsed,
+                        StreamFileEntry(
+                            path=f"{relative_path}/{file_name}",
+                            schema_hash=schema_hash,
+                            partitions=partitions,
+                            min_time_extracted=parsed.min_time_extracted,
+                            max_time_extracted=parsed.max_time_extracted,
+                            compression=parsed.compression,
+                        ),
+                    )
+                )
+            entries.sort(
+                key=lambda entry: (
+                    entry[0].min_time_extracted,
+                    entry[0].max_time_extracted,
+                    entry[0].sequence,
+                )
+            )
+            for _, entry in entries:
+                yield entry
+            return
+
+        name = partition_names[len(partitions)]
+        children = []
+        for dir_name in dir_names:
+            partition = path_manager.parse_partition(name, dir_name)
+            if partition is None:
+                continue
+            interval = partition_interval(partitions + (partition,))
+            if interval is not None and not _overlaps(*interval, start, end):
+                continue
+            children.append((partition, dir_name))
+
+        children.sort(key=lambda child: _partition_sort_key(child[0]))
+        for partition, dir_name in children:
+            yield from self._list_partition_files(
+                tap_id=tap_id,
+                stream_id=stream_id,
+                relative_path=f"{relative_path}/{dir_name}",
+                schema_hash=schema_hash,
+                partition_names=partition_names,
+                partitions=partitions + (partition,),
+                start=start,
+                end=end,
+            )
+
+    @t.final
+    def open_stream_file(
+        self, tap_id: str, stream_id: str, entry: StreamFileEntry
+    ) -> t.BinaryIO:
+        """Open a committed stream file for binary reading."""
+        return self.open_file(
+            self.path_manager.get_stream_relative_path(tap_id, stream_id, entry.path)
+        )
+
+    @t.final
+    def remove_stream_files(
+        self, tap_id: str, stream_id: str, paths: t.Collection[str]
+    ) -> None:
+        """Remove committed stream files, and their sidecar indexes.
+
+        Entries are removed from the Stream Manifest before any file is deleted,
+        so manifest readers never plan a deleted file. Readers that already
+        planned a file may still fail to open it.
+
+        Args:
+            tap_id: Tap ID.
+            stream_id: Stream ID.
+            paths: Paths of the files, relative to the stream.
+        """
+        manifest = self.get_stream_manifest(
+            tap_id=tap_id, stream_id=stream_id, fresh=True
+        )
+        if manifest is not None and any(
+            entry.path in paths for entry in manifest.files
+        ):
+            self.add_stream_manifest_files(
+                tap_id=tap_id,
+                stream_id=stream_id,
+                entries=[],
+                remove_paths=paths,
+                base_version=snapshot_version(manifest),
+            )
+        for path in paths:
+            for file_path in (path, path + STREAM_FILE_INDEX_SUFFIX):
+                self.delete_file(
+                    self.path_manager.get_stream_relative_path(
+                        tap_id, stream_id, file_path
+                    )
+                )
 
     @t.final
-    def get_tap_manifest(self, tap_id: str) -> TapManifest | None:
-        """Get a Tap Manifest by ID."""
-        read_tap_manifest = self.read_tap_manifest(tap_id=tap_id)
-        return None if read_tap_manifest is None else TapManifest(**read_tap_manifest)
+    def get_stream_file_size(
+        self, tap_id: str, stream_id: str, entry: StreamFileEntry
+    ) -> int:
+        """Return the stored size of a committed stream file in bytes."""
+        if entry.size_bytes is not None:
+            return entry.size_bytes
+        return self.get_file_size(
+            self.path_manager.get_stream_relative_path(tap_id, stream_id, entry.path)
+        )
+
+    @t.final
+    def read_stream_file_index(
+        self, tap_id: str, stream_id: str, entry: StreamFileEntry
+    ) -> bytes | None:
+        """Read the sidecar index of a committed stream file, if it has one."""
+        if entry.indexed is False or entry.compression != "none":
+            return None
+        try:
+            with self.open_file(
+                self.path_manager.get_stream_relative_path(
+                    tap_id, stream_id, entry.path + STREAM_FILE_INDEX_SUFFIX
+                )
+            ) as index_file:
+                return index_file.read()
+        except FileNotFoundError:
+            return None
 
     # override these methods to implement a custom store
     def get_lake_root(self) -> t.Any:
@@ -66,17 +996,84 @@ class BaseStore(ABC):
         raise NotImplementedError()
 
     def read_stream_manifest(self, tap_id: str, stream_id: str) -> dict | None:
-        """Read a Stream Manifest."""
+        """Read the manifest file of a stream without a stream log."""
         raise NotImplementedError()
 
     def create_tap(self, tap_id: str) -> "Tap":
         """Create a Tap."""
         raise NotImplementedError()
 
-    def commit_stream_files(self, stream_files: list["SingerFile"]) -> None:
-        """Commit stream files to storage."""
+    def list_dir(self, path: t.Any) -> t.Tuple[t.List[str], t.List[str]]:
+        """List a directory.
+
+        Returns:
+            Sorted directory and file names, excluding hidden names. Empty if
+            the directory doesn't exist.
+        """
+        raise NotImplementedError()
+
+    def open_file(self, path: t.Any) -> t.BinaryIO:
+        """Open a file for binary reading."""
+        raise NotImplementedError()
+
+    def get_file_size(self, path: t.Any) -> int:
+        """Return the size of a file in bytes."""
+        raise NotImplementedError()
+
+    def get_file_version(self, path: t.Any) -> t.Hashable | None:
+        """Return a token that changes whenever a file changes, e.g. its ETag.
+
+        Manifests are only cached by stores that override this.
+
+        Returns:
+            The token, or None if the file doesn't exist.
+        """
+        return None
+
+    def delete_file(self, path: t.Any) -> None:
+        """Delete a file, if it exists."""
         raise NotImplementedError()
 
+    def create_directories(self, paths: t.Sequence[t.Any]) -> None:
+        """Create the parent directories of the given file paths.
+
+        Stores without real directories (e.g. object stores) need not override.
+        """
+
+    def commit_stream_file(self, stream_file: "SingerFile", path: t.Any) -> None:
+        """Commit a stream file to the given path in storage.
+
+        Called concurrently from multiple threads. Nothing is left behind if
+        the path is taken.
+
+        Raises:
+            FileExistsError: If a file exists at the path, or at its sidecar
+                index path.
+        """
+        raise NotImplementedError()
+
+    def sync_paths(self, paths: t.Sequence[t.Any]) -> None:
+        """Durably persist committed files.
+
+        Stores that are durable on write need not override.
+        """
+
     def write_tap_manifest(self, tap_id: str, manifest: TapManifest) -> TapManifest:
-        """Write a Tap Manifest."""
+        """Write a Tap Manifest.
+
+        Implementations must invalidate the manifest's path in `manifest_cache`.
+        """
+        raise NotImplementedError()
+
+    def write_file(self, path: t.Any, data: bytes, exclusive: bool = False) -> None:
+        """Atomically write a file, replacing any existing one.
+
+        Args:
+            path: Path of the file.
+            data: Contents of the file.
+            exclusive: Fail if the file exists instead of replacing it.
+
+        Raises:
+            FileExistsError: If exclusive and the file exists.
+        """
         raise NotImplementedError()
@@ -1,13 +1,18 @@
 from __future__ import annotations
 
-import hashlib
 import json
+import os
 import shutil
 import typing as t
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from uuid import uuid4
 
 from singerlake.store.manifest import TapManifest
-from singerlake.store.path_manager.base import BasePathTransformer
+from singerlake.store.path_manager.base import (
+    STREAM_FILE_INDEX_SUFFIX,
+    BasePathTransformer,
+)
 from singerlake.tap import Tap
 
 from .base import BaseStore
@@ -41,38 +46,17 @@ class LocalStore(BaseStore):
             singerlake=singerlake, locker=locker, path_manager=path_manager
         )
         self.path_manager.transformer = LocalPathTransformer()
-
-    @property
-    def lake_manifest_has_changed(self) -> bool:
-        """Return True if the Lake Manifest has changed."""
-        return self.read_lake_manifest_checksum() != self._lake_manifest_checksum
-
-    def _md5(self, file_path: Path):
-        """Return the md5 checksum of a file."""
-        hash_md5 = hashlib.md5()
-        with open(file_path, "rb") as f:
-            for chunk in iter(lambda: f.read(4096), b""):
-                hash_md5.update(chunk)
-        return hash_md5.hexdigest()
+        self._lake_device: int | None = None
 
     def _read_json(self, file_path: Path):
         """Read a JSON file."""
         if not file_path.exists():
             return None
-        with file_path.open("r", encoding="utf-8") as json_file:
-            return json.load(json_file)
-
-    def read_lake_manifest_checksum(self) -> str | None:
-        """Read the Lake Manifest checksum."""
-        return self._md5(self.path_manager.lake_manifest_path)
+        return self.singerlake.codec.loads(file_path.read_bytes())
 
     def read_lake_manifest(self) -> dict | None:
         """Read the Lake Manifest."""
-        lake_manifest = self._read_json(self.path_manager.lake_manifest_path)
-        if lake_manifest is not None:
-            self._lake_manifest_checksum = self.read_lake_manifest_checksum()
-            return lake_manifest
-        return None
+        return self._read_json(self.path_manager.lake_manifest_path)
 
     # Tap Manifest
     def read_tap_manifest(self, tap_id: str) -> dict | None:
@@ -88,18 +72,161 @@ class LocalStore(BaseStore):
             )
         )
 
+    def write_file(self, path: Path, data: bytes, exclusive: bool = False) -> None:
+        """Atomically write a file, staged next to it.
+
+        Exclusive writes hard-link the staged file into place, which fails if
+        the file exists. Where hard links are unsupported the file is instead
+        created exclusively and written in place.
+        """
+        path.parent.mkdir(parents=True, exist_ok=True)
+        staged = path.parent / f".{path.name}.{uuid4().hex}.partial"
+        try:
+            with staged.open("wb") as staged_file:
+                staged_file.write(data)
+                if self.config.fsync:
+                    staged_file.flush()
+                    os.fsync(staged_file.fileno())
+            if exclusive:
+                try:
+                    os.link(staged, path)
+                except FileExistsError:
+                    raise
+                except OSError:
+                    with path.open("xb") as exclusive_file:
+                        exclusive_file.write(data)
+            else:
+                os.replace(staged, path)
+        finally:
+            staged.unlink(missing_ok=True)
+
     # Stream Files
-    def _commit_stream_file(self, stream_file: "SingerFile") -> None:
-        """Commit a singer file to storage."""
-        file_path = self.path_manager.get_stream_file_path(stream_file=stream_file)
-        if not file_path.parent.exists():
-            file_path.parent.mkdir(parents=True)
-        shutil.copy(stream_file.path, file_path)
-
-    def commit_stream_files(self, stream_files: list["SingerFile"]) -> None:
-        """Commit singer files to storage."""
-        for stream_file in stream_files:
-            self._commit_stream_file(stream_file=stream_file)
+    def list_dir(self, path: Path) -> t.Tuple[t.List[str], t.List[str]]:
+        """List a directory."""
+        dir_names: t.List[str] = []
+        file_names: t.List[str] = []
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    if entry.name.startswith("."):
+                        continue
+                    if entry.is_dir():
+                        dir_names.append(entry.name)
+                    else:
+                        file_names.append(entry.name)
+        except FileNotFoundError:
+            pass
+        return sorted(dir_names), sorted(file_names)
+
+    def open_file(self, path: Path) -> t.BinaryIO:
+        """Open a file for binary reading."""
+        return path.open("rb")
+
+    def get_file_size(self, path: Path) -> int:
+        """Return the size of a file in bytes."""
+        return path.stat().st_size
+
+    def get_file_version(self, path: Path) -> t.Hashable | None:
+        """Return the modification time, size and inode of a file."""
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+    def delete_file(self, path: Path) -> None:
+        """Delete a file, if it exists."""
+        path.unlink(missing_ok=True)
+
+    @property
+    def lake_device(self) -> int:
+        """Return the ID of the device the lake is stored on."""
+        if self._lake_device is None:
+            self._lake_device = os.stat(self.lake_root).st_dev
+        return self._lake_device
+
+    @staticmethod
+    def _copy_file_exclusive(source: Path, target: Path) -> None:
+        """Create a file exclusively and copy another into it."""
+        target_file = target.open("xb")
+        try:
+            with target_file, source.open("rb") as source_file:
+                shutil.copyfileobj(source_file, target_file)
+        except BaseException:
+            target.unlink(missing_ok=True)
+            raise
+
+    def _publish_file(self, source: Path, target: Path) -> None:
+        """Atomically place a file at the target path, unless one exists there.
+
+        When the source is on the same filesystem as the lake it is hard-linked
+        into place, so no bytes are copied. Otherwise it is copied to a file
+        staged next to the target, which is hard-linked into place. Where hard
+        links are unsupported the target is instead created exclusively and
+        written in place.
+
+        Raises:
+            FileExistsError: If the target exists.
+        """
+        if os.stat(source).st_dev == self.lake_device:
+            try:
+                os.link(source, target)
+            except FileExistsError:
+                raise
+            except OSError:
+                # hard links unsupported (e.g. by the filesystem)
+                self._copy_file_exclusive(source, target)
+            return
+
+        staged = target.parent / f".{target.name}.{uuid4().hex}.partial"
+        try:
+            shutil.copyfile(source, staged)
+            try:
+                os.link(staged, target)
+            except FileExistsError:
+                raise
+            except OSError:
+                self._copy_file_exclusive(staged, target)
+        finally:
+            staged.unlink(missing_ok=True)
+
+    def create_directories(self, paths: t.Sequence[Path]) -> None:
+        """Create the parent directories of the given file paths."""
+        for directory in sorted({path.parent for path in paths}):
+            directory.mkdir(parents=True, exist_ok=True)
+
+    def commit_stream_file(self, stream_file: "SingerFile", path: Path) -> None:
+        """Commit a singer file, and its sidecar index first if it has one."""
+        index_path = path.with_name(path.name + STREAM_FILE_INDEX_SUFFIX)
+        if stream_file.indexed:
+            self._publish_file(stream_file.index_path, index_path)
+        try:
+            self._publish_file(stream_file.path, path)
+        except FileExistsError:
+            if stream_file.indexed:
+                index_path.unlink(missing_ok=True)
+            raise
+
+    def sync_paths(self, paths: t.Sequence[Path]) -> None:
+        """Fsync committed files, then each of their directories once."""
+
+        def _fsync(path: Path) -> None:
+            fd = os.open(path, os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+        if not paths:
+            return
+
+        directories = sorted({path.parent for path in paths})
+        workers = max(1, min(self.config.commit_workers, len(paths)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(_fsync, paths))
+            if os.name != "nt":
+                # directory entries can't be opened for fsync on Windows
+                list(executor.map(_fsync, directories))
 
     def create_tap(self, tap_id: str) -> Tap:
         """Create a Tap."""
@@ -113,4 +240,5 @@ class LocalStore(BaseStore):
         file_path = self.path_manager.get_tap_manifest_path(tap_id=tap_id)
         with file_path.open("w", encoding="utf-8") as json_file:
             json.dump(manifest.dict(), json_file, indent=2)
+        self.manifest_cache.invalidate(file_path)
         return manifest
@@ -1,18 +1,46 @@
 import typing as t
+from contextlib import contextmanager
 
 if t.TYPE_CHECKING:
     from singerlake import Singerlake
 
+# (), (tap_id,) or (tap_id, stream_id)
+LockScope = t.Tuple[str, ...]
+
+
+class LockLost(Exception):
+    """Raised when a held lock's lease expired and was taken by another holder."""
+
+
+def lock_scope(
+    tap_id: t.Optional[str] = None, stream_id: t.Optional[str] = None
+) -> LockScope:
+    """Return the scope of a lake, tap or stream lock."""
+    if stream_id is not None and tap_id is None:
+        raise ValueError("A stream lock needs a tap ID.")
+    return tuple(scope_id for scope_id in (tap_id, stream_id) if scope_id is not None)
+
+
+def scopes_overlap(scope: LockScope, other: LockScope) -> bool:
+    """Return True if one scope contains the other.
+
+    The lake contains every tap, and a tap every one of its streams.
+    """
+    return scope[: len(other)] == other or other[: len(scope)] == scope
+
 
 class BaseLocker:
-    """Base Lock."""
+    """Base Lock.
+
+    Locks are scoped to the lake, a tap or a stream, and exclude locks held by
+    other Singerlake instances on overlapping scopes.
+    """
 
     def __init__(self, singerlake: "Singerlake"):
         """Base Lock.
 
         Args:
-            store: SingerLake Store.
-            stream: SingerLake Stream.
+            singerlake: SingerLake instance.
         """
         self.singerlake = singerlake
 
@@ -26,47 +54,53 @@ class BaseLocker:
         """Store."""
         return self.singerlake.store
 
-    def acquire(self):
+    def acquire(
+        self, tap_id: t.Optional[str] = None, stream_id: t.Optional[str] = None
+    ):
         """Acquire lock.
 
-        If a stream is provided, acquire a lock on that stream.
-        Otherwise, acquire a lock on the lake.
+        If a stream is provided, acquire a lock on that stream. If only a tap is
+        provided, acquire a lock on that tap. Otherwise, acquire a lock on the
+        lake.
         """
         raise NotImplementedError()
 
-    def release(self):
+    def release(
+        self, tap_id: t.Optional[str] = None, stream_id: t.Optional[str] = None
+    ):
         """Release lock.
 
-        If a stream is provided, release the lock on that stream.
-        Otherwise, release the lock on the lake.
+        If a stream is provided, release the lock on that stream. If only a tap
+        is provided, release the lock on that tap. Otherwise, release the lock
+        on the lake.
         """
         raise NotImplementedError()
 
-    def refresh(self):
+    def refresh(
+        self, tap_id: t.Optional[str] = None, stream_id: t.Optional[str] = None
+    ):
         """Refresh lock.
 
-        If a stream is provided, refresh the lock on that stream.
-        Otherwise, refresh the lock on the lake.
+        If a stream is provided, refresh the lock on that stream. If only a tap
+        is provided, refresh the lock on that tap. Otherwise, refresh the lock
+        on the lake.
         """
         raise NotImplementedError()
 
+    @contextmanager
+    def lock(self, tap_id: t.Optional[str] = None, stream_id: t.Optional[str] = None):
+        """Hold a lake, tap or stream lock for the duration of a context."""
+        self.acquire(tap_id=tap_id, stream_id=stream_id)
+        try:
+            yield self
+        finally:
+            self.release(tap_id=tap_id, stream_id=stream_id)
+
     def __enter__(self):
-        """Enter context."""
+        """Enter context, locking the lake."""
         self.acquire()
+        return self
 
     def __exit__(self, exc_type, exc_value, traceback):
         """Exit context."""
         self.release()
-
-
-class LocalFileLock(BaseLocker):
-    """Local File Lock."""
-
-    def acquire(self):
-        return super().acquire()
-
-    def release(self):
-        return super().release()
-
-    def refresh(self):
-        return super().refresh()
@@ -0,0 +1,330 @@
+import json
+import os
+import threading
+import time
+import typing as t
+from pathlib import Path
+from urllib.parse import quote
+from uuid import uuid4
+
+from filelock import FileLock, Timeout
+
+from .base import BaseLocker, LockLost, LockScope, lock_scope, scopes_overlap
+
+if t.TYPE_CHECKING:
+    from singerlake import Singerlake
+
+LOCK_FILE_NAME = ".singerlake.lock"
+LEASE_DIRNAME = ".singerlake.leases"
+LEASE_SUFFIX = ".lease"
+
+
+class Lease(t.NamedTuple):
+    """A lock on a scope, held by a Singerlake instance until it expires."""
+
+    holder: str
+    scope: LockScope
+    expires_at: float
+
+    @property
+    def is_expired(self) -> bool:
+        """Return True if the lease has expired."""
+        return self.expires_at <= time.time()
+
+
+class _Hold(t.NamedTuple):
+    """A scope held by a thread of this instance, and its re-entry depth.
+
+    A depth of 0 marks a lease being taken or released.
+    """
+
+    owner: int
+    depth: int
+
+
+def lease_file_name(scope: LockScope) -> str:
+    """Return the file name of a scope's lease."""
+    parts = ("lake", *scope)
+    return ".".join(quote(part, safe="").replace(".", "%2E") for part in parts) + (
+        LEASE_SUFFIX
+    )
+
+
+class LocalFileLock(BaseLocker):
+    """Local File Lock.
+
+    Each held lake, tap or stream lock is a lease file in the lock directory
+    (`lock.path`, or the lake root of a local lake), naming its holder (the
+    Singerlake instance ID) and when it expires. Leases are checked and taken
+    under a lock file in the same directory, held only briefly, so locks on
+    disjoint scopes never wait for each other. While any
+    lease is held, a background thread refreshes them every `refresh_interval`
+    seconds. Leases of a crashed holder expire after `lease_seconds` and are
+    then reclaimed. Locks are re-entrant within a thread, and exclude other
+    threads of the instance from overlapping scopes.
+    """
+
+    def __init__(
+        self,
+        singerlake: "Singerlake",
+        timeout: t.Optional[float] = None,
+        lease_seconds: float = 60.0,
+        refresh_interval: t.Optional[float] = None,
+        poll_interval: float = 0.05,
+        lock_dir: t.Optional[Path] = None,
+    ):
+        """Local File Lock.
+
+        Args:
+            singerlake: SingerLake instance.
+            timeout: Seconds to wait for a lock, or None to wait forever.
+            lease_seconds: Seconds a lease is valid for without a refresh.
+            refresh_interval: Seconds between lease refreshes. Defaults to a
+                third of `lease_seconds`.
+            poll_interval: Seconds between attempts to take a held lock.
+            lock_dir: Local directory of the lock and lease files. Defaults to
+                the lake root, which must then be a local path.
+        """
+        super().__init__(singerlake=singerlake)
+        self.timeout = timeout
+        self.lease_seconds = lease_seconds
+        self.refresh_interval = (
+            lease_seconds / 3 if refresh_interval is None else refresh_interval
+        )
+        self.poll_interval = poll_interval
+        self._lock_dir = lock_dir
+        self._lock: t.Optional[FileLock] = None
+        self._held: t.Dict[LockScope, _Hold] = {}
+        self._lost: t.Set[LockScope] = set()
+        self._state_lock = threading.RLock()
+        self._state_changed = threading.Condition(self._state_lock)
+        self._refresher: t.Optional[threading.Thread] = None
+        self._stop_refresh = threading.Event()
+
+    @property
+    def lock_dir(self) -> Path:
+        """Directory of the lock file and lease files."""
+        if self._lock_dir is not None:
+            return self._lock_dir
+        if not isinstance(self.store.lake_root, Path):
+            raise ValueError(
+                "Local file locks of a lake not stored locally need a lock path."
+            )
+        return self.store.lake_root
+
+    @property
+    def file_lock(self) -> FileLock:
+        """File lock guarding the lease files."""
+        if self._lock is None:
+            self.lock_dir.mkdir(parents=True, exist_ok=True)
+            self._lock = FileLock(str(self.lock_dir / LOCK_FILE_NAME))
+        return self._lock
+
+    @property
+    def lease_dir(self) -> Path:
+        """Directory of the lease files."""
+        return self.lock_dir / LEASE_DIRNAME
+
+    def _lease_path(self, scope: LockScope) -> Path:
+        return self.lease_dir / lease_file_name(scope)
+
+    def _read_lease(self, path: Path) -> t.Optional[Lease]:
+        """Read a lease file, or return None if it doesn't exist."""
+        try:
+            data = json.loads(path.read_bytes())
+        except FileNotFoundError:
+            return None
+        return Lease(
+            holder=data["holder"],
+            scope=tuple(data["scope"]),
+            expires_at=data["expires_at"],
+        )
+
+    def _write_lease(self, scope: LockScope) -> None:
+        """Write a lease on a scope held by this instance."""
+        lease = Lease(
+            holder=self.instance_id,
+            scope=scope,
+            expires_at=time.time() + self.lease_seconds,
+        )
+        path = self._lease_path(scope)
+        staged = path.parent / f".{path.name}.{uuid4().hex}.partial"
+        staged.write_text(json.dumps(lease._asdict()), encoding="utf-8")
+        os.replace(staged, path)
+
+    def _try_acquire(self, scope: LockScope) -> bool:
+        """Take a lease on a scope, unless another holder has an overlapping one.
+
+        Must be called holding the file lock. Expired leases are removed.
+        """
+        self.lease_dir.mkdir(parents=True, exist_ok=True)
+        for path in self.lease_dir.glob(f"*{LEASE_SUFFIX}"):
+            lease = self._read_lease(path)
+            if lease is None:
+                continue
+            if lease.is_expired:
+                path.unlink(missing_ok=True)
+                continue
+            if lease.holder != self.instance_id and scopes_overlap(scope, lease.scope):
+                return False
+        self._write_lease(scope)
+        return True
+
+    def _held_by_other_thread(self, scope: LockScope, owner: int) -> bool:
+        """Return True if another thread holds an overlapping scope."""
+        return any(
+            hold.owner != owner and scopes_overlap(scope, held_scope)
+            for held_scope, hold in self._held.items()
+        )
+
+    def acquire(
+        self, tap_id: t.Optional[str] = None, stream_id: t.Optional[str] = None
+    ):
+        """Acquire lock.
+
+        Raises:
+            filelock.Timeout: If the lock was not acquired within the timeout.
+        """
+        scope = lock_scope(tap_id, stream_id)
+        owner = threading.get_ident()
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        with self._state_changed:
+            hold = self._held.get(scope)
+            if hold is not None and hold.owner == owner and hold.depth:
+                self._held[scope] = hold._replace(depth=hold.depth + 1)
+                return
+            while self._held_by_other_thread(scope, owner):
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise Timeout(str(self._lease_path(scope)))
+                self._state_changed.wait(remaining)
+            # reserve the scope, so other threads wait for it
+            self._held[scope] = _Hold(owner=owner, depth=0)
+
+        try:
+            while True:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                self.file_lock.acquire(
+                    timeout=-1 if remaining is None else max(remaining, 0)
+                )
+                try:
+                    if self._try_acquire(scope):
+                        break
+                finally:
+                    self.file_lock.release()
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise Timeout(str(self._lease_path(scope)))
+                time.sleep(self.poll_interval)
+        except BaseException:
+            with self._state_changed:
+                del self._held[scope]
+                self._state_changed.notify_all()
+            raise
+
+        with self._state_changed:
+            self._held[scope] = _Hold(owner=owner, depth=1)
+            self._lost.discard(scope)
+            self._start_refresher()
+
+    def release(
+        self, tap_id: t.Optional[str] = None, stream_id: t.Optional[str] = None
+    ):
+        """Release lock.
+
+        Raises:
+            LockLost: If the lease expired and was taken by another holder
+                while the lock was held.
+        """
+        scope = lock_scope(tap_id, stream_id)
+        with self._state_changed:
+            hold = self._held.get(scope)
+            if hold is None or hold.owner != threading.get_ident() or not hold.depth:
+                raise RuntimeError(f"Lock not held: {scope}")
+            if hold.depth > 1:
+                self._held[scope] = hold._replace(depth=hold.depth - 1)
+                return
+            # stop refreshing the lease, but keep other threads waiting until
+            # it is removed
+            self._held[scope] = hold._replace(depth=0)
+
+        lost = False
+        try:
+            path = self._lease_path(scope)
+            with self.file_lock:
+                lease = self._read_lease(path)
+                if lease is not None and lease.holder == self.instance_id:
+                    path.unlink(missing_ok=True)
+                else:
+                    lost = True
+        finally:
+            with self._state_changed:
+                del self._held[scope]
+                lost = lost or scope in self._lost
+                self._lost.discard(scope)
+                if not self._held:
+                    self._stop_refresher()
+                self._state_changed.notify_all()
+        if lost:
+            raise LockLost(f"Lease on {scope} was lost while held.")
+
+    def refresh(
+        self, tap_id: t.Optional[str] = None, stream_id: t.Optional[str] = None
+    ):
+        """Refresh lock, extending its lease.
+
+        Raises:
+            LockLost: If the lease was taken by another holder.
+        """
+        scope = lock_scope(tap_id, stream_id)
+        with self._state_lock:
+            hold = self._held.get(scope)
+            if hold is None or not hold.depth:
+                raise RuntimeError(f"Lock not held: {scope}")
+        self._refresh(scope)
+
+    def _refresh(self, scope: LockScope) -> None:
+        """Extend the lease on a scope, if it is still held."""
+        with self.file_lock:
+            with self._state_lock:
+                hold = self._held.get(scope)
+                if hold is None or not hold.depth:
+                    return
+            lease = self._read_lease(self._lease_path(scope))
+            if lease is None or lease.holder != self.instance_id:
+                with self._state_lock:
+                    self._lost.add(scope)
+                raise LockLost(f"Lease on {scope} was lost while held.")
+            self._write_lease(scope)
+
+    def _start_refresher(self) -> None:
+        """Start refreshing held leases in the background, if not already."""
+        if self._refresher is not None and self._refresher.is_alive():
+            return
+        self._stop_refresh = threading.Event()
+        self._refresher = threading.Thread(
+            target=self._refresh_leases,
+            args=(self._stop_refresh,),
+            name="singerlake-lease-refresh",
+            daemon=True,
+        )
+        self._refresher.start()
+
+    def _stop_refresher(self) -> None:
+        self._stop_refresh.set()
+        self._refresher = None
+
+    def _refresh_leases(self, stop: threading.Event) -> None:
+        """Refresh every held lease until stopped."""
+        while not stop.wait(self.refresh_interval):
+            with self._state_lock:
+                scopes = [
+                    scope
+                    for scope, hold in self._held.items()
+                    if hold.depth and scope not in self._lost
+                ]
+            for scope in scopes:
+                try:
+                    self._refresh(scope)
+                except LockLost:
+                    # reported when the lock is released
+                    pass
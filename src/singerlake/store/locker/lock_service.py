@@ -1,15 +1,30 @@
 import typing as t
+from pathlib import Path
 
-from .base import BaseLocker
+from .local_file import LocalFileLock
 
 if t.TYPE_CHECKING:
     from singerlake import Singerlake
     from singerlake.config import LockConfig
+    from singerlake.store.locker.base import BaseLocker
 
 
 class LockService:
     def __init__(self, config: "LockConfig"):
         self.config = config
 
-    def get_locker(self, singerlake: "Singerlake"):
-        return BaseLocker(singerlake=singerlake)
+    def get_locker(self, singerlake: "Singerlake") -> "BaseLocker":
+        if self.config.lock_type == "local":
+            lock_dir = None
+            if self.config.path is not None:
+                lock_dir = Path(*self.config.path.segments)
+                if self.config.path.relative:
+                    lock_dir = Path.cwd() / lock_dir
+            return LocalFileLock(
+                singerlake=singerlake,
+                timeout=self.config.timeout,
+                lease_seconds=self.config.lease_seconds,
+                refresh_interval=self.config.refresh_interval,
+                lock_dir=lock_dir,
+            )
+        raise ValueError(f"Unknown lock type: {self.config.lock_type}")
@@ -1,7 +1,10 @@
 import typing as t
+from datetime import datetime
 
 from pydantic import BaseModel
 
+from singerlake.store.path_manager.partition import Partition
+
 
 class SchemaVersion(BaseModel):
     """Schema Version."""
@@ -10,13 +13,64 @@ class SchemaVersion(BaseModel):
     schema_hash: str
 
 
+class FieldStats(BaseModel):
+    """Zone map of a record field in a stream file."""
+
+    min: t.Any = None
+    max: t.Any = None
+    null_count: int = 0
+
+
+class StreamFileEntry(BaseModel):
+    """Stream File Entry."""
+
+    path: str
+    schema_hash: str
+    partitions: t.Tuple[Partition, ...] = ()
+    min_time_extracted: datetime
+    max_time_extracted: datetime
+    compression: str = "none"
+    record_count: t.Optional[int] = None
+    size_bytes: t.Optional[int] = None
+    # size of the decompressed file, None if unknown
+    uncompressed_bytes: t.Optional[int] = None
+    checksum: t.Optional[str] = None
+    # whether records are in time extracted order, None if unknown
+    is_sorted: t.Optional[bool] = None
+    # whether a sidecar index was committed with the file, None if unknown
+    indexed: t.Optional[bool] = None
+    zone_maps: t.Dict[str, FieldStats] = {}
+
+
 class StreamManifest(BaseModel):
     """Stream Manifest."""
 
     stream_id: str
 
-    files: t.List[str] = []
+    files: t.List[StreamFileEntry] = []
     versions: t.List[SchemaVersion] = []
+    # version of the stream log the manifest is a snapshot of, None if unlogged
+    version: t.Optional[int] = None
+
+
+class StreamLogAction(BaseModel):
+    """Stream Log Action.
+
+    One commit to a Stream Manifest, stored as a numbered file in the stream log.
+    """
+
+    version: int
+    # version of the snapshot the change was computed from
+    base_version: t.Optional[int] = None
+    add: t.List[StreamFileEntry] = []
+    remove: t.List[str] = []
+    versions: t.List[SchemaVersion] = []
+
+
+class LastCheckpoint(BaseModel):
+    """Pointer to the latest checkpoint of a stream log."""
+
+    version: int
 
 
 class TapManifest(BaseModel):
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import threading
+import time
+import typing as t
+
+
+class _CacheEntry(t.NamedTuple):
+    version: t.Hashable
+    value: t.Any
+    validated_at: float
+
+
+class ManifestCache:
+    """Cache of parsed manifests, validated against their stored version.
+
+    A manifest's version is a cheap token of its stored file (e.g. mtime and
+    size, or ETag) that changes whenever the file does. A cached manifest is
+    reused while its version is unchanged, and, with a `ttl`, trusted without
+    checking its version for `ttl` seconds after it was last validated.
+    """
+
+    def __init__(self, ttl: float | None = None) -> None:
+        self.ttl = ttl
+        self._entries: t.Dict[t.Hashable, _CacheEntry] = {}
+        self._lock = threading.Lock()
+
+    def _is_fresh(self, entry: _CacheEntry) -> bool:
+        """Return True if an entry was validated within the TTL."""
+        return self.ttl is not None and time.monotonic() - entry.validated_at < self.ttl
+
+    def get(
+        self,
+        key: t.Hashable,
+        get_version: t.Callable[[], t.Hashable | None],
+        load: t.Callable[[], t.Any],
+        use_ttl: bool = True,
+    ) -> t.Any:
+        """Return a cached manifest, loading it if missing or stale.
+
+        Args:
+            key: Cache key, e.g. the manifest path.
+            get_version: Function returning the stored manifest's version, or
+                None if it doesn't exist or has no version. Unversioned
+                manifests aren't cached.
+            load: Function loading and parsing the manifest.
+            use_ttl: Trust a recently validated manifest without checking its
+                version. Disable before a read-modify-write.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and use_ttl and self._is_fresh(entry):
+            return entry.value
+
+        # the version is read first, so a change during loading is seen next time
+        version = get_version()
+        if version is None:
+            self.invalidate(key)
+            return load()
+        if entry is not None and entry.version == version:
+            with self._lock:
+                self._entries[key] = entry._replace(validated_at=time.monotonic())
+            return entry.value
+
+        value = load()
+        with self._lock:
+            self._entries[key] = _CacheEntry(
+                version=version, value=value, validated_at=time.monotonic()
+            )
+        return value
+
+    def update(
+        self,
+        key: t.Hashable,
+        update: t.Callable[[t.Any], t.Any],
+        use_ttl: bool = True,
+    ) -> t.Any:
+        """Return a cached manifest, brought up to date by a function.
+
+        Args:
+            key: Cache key.
+            update: Function taking the cached manifest, or None, and returning
+                the current one. None is returned uncached.
+            use_ttl: Trust a recently validated manifest without updating it.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and use_ttl and self._is_fresh(entry):
+            return entry.value
+
+        value = update(None if entry is None else entry.value)
+        if value is None:
+            self.invalidate(key)
+            return None
+        with self._lock:
+            self._entries[key] = _CacheEntry(
+                version=None, value=value, validated_at=time.monotonic()
+            )
+        return value
+
+    def peek(self, key: t.Hashable) -> t.Any:
+        """Return a cached manifest without validating it, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+        return None if entry is None else entry.value
+
+    def is_valid(self, key: t.Hashable, version: t.Hashable | None) -> bool:
+        """Return True if a manifest is cached at the given version."""
+        with self._lock:
+            entry = self._entries.get(key)
+        return entry is not None and version is not None and entry.version == version
+
+    def invalidate(self, key: t.Hashable | None = None) -> None:
+        """Drop a cached manifest, or all cached manifests if key is None."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
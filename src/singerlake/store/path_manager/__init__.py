@@ -1,17 +1,23 @@
 from .base import BasePathManager, GenericPath, Partition
 from .constant import (
     LAKE_MANIFEST_FILENAME,
+    STREAM_LOG_DIRNAME,
+    STREAM_LOG_LAST_CHECKPOINT_FILENAME,
     STREAM_MANIFEST_FILENAME,
     TAP_MANIFEST_FILENAME,
 )
+from .partition import PartitionResolver
 from .path_service import PathService
 
 __all__ = [
     "BasePathManager",
     "GenericPath",
     "Partition",
+    "PartitionResolver",
     "LAKE_MANIFEST_FILENAME",
     "TAP_MANIFEST_FILENAME",
     "STREAM_MANIFEST_FILENAME",
+    "STREAM_LOG_DIRNAME",
+    "STREAM_LOG_LAST_CHECKPOINT_FILENAME",
     "PathService",
 ]
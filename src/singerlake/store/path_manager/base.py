@@ -1,10 +1,9 @@
 from __future__ import annotations
 
 import json
+import re
 import typing as t
-from collections import namedtuple
 from datetime import datetime
-from functools import lru_cache
 
 import base58
 import farmhash
@@ -12,20 +11,43 @@ import numpy as np
 
 from .constant import (
     LAKE_MANIFEST_FILENAME,
+    STREAM_LOG_DIRNAME,
     STREAM_MANIFEST_FILENAME,
     TAP_MANIFEST_FILENAME,
 )
+from .partition import Partition, PartitionResolver
 
 if t.TYPE_CHECKING:
     from singerlake.config import PartitionBy, PathConfig
     from singerlake.stream.file_writer import SingerFile
 
 
-Partition = namedtuple("Partition", ["name", "value"])
+STREAM_FILE_TIME_FORMAT = "%Y%m%dT%H%M%SZ"
+STREAM_FILE_NAME_PATTERN = re.compile(
+    r"^(?P<stream_id>.+)"
+    r"-(?P<start>\d{8}T\d{6}Z)-(?P<stop>\d{8}T\d{6}Z)"
+    r"(?:-(?P<sequence>\d+))?"
+    r"\.singer(?:\.(?P<compression>gz|bz2|zst))?$"
+)
 
+# suffix of a stream file's sidecar index, appended to the file name
+STREAM_FILE_INDEX_SUFFIX = ".idx"
+
+# number of schemas whose hash is memoized by identity
+SCHEMA_HASH_CACHE_SIZE = 1024
+
+
+class StreamFileName(t.NamedTuple):
+    """Parsed stream file name."""
+
+    stream_id: str
+    min_time_extracted: datetime
+    max_time_extracted: datetime
+    sequence: int
+    compression: str
 
-class GenericPath:
 
+class GenericPath:
     """Generic path class."""
 
     def __init__(self, segments: tuple[str, ...], relative: bool = False):
@@ -71,6 +93,9 @@ class BasePathManager:
         self.config = config
         self._lake_root: GenericPath | None = None
         self._transformer = BasePathTransformer()
+        self._partition_resolver: PartitionResolver | None = None
+        # id of schema -> (schema, hash), keeping schemas alive so ids aren't reused
+        self._schema_hashes: t.Dict[int, t.Tuple[t.Mapping[str, t.Any], str]] = {}
 
     @property
     def _generic_lake_root(self) -> GenericPath:
@@ -102,15 +127,32 @@ class BasePathManager:
             STREAM_MANIFEST_FILENAME
         )
 
-    def _generic_stream_file_path(self, stream_file: "SingerFile") -> GenericPath:
+    def _generic_stream_log_path(self, tap_id: str, stream_id: str) -> GenericPath:
+        """Compile the stream log directory path."""
+        return self._generic_stream_path(tap_id=tap_id, stream_id=stream_id).extend(
+            STREAM_LOG_DIRNAME
+        )
+
+    def _stream_file_segments(
+        self, stream_file: "SingerFile", schema_hash: str | None = None
+    ) -> t.Tuple[str, ...]:
+        """Compile the stream file path segments, relative to the stream path."""
+        return (
+            schema_hash or self.hash_stream_schema(stream_file.schema_),
+            *(self.format_partition(partition) for partition in stream_file.partitions),
+            stream_file.name,
+        )
+
+    def _generic_stream_file_path(
+        self, stream_file: "SingerFile", schema_hash: str | None = None
+    ) -> GenericPath:
         """Compile the stream file path."""
         stream_path = self._generic_stream_path(
             tap_id=stream_file.tap_id, stream_id=stream_file.stream_id
         )
-        stream_path = stream_path.extend(self.hash_stream_schema(stream_file.schema_))
-        for partition in stream_file.partitions:
-            stream_path = stream_path.extend(self.format_partition(partition))
-        return stream_path.extend(stream_file.name)
+        return stream_path.extend(
+            *self._stream_file_segments(stream_file, schema_hash=schema_hash)
+        )
 
     @property
     def lake_root(self) -> t.Any:
@@ -137,27 +179,45 @@ class BasePathManager:
         """Get the file partition."""
         return self.config.partition_by or []
 
-    @lru_cache
+    @property
+    def partition_resolver(self) -> PartitionResolver:
+        """Get the record partition resolver."""
+        if self._partition_resolver is None:
+            self._partition_resolver = PartitionResolver(self.file_partition_by)
+        return self._partition_resolver
+
     def get_record_partitions(
         self, time_extracted: "datetime"
     ) -> t.Tuple[Partition, ...]:
         """Partition a record."""
-        partitions = [
-            Partition(
-                name=partition_by.by, value=getattr(time_extracted, partition_by.by)
-            )
-            for partition_by in self.file_partition_by
-        ]
-        return tuple(partitions)
+        return self.partition_resolver.resolve(time_extracted)
+
+    def get_records_partitions(
+        self, timestamps: t.Sequence[str]
+    ) -> t.List[t.Tuple[Partition, ...]]:
+        """Partition a batch of records by their ISO 8601 time extracted."""
+        return self.partition_resolver.resolve_many(timestamps)
 
     @t.final
     def hash_stream_schema(self, stream_schema: t.Mapping[str, t.Any]) -> str:
-        """Calculate a unique short-hash for given schema."""
+        """Calculate a unique short-hash for given schema.
+
+        Hashes are memoized by schema identity, so schemas must not be mutated
+        once hashed.
+        """
+        cached = self._schema_hashes.get(id(stream_schema))
+        if cached is not None and cached[0] is stream_schema:
+            return cached[1]
+
         data = json.dumps(stream_schema, sort_keys=True)
         int64_hash_bytes = (
             np.uint64(farmhash.fingerprint64(data)).astype("int64").tobytes()
         )
-        return base58.b58encode(int64_hash_bytes).decode("utf-8")
+        schema_hash = base58.b58encode(int64_hash_bytes).decode("utf-8")
+        if len(self._schema_hashes) >= SCHEMA_HASH_CACHE_SIZE:
+            self._schema_hashes.clear()
+        self._schema_hashes[id(stream_schema)] = (stream_schema, schema_hash)
+        return schema_hash
 
     @t.final
     def get_tap_path(self, tap_id: str) -> t.Any:
@@ -181,11 +241,60 @@ class BasePathManager:
         """Get the stream manifest path."""
         return self.transform(self._generic_stream_manifest_path(tap_id, stream_id))
 
+    @t.final
+    def get_stream_log_path(self, tap_id: str, stream_id: str, file_name: str) -> t.Any:
+        """Get the path of a file in the stream log."""
+        return self.transform(
+            self._generic_stream_log_path(tap_id, stream_id).extend(file_name)
+        )
+
+    @staticmethod
+    def stream_log_file_name(version: int) -> str:
+        """Return the file name of a stream log version."""
+        return f"{version:020d}.json"
+
+    @staticmethod
+    def stream_checkpoint_file_name(version: int) -> str:
+        """Return the file name of a stream log checkpoint."""
+        return f"{version:020d}.checkpoint.json"
+
     @t.final
     def get_stream_file_path(self, stream_file: "SingerFile") -> t.Any:
         """Get the stream file path."""
         return self.transform(self._generic_stream_file_path(stream_file))
 
+    @t.final
+    def hash_stream_schemas(
+        self, stream_files: t.Sequence["SingerFile"]
+    ) -> t.List[str]:
+        """Get the schema hash of many stream files, hashing each schema once."""
+        return [
+            self.hash_stream_schema(stream_file.schema_) for stream_file in stream_files
+        ]
+
+    @t.final
+    def get_stream_file_paths(
+        self,
+        stream_files: t.Sequence["SingerFile"],
+        schema_hashes: t.Sequence[str] | None = None,
+    ) -> list:
+        """Get the paths of many stream files, hashing each distinct schema once."""
+        if schema_hashes is None:
+            schema_hashes = self.hash_stream_schemas(stream_files)
+        return [
+            self.transform(
+                self._generic_stream_file_path(stream_file, schema_hash=schema_hash)
+            )
+            for stream_file, schema_hash in zip(stream_files, schema_hashes)
+        ]
+
+    @t.final
+    def get_stream_file_relative_path(
+        self, stream_file: "SingerFile", schema_hash: str | None = None
+    ) -> str:
+        """Get the "/"-separated path of a stream file, relative to its stream."""
+        return "/".join(self._stream_file_segments(stream_file, schema_hash))
+
     def transform(self, path: GenericPath) -> t.Any:
         """Run before returning a path from get methods.
 
@@ -193,6 +302,40 @@ class BasePathManager:
         """
         return self.transformer.transform(path)
 
+    @t.final
+    def get_stream_relative_path(
+        self, tap_id: str, stream_id: str, relative_path: str
+    ) -> t.Any:
+        """Get a path from its "/"-separated path relative to the stream path."""
+        stream_path = self._generic_stream_path(tap_id=tap_id, stream_id=stream_id)
+        if not relative_path:
+            return self.transform(stream_path)
+        return self.transform(stream_path.extend(*relative_path.split("/")))
+
     def format_partition(self, partition: Partition) -> str:
         """Format a partition."""
         return str(partition.value)
+
+    def parse_partition(self, name: str, segment: str) -> Partition | None:
+        """Parse a partition path segment, or return None if it doesn't match."""
+        return Partition(
+            name=name, value=int(segment) if segment.isdigit() else segment
+        )
+
+    @staticmethod
+    def parse_stream_file_name(file_name: str) -> StreamFileName | None:
+        """Parse a stream file name, or return None if it isn't one."""
+        match = STREAM_FILE_NAME_PATTERN.match(file_name)
+        if match is None:
+            return None
+        return StreamFileName(
+            stream_id=match["stream_id"],
+            min_time_extracted=datetime.strptime(
+                match["start"], STREAM_FILE_TIME_FORMAT
+            ),
+            max_time_extracted=datetime.strptime(
+                match["stop"], STREAM_FILE_TIME_FORMAT
+            ),
+            sequence=int(match["sequence"] or 0),
+            compression=match["compression"] or "none",
+        )
@@ -1,3 +1,5 @@
 LAKE_MANIFEST_FILENAME = "manifest.json"
 TAP_MANIFEST_FILENAME = "manifest.json"
 STREAM_MANIFEST_FILENAME = "manifest.json"
+STREAM_LOG_DIRNAME = "_log"
+STREAM_LOG_LAST_CHECKPOINT_FILENAME = "_last_checkpoint"
@@ -1,3 +1,5 @@
+from __future__ import annotations
+
 import typing as t
 
 from .base import BasePathManager
@@ -12,3 +14,10 @@ class HivePathManager(BasePathManager):
     def format_partition(self, partition: "Partition") -> str:
         """Format a partition."""
         return f"{partition.name}={partition.value}"
+
+    def parse_partition(self, name: str, segment: str) -> "Partition" | None:
+        """Parse a partition path segment, or return None if it doesn't match."""
+        prefix = f"{name}="
+        if not segment.startswith(prefix):
+            return None
+        return super().parse_partition(name, segment[len(prefix) :])
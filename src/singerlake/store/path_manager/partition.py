@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import typing as t
+from collections import OrderedDict, namedtuple
+from datetime import datetime, timedelta
+
+import numpy as np
+
+if t.TYPE_CHECKING:
+    from singerlake.config import PartitionBy
+
+
+Partition = namedtuple("Partition", ["name", "value"])
+
+# supported partition granularities, coarsest first
+GRANULARITIES = ("year", "month", "day", "hour", "minute", "second")
+# numpy datetime64 unit for each granularity
+DATETIME64_UNITS = {
+    "year": "Y",
+    "month": "M",
+    "day": "D",
+    "hour": "h",
+    "minute": "m",
+    "second": "s",
+}
+# length of an ISO 8601 timestamp prefix truncated to each granularity
+ISO_PREFIX_LENGTHS = {
+    "year": 4,
+    "month": 7,
+    "day": 10,
+    "hour": 13,
+    "minute": 16,
+    "second": 19,
+}
+# datetime fields reset when truncating to each granularity
+_TRUNCATE_FIELDS: t.Dict[str, t.Dict[str, int]] = {
+    "year": {"month": 1, "day": 1, "hour": 0, "minute": 0, "second": 0},
+    "month": {"day": 1, "hour": 0, "minute": 0, "second": 0},
+    "day": {"hour": 0, "minute": 0, "second": 0},
+    "hour": {"minute": 0, "second": 0},
+    "minute": {"second": 0},
+    "second": {},
+}
+# number of partition buckets kept, most recently used first
+PARTITION_CACHE_SIZE = 1024
+
+
+class PartitionResolver:
+    """Resolve record partitions from time extracted.
+
+    Timestamps are truncated to the finest configured partition granularity
+    (e.g. the hour for year/month/day/hour partitioning), so every timestamp in
+    the same bucket maps to the same cached `Partition` tuple. Up to
+    `PARTITION_CACHE_SIZE` buckets are kept, least recently used evicted first.
+    """
+
+    def __init__(self, partition_by: t.Sequence["PartitionBy"]) -> None:
+        self.partition_names = tuple(partition_by_.by for partition_by_ in partition_by)
+        self.granularity = (
+            max(self.partition_names, key=GRANULARITIES.index)
+            if self.partition_names
+            else None
+        )
+        self._truncate_fields: dict[str, t.Any] = {
+            **_TRUNCATE_FIELDS[self.granularity or "second"],
+            "microsecond": 0,
+            "tzinfo": None,
+        }
+        self._cache: OrderedDict["datetime", t.Tuple[Partition, ...]] = OrderedDict()
+
+    def resolve(self, time_extracted: "datetime") -> t.Tuple[Partition, ...]:
+        """Return the partitions for a given time extracted."""
+        if self.granularity is None:
+            return ()
+
+        bucket = time_extracted.replace(**self._truncate_fields)
+        cache = self._cache
+        partitions = cache.get(bucket)
+        if partitions is None:
+            partitions = cache[bucket] = tuple(
+                Partition(name=name, value=getattr(bucket, name))
+                for name in self.partition_names
+            )
+            if len(cache) > PARTITION_CACHE_SIZE:
+                cache.popitem(last=False)
+        else:
+            cache.move_to_end(bucket)
+        return partitions
+
+    def resolve_many(
+        self, timestamps: t.Sequence[str]
+    ) -> t.List[t.Tuple[Partition, ...]]:
+        """Return the partitions for an array of ISO 8601 timestamps.
+
+        Timestamps are truncated as strings in a single vectorized step, so only
+        one datetime is parsed per distinct bucket in the batch. Batches with
+        timestamps in another format, e.g. ISO 8601 basic format, are resolved
+        one timestamp at a time.
+        """
+        if self.granularity is None:
+            return [()] * len(timestamps)
+
+        truncated = np.asarray(
+            timestamps, dtype=f"U{ISO_PREFIX_LENGTHS[self.granularity]}"
+        )
+        buckets, inverse = np.unique(truncated, return_inverse=True)
+        unit = DATETIME64_UNITS[self.granularity]
+        try:
+            resolved = [
+                self.resolve(
+                    np.datetime64(bucket.replace(" ", "T"), unit)
+                    .astype("datetime64[us]")
+                    .item()
+                )
+                for bucket in buckets.tolist()
+            ]
+        except ValueError:
+            return [
+                self.resolve(datetime.fromisoformat(timestamp))
+                for timestamp in timestamps
+            ]
+        return [resolved[index] for index in inverse.tolist()]
+
+
+def partition_interval(
+    partitions: t.Sequence[Partition],
+) -> t.Tuple[datetime, datetime] | None:
+    """Return the half-open time interval covered by a partition prefix.
+
+    Only hierarchical prefixes (year, then month, then day, ...) map to a single
+    contiguous interval. Returns None for any other combination of partitions.
+    """
+    names = tuple(partition.name for partition in partitions)
+    if not names or names != GRANULARITIES[: len(names)]:
+        return None
+
+    values = [int(partition.value) for partition in partitions]
+    fields = dict(zip(names, values))
+    start = datetime(
+        fields["year"],
+        fields.get("month", 1),
+        fields.get("day", 1),
+        fields.get("hour", 0),
+        fields.get("minute", 0),
+        fields.get("second", 0),
+    )
+    granularity = names[-1]
+    if granularity == "year":
+        end = start.replace(year=start.year + 1)
+    elif granularity == "month":
+        end = (
+            start.replace(year=start.year + 1, month=1)
+            if start.month == 12
+            else start.replace(month=start.month + 1)
+        )
+    else:
+        end = start + timedelta(**{f"{granularity}s": 1})
+    return start, end
@@ -0,0 +1,392 @@
+from __future__ import annotations
+
+import io
+import json
+import os
+import threading
+import typing as t
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from singerlake.store.manifest import TapManifest
+from singerlake.store.path_manager.base import (
+    STREAM_FILE_INDEX_SUFFIX,
+    BasePathTransformer,
+)
+from singerlake.tap import Tap
+
+from .base import BaseStore
+
+try:
+    import boto3
+    from botocore.config import Config
+    from botocore.exceptions import ClientError
+except ImportError:  # pragma: no cover
+    boto3 = None  # type: ignore[assignment]
+
+if t.TYPE_CHECKING:
+    from pathlib import Path
+
+    from singerlake import Singerlake
+    from singerlake.config import S3Config
+    from singerlake.store.locker.base import BaseLocker
+    from singerlake.store.path_manager.base import BasePathManager, GenericPath
+    from singerlake.stream.file_writer import SingerFile
+
+# bytes buffered when reading an object
+READ_BUFFER_SIZE = 1024 * 1024
+
+# changed objects kept from conditional GETs until they are read
+CONDITIONAL_BODY_CACHE_SIZE = 16
+
+_NOT_FOUND_CODES = {"NoSuchKey", "NotFound", "404"}
+_NOT_MODIFIED_CODES = {"NotModified", "304"}
+# a conditional write lost to a concurrent one
+_PRECONDITION_CODES = {"PreconditionFailed", "ConditionalRequestConflict"}
+
+
+def _require_boto3() -> None:
+    if boto3 is None:
+        raise ImportError(
+            "The S3 store requires the boto3 package. "
+            "Install python-singerlake with the 's3' extra."
+        )
+
+
+def _error_code(error: "ClientError") -> str:
+    return str(error.response.get("Error", {}).get("Code", ""))
+
+
+class S3Path(t.NamedTuple):
+    """Location of an S3 object, or of a key prefix."""
+
+    bucket: str
+    key: str
+
+    def __str__(self) -> str:
+        return f"s3://{self.bucket}/{self.key}"
+
+    def with_suffix(self, suffix: str) -> "S3Path":
+        """Return the path with a suffix appended to its key."""
+        return S3Path(self.bucket, self.key + suffix)
+
+
+class S3PathTransformer(BasePathTransformer):
+    @staticmethod
+    def transform(generic_path: GenericPath) -> S3Path:
+        """Transform a GenericPath to an S3Path.
+
+        The first segment is the bucket, the others the key. Relative paths
+        are not supported by object stores, so `relative` is ignored.
+        """
+        if not generic_path.segments:
+            raise ValueError("An S3 path needs a bucket.")
+        bucket, *segments = generic_path.segments
+        return S3Path(bucket, "/".join(segment for segment in segments if segment))
+
+
+class _S3ObjectReader(io.RawIOBase):
+    """Raw binary reader of a streamed S3 object body."""
+
+    def __init__(self, body: t.Any) -> None:
+        self._body = body
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: t.Any) -> int:
+        data = self._body.read(len(buffer))
+        buffer[: len(data)] = data
+        return len(data)
+
+    def close(self) -> None:
+        if not self.closed:
+            self._body.close()
+        super().close()
+
+
+class S3Store(BaseStore):
+    """S3-compatible object store.
+
+    The lake is stored below a key prefix of one bucket. All requests, from
+    any thread, share one client with a pool of connections sized for the
+    commit workers. Stream files of at least `multipart_threshold` bytes are
+    uploaded in concurrent parts.
+
+    Manifest versions are checked with conditional GETs, which only transfer
+    a manifest if its ETag changed, and keep it for the read that follows, so
+    a manifest is validated or re-read in one request. Exclusive writes, and
+    stream file uploads, use `If-None-Match: *`, so the store must support
+    conditional writes.
+    """
+
+    def __init__(
+        self,
+        singerlake: "Singerlake",
+        locker: "BaseLocker",
+        path_manager: "BasePathManager",
+    ) -> None:
+        _require_boto3()
+        super().__init__(
+            singerlake=singerlake, locker=locker, path_manager=path_manager
+        )
+        self.path_manager.transformer = S3PathTransformer()
+        self._client: t.Any = None
+        self._client_lock = threading.Lock()
+        # last seen ETag of each conditionally read object, and its body
+        # until it is read
+        self._etags: t.Dict[S3Path, str] = {}
+        self._bodies: OrderedDict[S3Path, bytes] = OrderedDict()
+        self._objects_lock = threading.Lock()
+
+    @property
+    def s3_config(self) -> "S3Config":
+        """Return the S3 config."""
+        return self.config.s3
+
+    @property
+    def client(self) -> t.Any:
+        """Return the S3 client shared by all threads."""
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    pool_size = self.s3_config.max_pool_connections or (
+                        self.config.commit_workers * self.s3_config.max_concurrency
+                    )
+                    self._client = boto3.session.Session().client(
+                        "s3",
+                        endpoint_url=self.s3_config.endpoint_url,
+                        region_name=self.s3_config.region_name,
+                        config=Config(max_pool_connections=pool_size),
+                    )
+        return self._client
+
+    def _forget(self, path: S3Path) -> None:
+        """Drop the last seen ETag and body of an object."""
+        with self._objects_lock:
+            self._etags.pop(path, None)
+            self._bodies.pop(path, None)
+
+    def _read_object(self, path: S3Path) -> bytes | None:
+        """Read an object, or return None if it doesn't exist.
+
+        A body kept by the last conditional GET of the object is used instead
+        of reading it again.
+        """
+        with self._objects_lock:
+            data = self._bodies.pop(path, None)
+        if data is not None:
+            return data
+        try:
+            response = self.client.get_object(Bucket=path.bucket, Key=path.key)
+        except ClientError as error:
+            if _error_code(error) in _NOT_FOUND_CODES:
+                return None
+            raise
+        return response["Body"].read()
+
+    def _read_json(self, path: S3Path) -> dict | None:
+        """Read a JSON object."""
+        data = self._read_object(path)
+        if data is None:
+            return None
+        return self.singerlake.codec.loads(data)
+
+    def get_lake_root(self) -> S3Path:
+        """Return the Lake root path."""
+        return self.path_manager.lake_root
+
+    def read_lake_manifest(self) -> dict | None:
+        """Read the Lake Manifest."""
+        return self._read_json(self.path_manager.lake_manifest_path)
+
+    def read_tap_manifest(self, tap_id: str) -> dict | None:
+        """Read a Tap Manifest."""
+        return self._read_json(self.path_manager.get_tap_manifest_path(tap_id=tap_id))
+
+    def read_stream_manifest(self, tap_id: str, stream_id: str) -> dict | None:
+        """Read the manifest file of a stream without a stream log."""
+        return self._read_json(
+            self.path_manager.get_stream_manifest_path(
+                tap_id=tap_id, stream_id=stream_id
+            )
+        )
+
+    def get_file_version(self, path: S3Path) -> str | None:
+        """Return the ETag of an object, checked with a conditional GET.
+
+        The object is only transferred if its ETag changed since it was last
+        seen, and is then kept for the next read of it. Only the most recently
+        transferred objects are kept, as callers that only check the version
+        never read them.
+        """
+        with self._objects_lock:
+            etag = self._etags.get(path)
+        conditions = {} if etag is None else {"IfNoneMatch": etag}
+        try:
+            response = self.client.get_object(
+                Bucket=path.bucket, Key=path.key, **conditions
+            )
+        except ClientError as error:
+            code = _error_code(error)
+            if code in _NOT_MODIFIED_CODES:
+                return etag
+            if code in _NOT_FOUND_CODES:
+                self._forget(path)
+                return None
+            raise
+        data = response["Body"].read()
+        with self._objects_lock:
+            self._etags[path] = response["ETag"]
+            self._bodies[path] = data
+            self._bodies.move_to_end(path)
+            while len(self._bodies) > CONDITIONAL_BODY_CACHE_SIZE:
+                self._bodies.popitem(last=False)
+        return response["ETag"]
+
+    def write_file(self, path: S3Path, data: bytes, exclusive: bool = False) -> None:
+        """Write an object, which is atomic in S3.
+
+        Exclusive writes are conditional on the object not existing.
+        """
+        conditions = {"IfNoneMatch": "*"} if exclusive else {}
+        try:
+            self.client.put_object(
+                Bucket=path.bucket, Key=path.key, Body=data, **conditions
+            )
+        except ClientError as error:
+            if exclusive and _error_code(error) in _PRECONDITION_CODES:
+                raise FileExistsError(str(path)) from error
+            raise
+        finally:
+            self._forget(path)
+
+    def list_dir(self, path: S3Path) -> t.Tuple[t.List[str], t.List[str]]:
+        """List the keys directly below a prefix, as directories and files."""
+        prefix = f"{path.key.rstrip('/')}/" if path.key else ""
+        dir_names: t.List[str] = []
+        file_names: t.List[str] = []
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(
+            Bucket=path.bucket, Prefix=prefix, Delimiter="/"
+        ):
+            for common_prefix in page.get("CommonPrefixes", []):
+                dir_names.append(common_prefix["Prefix"][len(prefix) :].rstrip("/"))
+            for content in page.get("Contents", []):
+                file_names.append(content["Key"][len(prefix) :])
+        return (
+            sorted(name for name in dir_names if not name.startswith(".")),
+            sorted(name for name in file_names if name and not name.startswith(".")),
+        )
+
+    def open_file(self, path: S3Path) -> t.BinaryIO:
+        """Open an object for streamed binary reading."""
+        try:
+            response = self.client.get_object(Bucket=path.bucket, Key=path.key)
+        except ClientError as error:
+            if _error_code(error) in _NOT_FOUND_CODES:
+                raise FileNotFoundError(str(path)) from error
+            raise
+        return io.BufferedReader(  # type: ignore[return-value]
+            _S3ObjectReader(response["Body"]), buffer_size=READ_BUFFER_SIZE
+        )
+
+    def get_file_size(self, path: S3Path) -> int:
+        """Return the size of an object in bytes."""
+        try:
+            response = self.client.head_object(Bucket=path.bucket, Key=path.key)
+        except ClientError as error:
+            if _error_code(error) in _NOT_FOUND_CODES:
+                raise FileNotFoundError(str(path)) from error
+            raise
+        return response["ContentLength"]
+
+    def delete_file(self, path: S3Path) -> None:
+        """Delete an object, if it exists."""
+        self.client.delete_object(Bucket=path.bucket, Key=path.key)
+        self._forget(path)
+
+    def _upload_parts(self, source: "Path", path: S3Path, size: int) -> None:
+        """Upload a local file in concurrent parts, unless the object exists.
+
+        Raises:
+            FileExistsError: If the object exists when the upload completes.
+        """
+        chunk_size = self.s3_config.multipart_chunksize
+        part_count = max(1, -(-size // chunk_size))
+        upload_id = self.client.create_multipart_upload(
+            Bucket=path.bucket, Key=path.key
+        )["UploadId"]
+
+        def _upload_part(part_number: int) -> dict:
+            with open(source, "rb") as source_file:
+                source_file.seek((part_number - 1) * chunk_size)
+                data = source_file.read(chunk_size)
+            response = self.client.upload_part(
+                Bucket=path.bucket,
+                Key=path.key,
+                UploadId=upload_id,
+                PartNumber=part_number,
+                Body=data,
+            )
+            return {"ETag": response["ETag"], "PartNumber": part_number}
+
+        try:
+            workers = max(1, min(self.s3_config.max_concurrency, part_count))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                parts = list(executor.map(_upload_part, range(1, part_count + 1)))
+            self.client.complete_multipart_upload(
+                Bucket=path.bucket,
+                Key=path.key,
+                UploadId=upload_id,
+                MultipartUpload={"Parts": parts},
+                IfNoneMatch="*",
+            )
+        except BaseException as error:
+            self.client.abort_multipart_upload(
+                Bucket=path.bucket, Key=path.key, UploadId=upload_id
+            )
+            if (
+                isinstance(error, ClientError)
+                and _error_code(error) in _PRECONDITION_CODES
+            ):
+                raise FileExistsError(str(path)) from error
+            raise
+
+    def _upload_file(self, source: "Path", path: S3Path) -> None:
+        """Upload a local file, in concurrent parts if it is large.
+
+        Raises:
+            FileExistsError: If the object exists.
+        """
+        size = os.path.getsize(source)
+        if size < self.s3_config.multipart_threshold:
+            self.write_file(path, source.read_bytes(), exclusive=True)
+        else:
+            self._upload_parts(source, path, size)
+
+    def commit_stream_file(self, stream_file: "SingerFile", path: S3Path) -> None:
+        """Upload a singer file, and its sidecar index first if it has one."""
+        index_path = path.with_suffix(STREAM_FILE_INDEX_SUFFIX)
+        if stream_file.indexed:
+            self._upload_file(stream_file.index_path, index_path)
+        try:
+            self._upload_file(stream_file.path, path)
+        except FileExistsError:
+            if stream_file.indexed:
+                self.delete_file(index_path)
+            raise
+
+    def create_tap(self, tap_id: str) -> Tap:
+        """Create a Tap."""
+        tap_manifest = self.write_tap_manifest(
+            tap_id=tap_id, manifest=TapManifest(tap_id=tap_id)
+        )
+        return Tap(singerlake=self.singerlake, tap_manifest=tap_manifest)
+
+    def write_tap_manifest(self, tap_id: str, manifest: TapManifest) -> TapManifest:
+        """Write a Tap Manifest."""
+        path = self.path_manager.get_tap_manifest_path(tap_id=tap_id)
+        self.write_file(path, json.dumps(manifest.dict(), indent=2).encode("utf-8"))
+        self.manifest_cache.invalidate(path)
+        return manifest
@@ -3,6 +3,7 @@ import typing as t
 from .local import LocalStore
 from .locker import LockService
 from .path_manager import PathService
+from .s3 import S3Store
 
 if t.TYPE_CHECKING:
     from singerlake import Singerlake
@@ -25,4 +26,8 @@ class StoreService:
             return LocalStore(
                 singerlake=self.singerlake, locker=locker, path_manager=path_manager
             )
+        if self.config.store_type == "s3":
+            return S3Store(
+                singerlake=self.singerlake, locker=locker, path_manager=path_manager
+            )
         raise ValueError(f"Unknown store type: {self.config.store_type}")
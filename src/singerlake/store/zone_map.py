@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import typing as t
+
+from singerlake.store.manifest import FieldStats
+
+OPERATORS = ("==", "!=", "<", "<=", ">", ">=", "in")
+
+
+class Predicate(t.NamedTuple):
+    """Comparison of a top-level record field with a value.
+
+    A None value with `==` matches null or missing fields.
+    """
+
+    field: str
+    op: str
+    value: t.Any
+
+    @classmethod
+    def parse(cls, predicate: t.Sequence[t.Any]) -> Predicate:
+        """Return a predicate from a (field, op, value) sequence."""
+        field, op, value = predicate
+        if op not in OPERATORS:
+            raise ValueError(f"Unknown predicate operator: {op}")
+        if op == "in":
+            value = tuple(value)
+        return cls(field=field, op=op, value=value)
+
+    def matches(self, record: dict) -> bool:
+        """Return True if a record's value satisfies the predicate."""
+        value = record.get(self.field)
+        if self.op == "==":
+            return value == self.value
+        if self.op == "!=":
+            return value != self.value
+        if self.op == "in":
+            return value in self.value
+        if value is None:
+            return False
+        try:
+            if self.op == "<":
+                return value < self.value
+            if self.op == "<=":
+                return value <= self.value
+            if self.op == ">":
+                return value > self.value
+            return value >= self.value
+        except TypeError:
+            return False
+
+    def might_match(
+        self, stats: FieldStats | None, record_count: int | None = None
+    ) -> bool:
+        """Return False only if no record of a file can satisfy the predicate.
+
+        Args:
+            stats: Zone map of the predicate's field in the file, if tracked.
+            record_count: Number of records in the file, if known.
+        """
+        if stats is None:
+            return True
+        if self.op == "==" and self.value is None:
+            return stats.null_count > 0
+        if self.op == "!=" or (self.op == "in" and None in self.value):
+            return True
+        all_null = record_count is not None and stats.null_count >= record_count
+        if all_null:
+            return False
+        low, high = stats.min, stats.max
+        if low is None or high is None:
+            # values weren't comparable
+            return True
+        try:
+            if self.op == "==":
+                return low <= self.value <= high
+            if self.op == "in":
+                return any(low <= value <= high for value in self.value)
+            if self.op == "<":
+                return low < self.value
+            if self.op == "<=":
+                return low <= self.value
+            if self.op == ">":
+                return high > self.value
+            return high >= self.value
+        except TypeError:
+            return True
+
+
+def parse_predicates(
+    predicates: t.Iterable[t.Sequence[t.Any]] | None,
+) -> t.List[Predicate]:
+    """Return predicates parsed from (field, op, value) sequences."""
+    return [
+        predicate if isinstance(predicate, Predicate) else Predicate.parse(predicate)
+        for predicate in predicates or ()
+    ]
+
+
+class ZoneMapCollector:
+    """Collect min/max values and null counts of record fields.
+
+    Values that can't be ordered against each other (e.g. objects, or strings
+    mixed with numbers) leave a field's min/max unset.
+    """
+
+    def __init__(self, fields: t.Sequence[str]) -> None:
+        self.fields = list(fields)
+        self._min: t.Dict[str, t.Any] = {}
+        self._max: t.Dict[str, t.Any] = {}
+        self._null_counts = dict.fromkeys(self.fields, 0)
+        self._incomparable: t.Set[str] = set()
+
+    def update(self, record: dict) -> None:
+        """Add a record's values."""
+        for field in self.fields:
+            value = record.get(field)
+            if value is None:
+                self._null_counts[field] += 1
+                continue
+            if field in self._incomparable:
+                continue
+            if isinstance(value, (dict, list)):
+                self._incomparable.add(field)
+                continue
+            try:
+                if field not in self._min or value < self._min[field]:
+                    self._min[field] = value
+                if field not in self._max or value > self._max[field]:
+                    self._max[field] = value
+            except TypeError:
+                self._incomparable.add(field)
+
+    def stats(self) -> t.Dict[str, FieldStats]:
+        """Return the zone map of each field."""
+        return {
+            field: FieldStats(
+                min=None if field in self._incomparable else self._min.get(field),
+                max=None if field in self._incomparable else self._max.get(field),
+                null_count=self._null_counts[field],
+            )
+            for field in self.fields
+        }
@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+import bz2
+import gzip
+import io
+import queue
+import threading
+import typing as t
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None  # type: ignore[assignment]
+
+if t.TYPE_CHECKING:
+    from singerlake.config import WriterConfig
+
+
+COMPRESSIONS = ("none", "gz", "bz2", "zst")
+DEFAULT_COMPRESSION_LEVELS = {"gz": 6, "bz2": 9, "zst": 3}
+THREADED_CHUNK_SIZE = 1024 * 1024
+THREADED_MAX_CHUNKS = 8
+
+
+def _require_zstandard() -> None:
+    if zstandard is None:
+        raise ImportError(
+            "zstd compression requires the zstandard package. "
+            "Install python-singerlake with the 'zstd' extra."
+        )
+
+
+class ThreadedWriter:
+    """Hand buffered writes to a background thread.
+
+    Writes are accumulated into chunks and passed through a bounded queue to a
+    thread that writes them to the wrapped (compressing) file, so compression
+    does not run in the caller's thread.
+    """
+
+    def __init__(
+        self,
+        file: t.BinaryIO,
+        chunk_size: int = THREADED_CHUNK_SIZE,
+        max_chunks: int = THREADED_MAX_CHUNKS,
+    ) -> None:
+        self._file = file
+        self._chunk_size = chunk_size
+        self._buffer = bytearray()
+        self._queue: queue.Queue[bytes | None] = queue.Queue(maxsize=max_chunks)
+        self._error: BaseException | None = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    @property
+    def closed(self) -> bool:
+        """Return True if the writer is closed."""
+        return self._closed
+
+    def _run(self) -> None:
+        while True:
+            chunk = self._queue.get()
+            if chunk is None:
+                return
+            if self._error is None:
+                try:
+                    self._file.write(chunk)
+                except BaseException as ex:  # noqa: BLE001
+                    self._error = ex
+
+    def _raise_error(self) -> None:
+        if self._error is not None:
+            raise self._error
+
+    def _put_buffer(self) -> None:
+        self._raise_error()
+        if self._buffer:
+            self._queue.put(bytes(self._buffer))
+            self._buffer.clear()
+
+    def write(self, data: bytes) -> int:
+        """Write bytes."""
+        self._buffer += data
+        if len(self._buffer) >= self._chunk_size:
+            self._put_buffer()
+        return len(data)
+
+    def writelines(self, lines: t.Iterable[bytes]) -> None:
+        """Write an iterable of bytes."""
+        for line in lines:
+            self.write(line)
+
+    def flush(self) -> None:
+        """Hand any buffered bytes to the background thread."""
+        self._put_buffer()
+
+    def close(self) -> None:
+        """Drain the queue, close the wrapped file and raise any write error."""
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self._put_buffer()
+        finally:
+            self._queue.put(None)
+            self._thread.join()
+            self._file.close()
+        self._raise_error()
+
+
+class _ClosingFile(io.BufferedIOBase):
+    """Close the underlying raw file together with a (de)compressing file."""
+
+    def __init__(self, file: io.BufferedIOBase, raw: t.BinaryIO) -> None:
+        self._file = file
+        self._raw = raw
+
+    def readable(self) -> bool:
+        return self._file.readable()
+
+    def writable(self) -> bool:
+        return self._file.writable()
+
+    def read(self, size: int | None = -1) -> bytes:
+        return self._file.read(-1 if size is None else size)
+
+    def read1(self, size: int = -1) -> bytes:
+        return self._file.read1(size)
+
+    def readline(self, size: int | None = -1) -> bytes:
+        return self._file.readline(-1 if size is None else size)
+
+    def write(self, data: bytes) -> int:  # type: ignore[override]
+        return self._file.write(data)
+
+    def flush(self) -> None:
+        if not self._file.closed:
+            self._file.flush()
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        try:
+            self._file.close()
+        finally:
+            self._raw.close()
+            super().close()
+
+
+def open_writer(
+    raw: t.BinaryIO,
+    compression: str = "none",
+    level: int | None = None,
+    threaded: bool = False,
+) -> t.BinaryIO:
+    """Wrap a binary file in a streaming compressor.
+
+    Args:
+        raw: Binary file to write compressed bytes to. Closed with the writer.
+        compression: One of `COMPRESSIONS`.
+        level: Compression level. Defaults to a per-codec balanced level.
+        threaded: Compress on a background thread. zstd uses its own native
+            worker threads instead.
+    """
+    if compression == "none":
+        return raw
+
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"Unknown compression: {compression}")
+
+    level = DEFAULT_COMPRESSION_LEVELS[compression] if level is None else level
+    compressed: io.BufferedIOBase
+    if compression == "gz":
+        compressed = gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=level)
+    elif compression == "bz2":
+        compressed = bz2.BZ2File(raw, mode="wb", compresslevel=level)
+    else:
+        _require_zstandard()
+        compressor = zstandard.ZstdCompressor(
+            level=level, threads=-1 if threaded else 0
+        )
+        return compressor.stream_writer(raw, closefd=True)
+
+    file = t.cast(t.BinaryIO, _ClosingFile(compressed, raw))
+    return t.cast(t.BinaryIO, ThreadedWriter(file)) if threaded else file
+
+
+def open_reader(raw: t.BinaryIO, compression: str = "none") -> t.BinaryIO:
+    """Wrap a binary file in a streaming decompressor.
+
+    The raw file is closed together with the returned reader.
+    """
+    if compression == "none":
+        return raw
+    if compression == "gz":
+        return t.cast(
+            t.BinaryIO, _ClosingFile(gzip.GzipFile(fileobj=raw, mode="rb"), raw)
+        )
+    if compression == "bz2":
+        return t.cast(t.BinaryIO, _ClosingFile(bz2.BZ2File(raw, mode="rb"), raw))
+    if compression == "zst":
+        _require_zstandard()
+        reader = zstandard.ZstdDecompressor().stream_reader(
+            raw, read_across_frames=True, closefd=True
+        )
+        return io.BufferedReader(reader)  # type: ignore[arg-type]
+
+    raise ValueError(f"Unknown compression: {compression}")
+
+
+def writer_from_config(raw: t.BinaryIO, config: "WriterConfig") -> t.BinaryIO:
+    """Wrap a binary file in the compressor configured for the writer."""
+    return open_writer(
+        raw,
+        compression=config.compression,
+        level=config.compression_level,
+        threaded=config.threaded_compression,
+    )
@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import shutil
+import tempfile
+import typing as t
+from array import array
+from pathlib import Path
+
+import farmhash
+import numpy as np
+
+import singerlake.singer.utils as su
+
+from .index import to_microseconds
+
+DEDUPE_DIRNAME = ".dedupe"
+KEY_DTYPE = np.dtype([("hash", "<u8"), ("time", "<i8"), ("position", "<u8")])
+DEFAULT_MAX_MEMORY_KEYS = 1_000_000
+DEFAULT_SPILL_BUCKETS = 64
+
+
+def hash_key(
+    record: dict,
+    key_properties: t.Sequence[str],
+    dumps: t.Callable[[t.Any], bytes],
+) -> int:
+    """Return a 64-bit fingerprint of a record's primary key values."""
+    return farmhash.fingerprint64(
+        dumps([record.get(key_property) for key_property in key_properties]).decode()
+    )
+
+
+def _latest_positions(keys: np.ndarray) -> np.ndarray:
+    """Return the positions of the latest version of each key.
+
+    The latest version has the greatest time extracted, ties going to the
+    greatest position.
+    """
+    if not len(keys):
+        return np.empty(0, dtype="<u8")
+    order = np.lexsort((keys["position"], keys["time"], keys["hash"]))
+    hashes = keys["hash"][order]
+    is_last = np.append(hashes[1:] != hashes[:-1], True)
+    return keys["position"][order[is_last]]
+
+
+class KeyIndex:
+    """Latest-wins index of hashed primary keys.
+
+    Keys are kept as fixed-width (hash, time, position) triples in arrays. Once
+    more than `max_memory_keys` are held they are spilled to bucket files on
+    disk, partitioned by hash, so finding the latest versions only needs one
+    bucket in memory at a time.
+    """
+
+    def __init__(
+        self,
+        spill_dir: Path | None = None,
+        max_memory_keys: int = DEFAULT_MAX_MEMORY_KEYS,
+        spill_buckets: int = DEFAULT_SPILL_BUCKETS,
+    ) -> None:
+        self.spill_dir = spill_dir
+        self.max_memory_keys = max_memory_keys
+        self.spill_buckets = spill_buckets
+        self.count = 0
+
+        self._hashes = array("Q")
+        self._times = array("q")
+        self._spilled = False
+
+    def add(self, key_hash: int, time_extracted: int) -> None:
+        """Add the key of the next record, with its time extracted in microseconds."""
+        self._hashes.append(key_hash)
+        self._times.append(time_extracted)
+        self.count += 1
+        if self.spill_dir is not None and len(self._hashes) >= self.max_memory_keys:
+            self._spill()
+
+    def _memory_keys(self) -> np.ndarray:
+        """Return the keys held in memory as a structured array."""
+        keys = np.empty(len(self._hashes), dtype=KEY_DTYPE)
+        keys["hash"] = np.frombuffer(self._hashes, dtype="<u8")
+        keys["time"] = np.frombuffer(self._times, dtype="<i8")
+        keys["position"] = np.arange(self.count - len(keys), self.count)
+        return keys
+
+    def _spill(self) -> None:
+        """Append the keys held in memory to their bucket files."""
+        spill_dir = self.spill_dir
+        # only an index with a spill directory spills its keys
+        assert spill_dir is not None
+        keys = self._memory_keys()
+        buckets = keys["hash"] % self.spill_buckets
+        for bucket in np.unique(buckets):
+            with (spill_dir / f"{bucket}.keys").open("ab") as bucket_file:
+                keys[buckets == bucket].tofile(bucket_file)
+        self._hashes = array("Q")
+        self._times = array("q")
+        self._spilled = True
+
+    def latest(self) -> np.ndarray:
+        """Return a mask over record positions, True for each key's latest version."""
+        keep = np.zeros(self.count, dtype=bool)
+        spill_dir = self.spill_dir
+        if spill_dir is None or not self._spilled:
+            keep[_latest_positions(self._memory_keys())] = True
+            return keep
+
+        self._spill()
+        for bucket_path in sorted(spill_dir.glob("*.keys")):
+            keep[_latest_positions(np.fromfile(bucket_path, dtype=KEY_DTYPE))] = True
+        return keep
+
+
+class Deduplicator:
+    """Keep only the latest version of each primary key in a stream of records.
+
+    Records are read twice: once to index their hashed keys, and once to yield
+    the latest version of each key, by time extracted, in their original order.
+    Both reads must yield records in the same order. Records of schemas without
+    key properties are all kept.
+    """
+
+    def __init__(
+        self,
+        key_properties: t.Sequence[str],
+        dumps: t.Callable[[t.Any], bytes],
+        working_dir: Path | None = None,
+        max_memory_keys: int = DEFAULT_MAX_MEMORY_KEYS,
+    ) -> None:
+        self.key_properties = list(key_properties)
+        self.dumps = dumps
+        self.working_dir = working_dir
+        self.max_memory_keys = max_memory_keys
+
+    def dedupe(
+        self, read_records: t.Callable[[], t.Iterable[dict]]
+    ) -> t.Iterator[dict]:
+        """Yield the latest version of each key.
+
+        Args:
+            read_records: Function returning a fresh iterable of RECORD messages.
+        """
+        if not self.key_properties:
+            yield from read_records()
+            return
+
+        spill_dir = None
+        if self.working_dir is not None:
+            self.working_dir.mkdir(parents=True, exist_ok=True)
+            spill_dir = Path(tempfile.mkdtemp(dir=self.working_dir))
+        try:
+            index = KeyIndex(spill_dir=spill_dir, max_memory_keys=self.max_memory_keys)
+            for message in read_records():
+                index.add(
+                    hash_key(message["record"], self.key_properties, self.dumps),
+                    to_microseconds(su.get_time_extracted(message)),
+                )
+            keep = index.latest()
+        finally:
+            if spill_dir is not None:
+                shutil.rmtree(spill_dir, ignore_errors=True)
+
+        for position, message in enumerate(read_records()):
+            if position >= len(keep):
+                raise ValueError("Records changed between deduplication passes.")
+            if keep[position]:
+                yield message
@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import mmap
+import typing as t
+
+import singerlake.singer.utils as su
+from singerlake.singer.lazy import LazyRecord
+
+from .compression import open_reader
+from .index import StreamFileIndex
+
+if t.TYPE_CHECKING:
+    from datetime import datetime
+
+    from singerlake.store.manifest import StreamFileEntry
+    from singerlake.store.zone_map import Predicate
+
+    from .stream import Stream
+
+
+class SingerFileReader:
+    """Read a committed singer file from storage, one line at a time."""
+
+    def __init__(self, stream: "Stream", entry: "StreamFileEntry") -> None:
+        self.stream = stream
+        self.entry = entry
+
+    @property
+    def codec(self):
+        """Return the JSON codec."""
+        return self.stream.singerlake.codec
+
+    def _open_raw(self) -> t.BinaryIO:
+        """Open the stored file for binary reading, without decompressing."""
+        return self.stream.singerlake.store.open_stream_file(
+            tap_id=self.stream.tap.tap_id,
+            stream_id=self.stream.stream_id,
+            entry=self.entry,
+        )
+
+    def _open(self) -> t.BinaryIO:
+        """Open the file for reading, decompressing if needed."""
+        return open_reader(self._open_raw(), self.entry.compression)
+
+    def _read_index(self, size: int) -> StreamFileIndex | None:
+        """Return the file's sidecar index, if it has a valid one."""
+        data = self.stream.singerlake.store.read_stream_file_index(
+            tap_id=self.stream.tap.tap_id,
+            stream_id=self.stream.stream_id,
+            entry=self.entry,
+        )
+        return None if data is None else StreamFileIndex.from_bytes(data, size)
+
+    def _record_lines(self, start: "datetime" | None = None) -> t.Iterator[bytes]:
+        """Yield the file's record lines.
+
+        Uncompressed local files are memory-mapped, and reading skips ahead to
+        `start` using the sidecar index if the file has one. Other files are
+        read line by line from the start.
+        """
+        raw = self._open_raw()
+        buffer = None
+        if self.entry.compression == "none":
+            try:
+                buffer = mmap.mmap(raw.fileno(), 0, access=mmap.ACCESS_READ)
+            except (AttributeError, OSError, ValueError):
+                # not backed by a local file
+                buffer = None
+
+        if buffer is None:
+            with open_reader(raw, self.entry.compression) as singer_file:
+                # the first line is the stream schema
+                singer_file.readline()
+                yield from singer_file
+            return
+
+        with raw, buffer:
+            size = len(buffer)
+            position = buffer.find(b"\n") + 1
+            if start is not None:
+                index = self._read_index(size)
+                offset = None if index is None else index.seek_offset(start)
+                if offset is not None:
+                    position = max(position, offset)
+            while 0 < position < size:
+                line_end = buffer.find(b"\n", position) + 1 or size
+                yield buffer[position:line_end]
+                position = line_end
+
+    def read_schema(self) -> dict:
+        """Return the SCHEMA message stored as the file's first line."""
+        with self._open() as singer_file:
+            return self.codec.loads(singer_file.readline())
+
+    def read_records(
+        self,
+        start: "datetime" | None = None,
+        end: "datetime" | None = None,
+        predicates: t.Sequence["Predicate"] = (),
+        fields: t.Sequence[str] | None = None,
+        raw: bool = False,
+    ) -> t.Iterator[t.Any]:
+        """Yield RECORD messages with time extracted in [start, end).
+
+        Records must also satisfy every predicate.
+
+        Args:
+            start: Inclusive lower bound of time extracted, or None.
+            end: Exclusive upper bound of time extracted, or None.
+            predicates: Predicates records must satisfy.
+            fields: Record fields to project messages to. Only these fields are
+                decoded from each line.
+            raw: Yield undecoded lines as `LazyRecord` views instead of messages.
+        """
+        lazy = raw or fields is not None
+        loads = self.codec.loads
+        is_sorted = self.entry.is_sorted
+        for line in self._record_lines(start=start):
+            message = LazyRecord(line, loads) if lazy else loads(line)
+            if start is not None or end is not None:
+                time_extracted = su.naive_time(
+                    message.time_extracted if lazy else su.get_time_extracted(message)
+                )
+                if end is not None and time_extracted >= end:
+                    if is_sorted:
+                        return
+                    continue
+                if start is not None and time_extracted < start:
+                    continue
+            if predicates:
+                record = message if lazy else message["record"]
+                if not all(predicate.matches(record) for predicate in predicates):
+                    continue
+            if fields is not None and not raw:
+                message = message.project(fields)
+            yield message
@@ -1,20 +1,32 @@
 from __future__ import annotations
 
-import json
+import hashlib
+import os
 import shutil
-import tempfile
+import time
 import typing as t
 from datetime import datetime
-from io import TextIOWrapper
 from pathlib import Path
 from uuid import uuid4
 
 from pydantic import BaseModel, Field
 
 import singerlake.singer.utils as su
+from singerlake.singer.codec import BaseJSONCodec
+from singerlake.store.manifest import FieldStats
 from singerlake.store.path_manager import Partition
+from singerlake.store.path_manager.base import (
+    STREAM_FILE_INDEX_SUFFIX,
+    STREAM_FILE_TIME_FORMAT,
+)
+from singerlake.store.zone_map import ZoneMapCollector
+
+from .compression import writer_from_config
+from .index import StreamFileIndex
 
 if t.TYPE_CHECKING:
+    from singerlake.config import RolloverConfig, WriterConfig
+
     from .stream import Stream
 
 
@@ -27,14 +39,29 @@ class SingerFile(BaseModel):
     partitions: t.Tuple[Partition, ...]
     min_time_extracted: datetime
     max_time_extracted: datetime
-    encryption: t.Literal["none", "bz2", "gz"] = "none"
+    encryption: t.Literal["none", "bz2", "gz", "zst"] = "none"
+    sequence: int = 0
+    record_count: int = 0
+    size_bytes: t.Optional[int] = None
+    uncompressed_bytes: t.Optional[int] = None
+    checksum: t.Optional[str] = None
+    is_sorted: bool = True
+    indexed: bool = False
+    zone_maps: t.Dict[str, FieldStats] = {}
 
     @property
     def name(self):
-        """Return the filename."""
-        file_start_time = self.min_time_extracted.strftime("%Y%m%dT%H%M%SZ")
-        file_stop_time = self.max_time_extracted.strftime("%Y%m%dT%H%M%SZ")
-        file_name = f"{self.stream_id}-{file_start_time}-{file_stop_time}.singer"
+        """Return the filename.
+
+        A non-zero sequence number disambiguates files of the same stream that
+        cover the same time range.
+        """
+        file_start_time = self.min_time_extracted.strftime(STREAM_FILE_TIME_FORMAT)
+        file_stop_time = self.max_time_extracted.strftime(STREAM_FILE_TIME_FORMAT)
+        file_name = f"{self.stream_id}-{file_start_time}-{file_stop_time}"
+        if self.sequence:
+            file_name += f"-{self.sequence}"
+        file_name += ".singer"
         if self.encryption != "none":
             file_name += f".{self.encryption}"
         return file_name
@@ -49,31 +76,136 @@ class SingerFile(BaseModel):
         """Return the file path."""
         return self.parent_dir / self.name
 
+    @property
+    def index_path(self):
+        """Return the path of the file's sidecar index."""
+        return self.parent_dir / f"{self.name}{STREAM_FILE_INDEX_SUFFIX}"
+
     def __repr__(self) -> str:
         """Return a string representation of the object."""
         return f"{self.__class__.__name__}({self.path})"
 
 
-class SingerFileWriter:
-    """Base class for writing singer files to disk via temporary directories."""
+STAGING_DIRNAME = ".staging"
+
+
+def _move(source: Path, target: Path) -> None:
+    """Move a file, renaming it if possible."""
+    try:
+        os.replace(source, target)
+    except OSError:
+        # source and target directories are on different filesystems
+        shutil.move(source, target)
+
+
+class _ChecksumWriter:
+    """Count and MD5-hash the bytes written to a binary file."""
+
+    def __init__(self, file: t.BinaryIO) -> None:
+        self._file = file
+        self._md5 = hashlib.md5()
+        self.size = 0
+
+    @property
+    def closed(self) -> bool:
+        return self._file.closed
+
+    @property
+    def checksum(self) -> str:
+        """Return the MD5 hex digest of the bytes written so far."""
+        return self._md5.hexdigest()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: bytes) -> int:
+        self._md5.update(data)
+        self.size += len(data)
+        return self._file.write(data)
 
-    def __init__(self, stream: "Stream", partitions: t.Tuple["Partition", ...]) -> None:
+    def flush(self) -> None:
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class SingerFileWriter:
+    """Base class for writing singer files to disk via a staging directory.
+
+    Files are written to a staging directory inside the working directory and
+    renamed into place when closed, so no bytes are copied locally.
+    """
+
+    def __init__(
+        self,
+        stream: "Stream",
+        partitions: t.Tuple["Partition", ...],
+        rollover: RolloverConfig | None = None,
+    ) -> None:
         self.stream = stream
         self.partitions = partitions
+        self.rollover = rollover
 
         self._records_written = 0
+        self._bytes_written = 0
+        self._opened_at: float | None = None
         self._schema: dict | None = None
-        self._tmp_dir: Path | None = None
-        self._file: TextIOWrapper | None = None
+        self._staging_dir: Path | None = None
+        self._checksum_writer: _ChecksumWriter | None = None
+        self._file: t.BinaryIO | None = None
         self._file_path: Path | None = None
         self._min_time_extracted: datetime | None = None
         self._max_time_extracted: datetime | None = None
+        self._is_sorted = True
+        self._index: StreamFileIndex | None = None
+        self._zone_maps: ZoneMapCollector | None = None
 
     @property
     def records_written(self) -> int:
         """Return the number of records written."""
         return self._records_written
 
+    @property
+    def bytes_written(self) -> int:
+        """Return the number of (uncompressed) bytes written."""
+        return self._bytes_written
+
+    @property
+    def records_remaining(self) -> int | None:
+        """Return the number of records until the record limit, if any."""
+        if self.rollover is None or self.rollover.max_records is None:
+            return None
+        return max(self.rollover.max_records - self._records_written, 0)
+
+    @property
+    def age(self) -> float:
+        """Return the number of seconds since the file was opened."""
+        if self._opened_at is None:
+            return 0.0
+        return time.monotonic() - self._opened_at
+
+    @property
+    def is_full(self) -> bool:
+        """Return True if any rollover limit has been reached."""
+        rollover = self.rollover
+        if rollover is None:
+            return False
+        return (
+            (
+                rollover.max_records is not None
+                and self._records_written >= rollover.max_records
+            )
+            or (
+                rollover.max_bytes is not None
+                and self._bytes_written >= rollover.max_bytes
+            )
+            or (
+                rollover.max_age_seconds is not None
+                and self.age >= rollover.max_age_seconds
+            )
+        )
+
     @property
     def file_path(self) -> Path:
         """Return the file path."""
@@ -88,7 +220,17 @@ class SingerFileWriter:
         self._file_path = value
 
     @property
-    def file(self) -> TextIOWrapper:
+    def codec(self) -> BaseJSONCodec:
+        """Return the JSON codec."""
+        return self.stream.singerlake.codec
+
+    @property
+    def config(self) -> WriterConfig:
+        """Return the writer config."""
+        return self.stream.singerlake.config.writer
+
+    @property
+    def file(self) -> t.BinaryIO:
         """Return the file."""
         if self._file is None:
             raise ValueError("File has not been opened.")
@@ -96,49 +238,75 @@ class SingerFileWriter:
         return self._file
 
     @file.setter
-    def file(self, value: TextIOWrapper) -> None:
+    def file(self, value: t.BinaryIO) -> None:
         """Set the file."""
         self._file = value
 
     @property
-    def tmp_dir(self) -> Path:
-        """Return the temporary directory."""
-        if self._tmp_dir is None:
-            raise ValueError("Temporary directory has not been created.")
+    def staging_dir(self) -> Path:
+        """Return the staging directory."""
+        if self._staging_dir is None:
+            self._staging_dir = self.stream.singerlake.working_dir / STAGING_DIRNAME
+            self._staging_dir.mkdir(parents=True, exist_ok=True)
 
-        return self._tmp_dir
+        return self._staging_dir
 
-    @tmp_dir.setter
-    def tmp_dir(self, value: Path) -> None:
-        """Set the temporary directory."""
-        self._tmp_dir = value
+    @staging_dir.setter
+    def staging_dir(self, value: Path) -> None:
+        """Set the staging directory."""
+        self._staging_dir = value
 
     @property
     def closed(self) -> bool:
         """Return True if the file is closed."""
         return self._file is None
 
-    def _open_file(self, tmp_dir: Path) -> TextIOWrapper:
+    def _open_file(self, staging_dir: Path) -> t.BinaryIO:
         """Open a file for writing."""
-        self.file_path = tmp_dir / f"{uuid4()}.jsonl"
-        self.file = self.file_path.open("w", encoding="utf-8")
+        self.file_path = staging_dir / f"{uuid4()}.jsonl.partial"
+        raw = self.file_path.open("wb", buffering=self.config.buffer_size)
+        self._checksum_writer = _ChecksumWriter(raw)
+        self.file = writer_from_config(
+            self._checksum_writer,  # type: ignore[arg-type]
+            self.config,
+        )
+        self._opened_at = time.monotonic()
+        if self.config.index_interval and self.config.compression == "none":
+            self._index = StreamFileIndex()
+        if self.config.zone_map_fields:
+            self._zone_maps = ZoneMapCollector(self.config.zone_map_fields)
         return self.file
 
-    def open(self) -> SingerFileWriter:
-        """Create a temporary directory and new file to write records to."""
-        if self._tmp_dir is None:
-            self.tmp_dir = Path(tempfile.mkdtemp())
-        self._open_file(self.tmp_dir)
+    def open(self, staging_dir: Path | None = None) -> SingerFileWriter:
+        """Open a new file in the staging directory to write records to.
+
+        Args:
+            staging_dir: Existing directory to stage the file in. Defaults to a
+                staging directory inside the working directory.
+        """
+        if staging_dir is not None:
+            self.staging_dir = staging_dir
+        self._open_file(self.staging_dir)
         return self
 
-    def close(self, output_dir: Path) -> SingerFile:
-        """Remove the temporary directory."""
+    def close(
+        self, output_dir: Path, reserved_names: t.Set[str] | None = None
+    ) -> SingerFile:
+        """Close the file and rename it into the output directory.
+
+        Args:
+            output_dir: Directory to move the finished file to.
+            reserved_names: File names already in use. The file's sequence number
+                is bumped until its name is free, and the name is then reserved.
+        """
         if self._file is None:
             raise ValueError("File not open")
 
         if not self.file.closed:
             self.file.close()
 
+        checksum_writer = self._checksum_writer
+        index = self._index
         singer_file = SingerFile(
             tap_id=self.stream.tap.tap_id,
             schema=self._schema,
@@ -146,37 +314,170 @@ class SingerFileWriter:
             partitions=self.partitions,
             min_time_extracted=self._min_time_extracted,
             max_time_extracted=self._max_time_extracted,
+            encryption=self.config.compression,
+            record_count=self._records_written,
+            size_bytes=checksum_writer.size if checksum_writer else None,
+            uncompressed_bytes=self._bytes_written,
+            checksum=checksum_writer.checksum if checksum_writer else None,
+            is_sorted=self._is_sorted,
+            # files shorter than one index interval are not worth indexing
+            indexed=bool(index),
+            zone_maps=self._zone_maps.stats() if self._zone_maps else {},
         )
-        shutil.move(self.file_path, singer_file.path)
+        if reserved_names is not None:
+            while singer_file.name in reserved_names:
+                singer_file.sequence += 1
+            reserved_names.add(singer_file.name)
+        if index:
+            index_path = self.file_path.with_suffix(STREAM_FILE_INDEX_SUFFIX)
+            index_path.write_bytes(index.to_bytes(self._bytes_written))
+            _move(index_path, singer_file.index_path)
+        _move(self.file_path, singer_file.path)
         self._file = None
-
-        if self.tmp_dir.exists():
-            shutil.rmtree(self.tmp_dir, ignore_errors=True)
+        self._index = None
+        self._zone_maps = None
 
         return singer_file
 
-    def write_record(self, record: dict) -> None:
-        """Write a record to the file."""
+    def _update_time_extracted(
+        self, min_time_extracted: datetime, max_time_extracted: datetime
+    ) -> None:
+        """Widen the min/max time extracted seen by this file."""
+        if (
+            self._min_time_extracted is None
+            or min_time_extracted < self._min_time_extracted
+        ):
+            self._min_time_extracted = min_time_extracted
+
+        if (
+            self._max_time_extracted is None
+            or max_time_extracted > self._max_time_extracted
+        ):
+            self._max_time_extracted = max_time_extracted
+
+    def write_record(
+        self, record: dict, time_extracted: datetime | None = None
+    ) -> None:
+        """Write a record to the file.
+
+        Args:
+            record: Singer RECORD message.
+            time_extracted: Pre-parsed time extracted of the record. Parsed from
+                the record if not provided.
+        """
         if self._file is None:
             raise ValueError("File not open")
 
-        time_extracted = su.get_time_extracted(record)
-
-        if self._min_time_extracted is None:
-            self._min_time_extracted = time_extracted
+        if time_extracted is None:
+            time_extracted = su.get_time_extracted(record)
+
+        if (
+            self._max_time_extracted is not None
+            and time_extracted < self._max_time_extracted
+        ):
+            self._is_sorted = False
+        index = self._index
+        if index is not None and self._records_written:
+            interval = self.config.index_interval
+            max_time = self._max_time_extracted
+            # an index is only kept with an interval, once a record is written
+            assert interval and max_time is not None
+            if self._records_written % interval == 0:
+                index.add(self._bytes_written, max_time)
+        self._update_time_extracted(time_extracted, time_extracted)
+        if self._zone_maps is not None:
+            self._zone_maps.update(record["record"])
+
+        line = self.codec.dumps_line(record)
+        self.file.write(line)
+        self._records_written += 1
+        self._bytes_written += len(line)
 
-        if self._max_time_extracted is None:
-            self._max_time_extracted = time_extracted
+    def write_records(
+        self, records: t.Sequence[dict], times_extracted: t.Sequence[datetime]
+    ) -> int:
+        """Write a batch of records to the file, stopping once the file is full.
 
-        if time_extracted < self._min_time_extracted:
-            self._min_time_extracted = time_extracted
+        Args:
+            records: Singer RECORD messages.
+            times_extracted: Pre-parsed time extracted of each record, in the same
+                order as `records`.
 
-        if time_extracted > self._max_time_extracted:
-            self._max_time_extracted = time_extracted
+        Returns:
+            The number of records written, from the start of `records`.
+        """
+        if self._file is None:
+            raise ValueError("File not open")
 
-        payload = json.dumps(record, ensure_ascii=False)
-        self.file.write(f"{payload}\n")
-        self._records_written += 1
+        count = len(records)
+        records_remaining = self.records_remaining
+        if records_remaining is not None:
+            count = min(count, records_remaining)
+        rollover = self.rollover
+
+        dumps_line = self.codec.dumps_line
+        if rollover is None or rollover.max_bytes is None:
+            lines = [dumps_line(record) for record in records[:count]]
+            size = sum(map(len, lines))
+        else:
+            lines = []
+            size = 0
+            remaining = rollover.max_bytes - self._bytes_written
+            for record in records[:count]:
+                # always write at least one record, so an empty file can't stall
+                if lines and size >= remaining:
+                    break
+                line = dumps_line(record)
+                lines.append(line)
+                size += len(line)
+            count = len(lines)
+
+        if not count:
+            return 0
+
+        times = times_extracted[:count]
+        if self._is_sorted and (
+            (
+                self._max_time_extracted is not None
+                and times[0] < self._max_time_extracted
+            )
+            or any(later < earlier for earlier, later in zip(times, times[1:]))
+        ):
+            self._is_sorted = False
+        if self._index is not None:
+            self._sample_index(lines, times)
+        self._update_time_extracted(min(times), max(times))
+        if self._zone_maps is not None:
+            for record in records[:count]:
+                self._zone_maps.update(record["record"])
+        self.file.write(b"".join(lines))
+        self._records_written += count
+        self._bytes_written += size
+        return count
+
+    def _sample_index(
+        self, lines: t.Sequence[bytes], times: t.Sequence[datetime]
+    ) -> None:
+        """Sample index offsets of a batch of lines about to be written."""
+        index = self._index
+        interval = self.config.index_interval
+        assert index is not None and interval
+        offset = self._bytes_written
+        max_time = self._max_time_extracted
+        previous = 0
+        # position in the batch of the first record at a multiple of interval
+        first = -self._records_written % interval
+        for position in range(first, len(lines), interval):
+            if position == 0 and not self._records_written:
+                continue
+            offset += sum(map(len, lines[previous:position]))
+            if position > previous:
+                batch_max = max(times[previous:position])
+                max_time = batch_max if max_time is None else max(max_time, batch_max)
+            # set by an earlier record, in this batch or a previous one
+            assert max_time is not None
+            index.add(offset, max_time)
+            previous = position
 
     def write_schema(self, schema: dict) -> None:
         """Write a schema to the file."""
@@ -185,4 +486,6 @@ class SingerFileWriter:
 
         self._schema = schema
 
-        self.file.write(f"{json.dumps(schema, ensure_ascii=False)}\n")
+        line = self.codec.dumps_line(schema)
+        self.file.write(line)
+        self._bytes_written += len(line)
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import struct
+import typing as t
+from bisect import bisect_left
+from datetime import datetime, timedelta
+
+import numpy as np
+
+INDEX_MAGIC = b"SLIDX1"
+# magic, size of the indexed file in bytes, number of samples
+INDEX_HEADER = struct.Struct("<6sQQ")
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def to_microseconds(time_extracted: datetime) -> int:
+    """Return the wall-clock microseconds since the epoch of a datetime."""
+    return (time_extracted.replace(tzinfo=None) - _EPOCH) // _MICROSECOND
+
+
+class StreamFileIndex:
+    """Sparse line-offset/time index of an uncompressed singer file.
+
+    Every `interval` records the byte offset of the next record is sampled,
+    together with the max time extracted of all records before it. As the max
+    never decreases, the samples can be binary-searched for a start time even
+    if the file's records are not in time order.
+    """
+
+    def __init__(
+        self,
+        offsets: t.Sequence[int] | None = None,
+        max_times: t.Sequence[int] | None = None,
+    ) -> None:
+        self.offsets = list(offsets or [])
+        self.max_times = list(max_times or [])
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def add(self, offset: int, max_time: datetime) -> None:
+        """Sample a record's byte offset and the max time extracted before it."""
+        self.offsets.append(offset)
+        self.max_times.append(to_microseconds(max_time))
+
+    def seek_offset(self, start: datetime) -> int | None:
+        """Return the furthest offset with no earlier record at or after `start`.
+
+        Returns None if no sampled offset can be skipped to.
+        """
+        position = bisect_left(self.max_times, to_microseconds(start))
+        if position == 0:
+            return None
+        return self.offsets[position - 1]
+
+    def to_bytes(self, size: int) -> bytes:
+        """Serialize the index of a file of `size` bytes."""
+        return (
+            INDEX_HEADER.pack(INDEX_MAGIC, size, len(self))
+            + np.asarray(self.offsets, dtype="<u8").tobytes()
+            + np.asarray(self.max_times, dtype="<i8").tobytes()
+        )
+
+    @classmethod
+    def from_bytes(cls, data: bytes, size: int) -> StreamFileIndex | None:
+        """Deserialize an index, or None if it isn't a valid index of `size` bytes."""
+        if len(data) < INDEX_HEADER.size:
+            return None
+        magic, indexed_size, count = INDEX_HEADER.unpack_from(data)
+        if (
+            magic != INDEX_MAGIC
+            or indexed_size != size
+            or len(data) != INDEX_HEADER.size + 16 * count
+        ):
+            return None
+        offsets = np.frombuffer(
+            data, dtype="<u8", count=count, offset=INDEX_HEADER.size
+        )
+        max_times = np.frombuffer(
+            data, dtype="<i8", count=count, offset=INDEX_HEADER.size + 8 * count
+        )
+        return cls(offsets=offsets.tolist(), max_times=max_times.tolist())
@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import mmap
+import os
+import shutil
+import typing as t
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from uuid import uuid4
+
+from .record_writer import RecordWriter
+
+if t.TYPE_CHECKING:
+    from singerlake.singer.codec import BaseJSONCodec
+
+    from .file_writer import SingerFile
+    from .stream import Stream
+
+
+INGEST_DIRNAME = ".ingest"
+INGEST_BATCH_SIZE = 1000
+
+
+def split_byte_ranges(path: Path, shards: int) -> t.List[t.Tuple[int, int]]:
+    """Split a file into up to `shards` byte ranges that end on line boundaries."""
+    size = os.path.getsize(path)
+    if size == 0:
+        return []
+
+    boundaries = [0]
+    with path.open("rb") as input_file:
+        for shard in range(1, shards):
+            position = max(size * shard // shards, boundaries[-1])
+            input_file.seek(position)
+            # advance to the start of the next line
+            input_file.readline()
+            position = input_file.tell()
+            if position >= size:
+                break
+            if position > boundaries[-1]:
+                boundaries.append(position)
+    boundaries.append(size)
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+
+def _find_preceding_schema(
+    data: mmap.mmap, position: int, stream_id: str, codec: "BaseJSONCodec"
+) -> dict | None:
+    """Return the last SCHEMA message for a stream that starts before `position`."""
+    while position > 0:
+        match = data.rfind(b'"SCHEMA"', 0, position)
+        if match == -1:
+            return None
+        line_start = data.rfind(b"\n", 0, match) + 1
+        line_end = data.find(b"\n", match)
+        line = data[line_start : line_end if line_end != -1 else len(data)]
+        message = codec.loads(line)
+        if message.get("type") == "SCHEMA" and message.get("stream") == stream_id:
+            return message
+        position = line_start
+    return None
+
+
+def _ingest_range(
+    config: dict,
+    tap_id: str,
+    stream_id: str,
+    input_path: Path,
+    byte_range: t.Tuple[int, int],
+    output_dir: Path,
+) -> t.List["SingerFile"]:
+    """Write the RECORD messages of one byte range of a Singer JSONL file."""
+    # imported here to avoid a circular import at module load
+    from singerlake import Singerlake
+    from singerlake.tap import Tap
+
+    from .stream import Stream
+
+    singerlake = Singerlake(config=config)
+    tap_manifest = singerlake.store.get_tap_manifest(tap_id=tap_id)
+    if tap_manifest is None:
+        raise ValueError(f"Tap not found: {tap_id}")
+    stream = Stream(
+        singerlake=singerlake,
+        tap=Tap(singerlake=singerlake, tap_manifest=tap_manifest),
+        stream_id=stream_id,
+    )
+    codec = singerlake.codec
+
+    start, end = byte_range
+    writer = RecordWriter(stream=stream, output_dir=output_dir)
+    with input_path.open("rb") as input_file:
+        with mmap.mmap(input_file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            schema = _find_preceding_schema(data, start, stream_id, codec)
+            batch: list[dict] = []
+            data.seek(start)
+            while data.tell() < end:
+                line = data.readline()
+                if not line.strip():
+                    continue
+                message = codec.loads(line)
+                if message.get("stream") != stream_id:
+                    continue
+                if message["type"] == "SCHEMA":
+                    # records are only batched once a schema has been read
+                    if schema is not None and batch:
+                        writer.write_many(schema=schema, records=batch)
+                        batch = []
+                    schema = message
+                elif message["type"] == "RECORD":
+                    if schema is None:
+                        raise ValueError(
+                            f"RECORD for stream '{stream_id}' before its SCHEMA message"
+                        )
+                    batch.append(message)
+                    if len(batch) >= INGEST_BATCH_SIZE:
+                        writer.write_many(schema=schema, records=batch)
+                        batch = []
+            if schema is not None and batch:
+                writer.write_many(schema=schema, records=batch)
+    writer.finalize()
+    return writer.singer_files
+
+
+def ingest_file(
+    stream: "Stream", input_path: Path, processes: int | None = None
+) -> t.List["SingerFile"]:
+    """Write a stream's records from a Singer JSONL file using a process pool.
+
+    The file is split into byte ranges on line boundaries, and each range is
+    written by its own `RecordWriter` in a worker process. The resulting files
+    are moved into the working directory, renumbered so their names are unique.
+
+    Args:
+        stream: Stream to write records to.
+        input_path: Singer JSONL file. Messages for other streams are ignored.
+        processes: Number of worker processes. Defaults to the CPU count.
+
+    Returns:
+        The written singer files, in input order.
+    """
+    singerlake = stream.singerlake
+    processes = processes or os.cpu_count() or 1
+    byte_ranges = split_byte_ranges(input_path, processes)
+    ingest_dir = singerlake.working_dir / INGEST_DIRNAME / str(uuid4())
+    output_dirs = [ingest_dir / str(shard) for shard in range(len(byte_ranges))]
+    config = singerlake.config.dict()
+    try:
+        for output_dir in output_dirs:
+            output_dir.mkdir(parents=True)
+        with ProcessPoolExecutor(max_workers=max(len(byte_ranges), 1)) as executor:
+            futures = [
+                executor.submit(
+                    _ingest_range,
+                    config,
+                    stream.tap.tap_id,
+                    stream.stream_id,
+                    input_path,
+                    byte_range,
+                    output_dir,
+                )
+                for byte_range, output_dir in zip(byte_ranges, output_dirs)
+            ]
+            shard_files = [future.result() for future in futures]
+
+        # merge shard outputs into the working directory with unique names
+        reserved_names = {stream_file.name for stream_file in stream.files}
+        singer_files = []
+        for stream_files in shard_files:
+            for stream_file in stream_files:
+                source = stream_file.path
+                index_source = stream_file.index_path
+                stream_file.parent_dir = singerlake.working_dir
+                stream_file.sequence = 0
+                while stream_file.name in reserved_names:
+                    stream_file.sequence += 1
+                reserved_names.add(stream_file.name)
+                os.replace(source, stream_file.path)
+                if stream_file.indexed:
+                    os.replace(index_source, stream_file.index_path)
+                singer_files.append(stream_file)
+    finally:
+        # shard directories are removed whether or not the ingest succeeded
+        shutil.rmtree(ingest_dir, ignore_errors=True)
+    return singer_files
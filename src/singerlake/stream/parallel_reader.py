@@ -0,0 +1,315 @@
+from __future__ import annotations
+
+import heapq
+import shutil
+import tempfile
+import typing as t
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from datetime import timedelta
+from itertools import count, islice
+from pathlib import Path
+
+import singerlake.singer.utils as su
+from singerlake.singer.lazy import LazyRecord
+
+from .file_reader import SingerFileReader
+
+if t.TYPE_CHECKING:
+    from datetime import datetime
+
+    from singerlake.store.manifest import StreamFileEntry
+    from singerlake.store.zone_map import Predicate
+
+    from .stream import Stream
+
+
+MERGE_DIRNAME = ".merge"
+DEFAULT_MAX_OPEN_FILES = 32
+# file names, and so listed files' time ranges, are truncated to the second
+_TIME_RANGE_SLACK = timedelta(seconds=1)
+
+# a source of sorted records for a merge: its min time extracted, and a
+# function opening it
+_MergeSource = t.Tuple["datetime", t.Callable[[], t.Iterator[t.Any]]]
+
+
+def _record_time(record: dict | LazyRecord) -> "datetime":
+    """Return the naive time extracted of a record, for ordering."""
+    if isinstance(record, LazyRecord):
+        return su.naive_time(record.time_extracted)
+    return su.naive_time(su.get_time_extracted(record))
+
+
+def _overlapping_groups(
+    entries: t.Sequence["StreamFileEntry"],
+) -> t.Iterator[t.List["StreamFileEntry"]]:
+    """Split entries sorted by min time extracted into groups of overlapping files.
+
+    Every record of a group sorts before every record of the next group, so
+    groups can be merged one at a time.
+    """
+    group: t.List["StreamFileEntry"] = []
+    group_end: "datetime" | None = None
+    for entry in entries:
+        if group_end is not None and entry.min_time_extracted > group_end:
+            yield group
+            group = []
+            group_end = None
+        group.append(entry)
+        entry_end = entry.max_time_extracted + _TIME_RANGE_SLACK
+        group_end = entry_end if group_end is None else max(group_end, entry_end)
+    if group:
+        yield group
+
+
+class _FileCursor:
+    """Decode a file's records in chunks on a thread pool, one chunk ahead.
+
+    Each chunk is decoded by a separate pool task that never blocks, so any
+    number of cursors can share a small pool without deadlocking, and memory is
+    bounded by two chunks per open file.
+    """
+
+    def __init__(
+        self,
+        executor: ThreadPoolExecutor,
+        records: t.Iterator[dict],
+        chunk_size: int,
+    ) -> None:
+        self._executor = executor
+        self._records = records
+        self._chunk_size = chunk_size
+        self.future: Future | None = executor.submit(self._read_chunk)
+
+    def _read_chunk(self) -> t.List[dict]:
+        return list(islice(self._records, self._chunk_size))
+
+    def next_chunk(self) -> t.List[dict]:
+        """Return the next chunk of records, and start decoding the one after.
+
+        An empty chunk means the file is exhausted.
+        """
+        if self.future is None:
+            return []
+        chunk = self.future.result()
+        self.future = (
+            self._executor.submit(self._read_chunk)
+            if len(chunk) == self._chunk_size
+            else None
+        )
+        return chunk
+
+    def __iter__(self) -> t.Iterator[dict]:
+        while True:
+            chunk = self.next_chunk()
+            if not chunk:
+                return
+            yield from chunk
+
+    def cancel(self) -> None:
+        """Stop decoding further chunks."""
+        if self.future is not None:
+            self.future.cancel()
+            self.future = None
+
+
+class ParallelReader:
+    """Read committed singer files concurrently on a bounded thread pool.
+
+    In unordered mode up to `workers` files are decoded at once and records are
+    yielded chunk by chunk as they become ready. In ordered mode records of all
+    files are merged into a single stream sorted by time extracted; files are
+    only opened once the merge reaches their min time extracted, and files not
+    known to be sorted are sorted in memory first.
+
+    At most `max_open_files` files are merged at once. Larger groups of
+    overlapping files are merged in batches of that many into sorted runs,
+    spilled to the working directory, and the runs are merged in turn.
+    """
+
+    def __init__(
+        self,
+        stream: "Stream",
+        entries: t.Iterable["StreamFileEntry"],
+        start: "datetime" | None = None,
+        end: "datetime" | None = None,
+        workers: int = 4,
+        read_ahead: int = 1000,
+        ordered: bool = False,
+        predicates: t.Sequence["Predicate"] = (),
+        fields: t.Sequence[str] | None = None,
+        raw: bool = False,
+        max_open_files: int = DEFAULT_MAX_OPEN_FILES,
+    ) -> None:
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        if read_ahead < 1:
+            raise ValueError("read_ahead must be at least 1")
+        if max_open_files < 2:
+            raise ValueError("max_open_files must be at least 2")
+
+        self.stream = stream
+        self.entries = list(entries)
+        self.start = start
+        self.end = end
+        self.workers = workers
+        self.read_ahead = read_ahead
+        self.ordered = ordered
+        self.predicates = predicates
+        self.fields = fields
+        self.raw = raw
+        self.max_open_files = max_open_files
+
+    def _file_records(self, entry: "StreamFileEntry") -> t.Iterator[dict]:
+        """Yield the records of a file, sorted if ordered and not known sorted."""
+        records = SingerFileReader(stream=self.stream, entry=entry).read_records(
+            start=self.start,
+            end=self.end,
+            predicates=self.predicates,
+            fields=self.fields,
+            raw=self.raw,
+        )
+        if self.ordered and not entry.is_sorted:
+            yield from sorted(records, key=_record_time)
+        else:
+            yield from records
+
+    def _open(self, executor: ThreadPoolExecutor, entry: "StreamFileEntry"):
+        return _FileCursor(
+            executor=executor,
+            records=self._file_records(entry),
+            chunk_size=self.read_ahead,
+        )
+
+    def __iter__(self) -> t.Iterator[dict]:
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            cursors: t.List[_FileCursor] = []
+            try:
+                if self.ordered:
+                    yield from self._iter_ordered(executor, cursors)
+                else:
+                    yield from self._iter_unordered(executor, cursors)
+            finally:
+                for cursor in cursors:
+                    cursor.cancel()
+
+    def _iter_unordered(
+        self, executor: ThreadPoolExecutor, cursors: t.List[_FileCursor]
+    ) -> t.Iterator[dict]:
+        """Yield chunks of records from whichever open file is ready first."""
+        pending = deque(self.entries)
+        while pending or cursors:
+            while pending and len(cursors) < self.workers:
+                cursors.append(self._open(executor, pending.popleft()))
+            done, _ = wait(
+                [cursor.future for cursor in cursors if cursor.future is not None],
+                return_when=FIRST_COMPLETED,
+            )
+            for cursor in list(cursors):
+                if cursor.future not in done:
+                    continue
+                yield from cursor.next_chunk()
+                if cursor.future is None:
+                    cursors.remove(cursor)
+
+    def _iter_ordered(
+        self, executor: ThreadPoolExecutor, cursors: t.List[_FileCursor]
+    ) -> t.Iterator[dict]:
+        """Yield records of all files with a k-way merge on time extracted."""
+
+        def source(entry: "StreamFileEntry") -> _MergeSource:
+            def _open() -> t.Iterator[t.Any]:
+                # drop cursors of files already merged
+                cursors[:] = [cursor for cursor in cursors if cursor.future is not None]
+                cursor = self._open(executor, entry)
+                cursors.append(cursor)
+                return iter(cursor)
+
+            return entry.min_time_extracted, _open
+
+        entries = sorted(self.entries, key=lambda entry: entry.min_time_extracted)
+        for group in _overlapping_groups(entries):
+            sources = [source(entry) for entry in group]
+            if len(sources) <= self.max_open_files:
+                yield from _merge(sources)
+                continue
+
+            spill_dir = self._make_spill_dir()
+            try:
+                yield from _merge(self._spill_runs(sources, spill_dir))
+            finally:
+                shutil.rmtree(spill_dir, ignore_errors=True)
+
+    def _make_spill_dir(self) -> Path:
+        merge_dir = self.stream.singerlake.working_dir / MERGE_DIRNAME
+        merge_dir.mkdir(parents=True, exist_ok=True)
+        return Path(tempfile.mkdtemp(dir=merge_dir))
+
+    def _spill_runs(
+        self, sources: t.List[_MergeSource], spill_dir: Path
+    ) -> t.List[_MergeSource]:
+        """Merge sources in batches into sorted runs, until few enough remain."""
+        codec = self.stream.singerlake.codec
+        runs = count()
+        while len(sources) > self.max_open_files:
+            spilled = []
+            for offset in range(0, len(sources), self.max_open_files):
+                path = spill_dir / f"{next(runs)}.jsonl"
+                first_time = None
+                with path.open("wb") as run:
+                    for record in _merge(
+                        sources[offset : offset + self.max_open_files]
+                    ):
+                        if first_time is None:
+                            first_time = _record_time(record)
+                        if isinstance(record, LazyRecord):
+                            line = record.line
+                            run.write(line if line.endswith(b"\n") else line + b"\n")
+                        else:
+                            run.write(codec.dumps_line(record))
+                if first_time is not None:
+                    spilled.append((first_time, self._run_opener(path)))
+            sources = sorted(spilled, key=lambda spilled_source: spilled_source[0])
+        return sources
+
+    def _run_opener(self, path: Path) -> t.Callable[[], t.Iterator[t.Any]]:
+        loads = self.stream.singerlake.codec.loads
+        raw = self.raw
+
+        def _open() -> t.Iterator[t.Any]:
+            with path.open("rb") as run:
+                for line in run:
+                    yield LazyRecord(line, loads) if raw else loads(line)
+
+        return _open
+
+
+def _merge(sources: t.Sequence[_MergeSource]) -> t.Iterator[t.Any]:
+    """Merge sorted sources on time extracted.
+
+    Sources must be sorted by min time extracted. Each is only opened once the
+    merge reaches its min time extracted.
+    """
+    pending = deque(sources)
+    # ties are broken by push order, so records are never compared
+    tiebreak = count()
+    heap: t.List[t.Tuple["datetime", int, t.Any, t.Iterator[t.Any]]] = []
+
+    def push(records: t.Iterator[t.Any]) -> None:
+        record = next(records, None)
+        if record is not None:
+            heapq.heappush(
+                heap, (_record_time(record), next(tiebreak), record, records)
+            )
+
+    while pending or heap:
+        # open every source that may hold a record before the merge frontier
+        while pending and (not heap or pending[0][0] <= heap[0][0]):
+            _, open_source = pending.popleft()
+            push(open_source())
+        if not heap:
+            continue
+        _, _, record, records = heapq.heappop(heap)
+        yield record
+        push(records)
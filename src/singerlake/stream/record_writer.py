@@ -1,71 +1,173 @@
 from __future__ import annotations
 
+import time
 import typing as t
+from collections import OrderedDict
+from datetime import datetime
 from pathlib import Path
 
-from flexdict import FlexDict
-
 import singerlake.singer.utils as su
 from singerlake.store.path_manager import Partition
 
-from .file_writer import SingerFileWriter
+from .file_writer import STAGING_DIRNAME, SingerFile, SingerFileWriter
 
 if t.TYPE_CHECKING:
+    from singerlake.config import RolloverConfig, WriterConfig
+
     from .stream import Stream
 
 
-MAX_RECORD_COUNT = 10000
+DEFAULT_PARTITIONS = (Partition(name="default", value="default"),)
 
 
 class RecordWriter:
-    """Write records to a stream file."""
+    """Write records to a stream file.
+
+    At most `writer.max_open_files` files are kept open at once. When the pool is
+    full, the least recently written partition's file is finalized, and a later
+    record for that partition starts a new file.
+    """
 
     def __init__(self, stream: Stream, output_dir: Path) -> None:
         self.stream = stream
         self.output_dir = output_dir
+        self.staging_dir = output_dir / STAGING_DIRNAME
+        self.staging_dir.mkdir(parents=True, exist_ok=True)
 
-        self.singer_files: list[Path] = []
+        self.singer_files: list[SingerFile] = []
         self.is_finalized = False
-        self._open_files: FlexDict = FlexDict()
+        self._open_files: OrderedDict[t.Tuple[Partition, ...], SingerFileWriter] = (
+            OrderedDict()
+        )
+        self._file_names: set[str] = set()
+        # monotonic time the oldest open file may reach its maximum age
+        self._age_deadline: float | None = None
+
+    @property
+    def rollover(self) -> RolloverConfig:
+        """Return the file rollover config."""
+        return self.stream.singerlake.config.store.rollover
+
+    @property
+    def config(self) -> WriterConfig:
+        """Return the writer config."""
+        return self.stream.singerlake.config.writer
 
     def _finalize_file(self, file: SingerFileWriter) -> None:
-        singer_file = file.close(output_dir=self.output_dir)
+        if self._open_files.get(file.partitions) is file:
+            del self._open_files[file.partitions]
+        singer_file = file.close(
+            output_dir=self.output_dir, reserved_names=self._file_names
+        )
         self.singer_files.append(singer_file)
 
     def _new_file(self, partitions: t.Tuple[Partition, ...]) -> SingerFileWriter:
-        """Return a new file."""
-        open_file = SingerFileWriter(stream=self.stream, partitions=partitions).open()
-        partition_values = [p.value for p in partitions]
-        self._open_files.set(keys=partition_values, value=open_file)
+        """Return a new file, evicting the least recently used file if needed."""
+        max_open_files = self.config.max_open_files
+        while max_open_files and len(self._open_files) >= max_open_files:
+            _, lru_file = self._open_files.popitem(last=False)
+            self._finalize_file(file=lru_file)
+
+        open_file = SingerFileWriter(
+            stream=self.stream, partitions=partitions, rollover=self.rollover
+        ).open(staging_dir=self.staging_dir)
+        self._open_files[partitions] = open_file
+        max_age_seconds = self.rollover.max_age_seconds
+        if max_age_seconds is not None and self._age_deadline is None:
+            self._age_deadline = time.monotonic() + max_age_seconds
         return open_file
 
-    def write(self, schema: dict, record: dict) -> None:
-        """Write a record to the stream."""
+    def _partition_record(self, time_extracted: datetime) -> t.Tuple[Partition, ...]:
+        """Return the partitions of a record, or the default partition."""
+        return self.stream.partition_record(time_extracted) or DEFAULT_PARTITIONS
 
-        # partition the record
-        time_extracted = su.get_time_extracted(record)
-        partitions = self.stream.partition_record(time_extracted) or (
-            Partition(name="default", value="default"),
-        )
-        partition_values = [p.value for p in partitions]
-        open_file = self._open_files.get(partition_values)
-
-        if not open_file or open_file.closed:
-            open_file = self._new_file(partitions)
+    def _get_open_file(
+        self, schema: dict, partitions: t.Tuple[Partition, ...]
+    ) -> SingerFileWriter:
+        """Return an open file with capacity for at least one more record."""
+        open_file = self._open_files.get(partitions)
 
-        if open_file.records_written == MAX_RECORD_COUNT:
+        if open_file is not None and open_file.is_full:
             self._finalize_file(file=open_file)
-            # open a new file
+            open_file = None
+
+        if open_file is None:
             open_file = self._new_file(partitions)
+        else:
+            self._open_files.move_to_end(partitions)
 
         if open_file.records_written == 0:
             # write the stream schema
             open_file.write_schema(schema)
 
-        open_file.write_record(record)
+        return open_file
+
+    def write(self, schema: dict, record: dict) -> None:
+        """Write a record to the stream."""
+        time_extracted = su.get_time_extracted(record)
+        partitions = self._partition_record(time_extracted)
+        open_file = self._get_open_file(schema, partitions)
+        open_file.write_record(record, time_extracted=time_extracted)
+
+        if self._age_deadline is not None:
+            self._finalize_aged_files()
+
+    def write_many(self, schema: dict, records: t.Iterable[dict]) -> None:
+        """Write a batch of records to the stream.
+
+        The batch's partitions are resolved in one vectorized step, each record's
+        time extracted is parsed once, records are grouped by partition and each
+        group is handed to its file writer in one call.
+        """
+        records = list(records)
+        timestamps = [su.get_time_extracted_value(record) for record in records]
+        groups: dict[t.Tuple[Partition, ...], t.Tuple[list, list]] = {}
+        for record, timestamp, partitions in zip(
+            records, timestamps, self.stream.partition_records(timestamps)
+        ):
+            time_extracted = datetime.fromisoformat(timestamp)
+            partitions = partitions or DEFAULT_PARTITIONS
+            group = groups.get(partitions)
+            if group is None:
+                group = groups[partitions] = ([], [])
+            group[0].append(record)
+            group[1].append(time_extracted)
+
+        for partitions, (group_records, group_times) in groups.items():
+            offset = 0
+            while offset < len(group_records):
+                open_file = self._get_open_file(schema, partitions)
+                remaining = open_file.records_remaining
+                stop = len(group_records) if remaining is None else offset + remaining
+                offset += open_file.write_records(
+                    group_records[offset:stop], group_times[offset:stop]
+                )
+
+        if self._age_deadline is not None:
+            self._finalize_aged_files()
+
+    def _finalize_aged_files(self) -> None:
+        """Finalize open files that have reached their maximum age.
+
+        Open files are only scanned once the oldest of them may have reached it.
+        """
+        now = time.monotonic()
+        max_age_seconds = self.rollover.max_age_seconds
+        deadline = self._age_deadline
+        if max_age_seconds is None or deadline is None or now < deadline:
+            return
+
+        self._age_deadline = None
+        for open_file in list(self._open_files.values()):
+            if open_file.is_full:
+                self._finalize_file(file=open_file)
+                continue
+            deadline = now + max_age_seconds - open_file.age
+            if self._age_deadline is None or deadline < self._age_deadline:
+                self._age_deadline = deadline
 
     def finalize(self) -> None:
         """Finalize the stream."""
-        for _, open_file in self._open_files.flatten():
+        for open_file in list(self._open_files.values()):
             self._finalize_file(file=open_file)
         self.is_finalized = True
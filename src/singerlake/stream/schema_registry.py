@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import typing as t
+
+from .file_reader import SingerFileReader
+
+if t.TYPE_CHECKING:
+    from singerlake.store.manifest import SchemaVersion, StreamFileEntry
+
+    from .stream import Stream
+
+
+class SchemaRegistry:
+    """Schema versions of a stream.
+
+    Versions are registered in the Stream Manifest as files are committed. The
+    SCHEMA message of each version is read from one of its files the first time
+    it is needed, and cached; as files are stored by schema hash, a cached
+    schema never goes stale.
+    """
+
+    def __init__(self, stream: "Stream") -> None:
+        self.stream = stream
+        self._schemas: t.Dict[str, dict] = {}
+
+    def versions(self) -> t.List["SchemaVersion"]:
+        """Return the stream's schema versions, in first observed order."""
+        return self.stream.singerlake.store.get_stream_schema_versions(
+            tap_id=self.stream.tap.tap_id, stream_id=self.stream.stream_id
+        )
+
+    def get_schema(
+        self, schema_hash: str, entry: "StreamFileEntry" | None = None
+    ) -> dict:
+        """Return the SCHEMA message of a schema version.
+
+        Args:
+            schema_hash: Schema hash of the version.
+            entry: A committed file of the version, to read the schema from if
+                it isn't cached. Found by planning the stream's files if None.
+
+        Raises:
+            ValueError: If the stream has no committed file of the version.
+        """
+        if schema_hash not in self._schemas:
+            if entry is None:
+                entry = next(
+                    (
+                        entry
+                        for entry in self.stream.singerlake.store.plan_stream_files(
+                            tap_id=self.stream.tap.tap_id,
+                            stream_id=self.stream.stream_id,
+                        )
+                        if entry.schema_hash == schema_hash
+                    ),
+                    None,
+                )
+                if entry is None:
+                    raise ValueError(f"No committed files of schema {schema_hash}.")
+            self._schemas[schema_hash] = SingerFileReader(
+                stream=self.stream, entry=entry
+            ).read_schema()
+        return self._schemas[schema_hash]
+
+    def get_latest_schema(self) -> dict | None:
+        """Return the SCHEMA message of the last observed version, if any."""
+        versions = self.versions()
+        if not versions:
+            return None
+        return self.get_schema(versions[-1].schema_hash)
+
+    def upcaster(
+        self, fields: t.Sequence[str] | None = None
+    ) -> t.Callable[[dict], dict]:
+        """Return a function upcasting RECORD messages to the latest schema.
+
+        Properties of the latest schema a record doesn't have are set to None;
+        other fields are kept as they are.
+
+        Args:
+            fields: Fields messages are projected to. Only these properties
+                are added.
+        """
+        latest_schema = self.get_latest_schema()
+        properties = (
+            []
+            if latest_schema is None
+            else list(latest_schema.get("schema", {}).get("properties", {}))
+        )
+        if fields is not None:
+            properties = [field for field in properties if field in fields]
+
+        def _upcast(message: dict) -> dict:
+            record = message["record"]
+            for name in properties:
+                if name not in record:
+                    record[name] = None
+            return message
+
+        return _upcast
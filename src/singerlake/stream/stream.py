@@ -1,13 +1,30 @@
+from __future__ import annotations
+
 import typing as t
 from contextlib import contextmanager
 
+import singerlake.singer.utils as su
+from singerlake.singer.lazy import project_message
+from singerlake.store.base import CommitError
+from singerlake.store.zone_map import Predicate, parse_predicates
+
+from .dedupe import DEDUPE_DIRNAME, Deduplicator
+from .file_reader import SingerFileReader
 from .file_writer import SingerFile
+from .ingest import ingest_file
+from .parallel_reader import ParallelReader
 from .record_writer import RecordWriter
+from .schema_registry import SchemaRegistry
+from .threaded_writer import ThreadedRecordWriter
 
 if t.TYPE_CHECKING:
     from datetime import datetime
+    from pathlib import Path
 
     from singerlake import Singerlake
+    from singerlake.compaction import CompactionResult
+    from singerlake.store.base import CommitResult
+    from singerlake.store.manifest import StreamFileEntry
     from singerlake.store.path_manager.base import Partition
     from singerlake.tap import Tap
 
@@ -18,6 +35,7 @@ class Stream:
     Responsible for:
     - writing records to files on disk
     - committing files to storage
+    - reading committed records back from storage
     """
 
     def __init__(
@@ -31,24 +49,282 @@ class Stream:
         self.stream_id = stream_id
 
         self.files: list[SingerFile] = []
+        self._schema_registry: SchemaRegistry | None = None
+
+    @property
+    def schema_registry(self) -> SchemaRegistry:
+        """Return the registry of this stream's schema versions."""
+        if self._schema_registry is None:
+            self._schema_registry = SchemaRegistry(stream=self)
+        return self._schema_registry
 
     def partition_record(self, time_extracted: "datetime") -> t.Tuple["Partition", ...]:
         """Partition a record."""
         return self.singerlake.store.path_manager.get_record_partitions(time_extracted)
 
+    def partition_records(
+        self, timestamps: t.Sequence[str]
+    ) -> t.List[t.Tuple["Partition", ...]]:
+        """Partition a batch of records by their ISO 8601 time extracted."""
+        return self.singerlake.store.path_manager.get_records_partitions(timestamps)
+
     @contextmanager
-    def record_writer(self):
-        """Create a record writer for this stream."""
-        writer = RecordWriter(
+    def record_writer(self, threaded: bool | None = None):
+        """Create a record writer for this stream.
+
+        Args:
+            threaded: Write records on a background thread. Defaults to the
+                `writer.threaded` config.
+        """
+        config = self.singerlake.config.writer
+        record_writer = RecordWriter(
             stream=self,
             output_dir=self.singerlake.working_dir,
         )
+        writer: RecordWriter | ThreadedRecordWriter = record_writer
+        if config.threaded if threaded is None else threaded:
+            writer = ThreadedRecordWriter(
+                record_writer=record_writer,
+                batch_size=config.thread_batch_size,
+                queue_size=config.thread_queue_size,
+            )
         try:
             yield writer
         finally:
             writer.finalize()
             self.files.extend(writer.singer_files)
 
-    def commit(self):
-        """Commit stream files to storage."""
-        self.singerlake.store.commit_stream_files(stream_files=self.files)
+    def ingest_file(
+        self, input_path: Path, processes: int | None = None
+    ) -> list[SingerFile]:
+        """Write this stream's records from a Singer JSONL file in parallel.
+
+        The file is sharded by byte range across a pool of processes, and the
+        resulting files are added to this stream's files for a single commit.
+
+        Args:
+            input_path: Singer JSONL file.
+            processes: Number of worker processes. Defaults to the CPU count.
+        """
+        singer_files = ingest_file(
+            stream=self, input_path=input_path, processes=processes
+        )
+        self.files.extend(singer_files)
+        return singer_files
+
+    def read_records(
+        self,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        workers: int | None = None,
+        ordered: bool = False,
+        read_ahead: int = 1000,
+        dedupe: bool = False,
+        filters: t.Iterable[t.Sequence[t.Any]] | None = None,
+        fields: t.Sequence[str] | None = None,
+        raw: bool = False,
+        upcast: bool = False,
+    ) -> t.Iterator[t.Any]:
+        """Read committed RECORD messages with time extracted in [start, end).
+
+        Only files overlapping the range are read, chosen from the Stream Manifest
+        or by listing overlapping partitions. Records of all schema versions are
+        read, one version after another in first observed order. By default
+        records are yielded lazily, one file at a time.
+
+        Args:
+            start: Inclusive lower bound of time extracted, or None.
+            end: Exclusive upper bound of time extracted, or None.
+            workers: Number of threads decoding files concurrently. Files are
+                read serially if None and not ordered.
+            ordered: Yield records sorted by time extracted across all files.
+            read_ahead: Number of records decoded ahead of the reader per open
+                file, when reading in parallel.
+            dedupe: Yield only the latest version, by time extracted, of each
+                primary key in the range. Keys are the SCHEMA `key_properties`,
+                and the files are read twice.
+            filters: (field, op, value) predicates on top-level record fields
+                that records must all satisfy, with op one of `==`, `!=`, `<`,
+                `<=`, `>`, `>=` or `in`. Files whose zone maps rule out a
+                predicate are skipped without being read.
+            fields: Record fields to project messages to. Only these fields
+                are decoded from each line, and the message keeps its time
+                extracted.
+            raw: Yield `LazyRecord` views of the undecoded lines, which decode
+                record fields only as they are accessed.
+            upcast: Upcast records of every schema version to the latest
+                version, setting properties they don't have to None.
+        """
+        records = self._read_records(
+            start, end, workers, ordered, read_ahead, dedupe, filters, fields, raw
+        )
+        if not upcast:
+            yield from records
+            return
+
+        if raw:
+            raise ValueError("Raw reads can't be upcast.")
+        upcast_message = self.schema_registry.upcaster(fields)
+        for message in records:
+            yield upcast_message(message)
+
+    def _read_records(
+        self,
+        start: datetime | None,
+        end: datetime | None,
+        workers: int | None,
+        ordered: bool,
+        read_ahead: int,
+        dedupe: bool,
+        filters: t.Iterable[t.Sequence[t.Any]] | None,
+        fields: t.Sequence[str] | None,
+        raw: bool,
+    ) -> t.Iterator[t.Any]:
+        """Read committed RECORD messages, see `read_records`."""
+        start = None if start is None else su.naive_time(start)
+        end = None if end is None else su.naive_time(end)
+        predicates = parse_predicates(filters)
+        if not dedupe:
+            entries = self.singerlake.store.plan_stream_files(
+                tap_id=self.tap.tap_id,
+                stream_id=self.stream_id,
+                start=start,
+                end=end,
+                predicates=predicates,
+            )
+            yield from self._read_entries(
+                entries,
+                start,
+                end,
+                workers,
+                ordered,
+                read_ahead,
+                predicates,
+                fields=fields,
+                raw=raw,
+            )
+            return
+
+        if workers is not None and not ordered:
+            raise ValueError("Deduplicated parallel reads must be ordered.")
+        if raw:
+            raise ValueError("Deduplicated reads can't be raw.")
+        # filter the latest versions, rather than deduplicate filtered records
+        planned = list(
+            self.singerlake.store.plan_stream_files(
+                tap_id=self.tap.tap_id, stream_id=self.stream_id, start=start, end=end
+            )
+        )
+        deduplicator = Deduplicator(
+            key_properties=self._get_key_properties(planned),
+            dumps=self.singerlake.codec.dumps,
+            working_dir=self.singerlake.working_dir / DEDUPE_DIRNAME,
+        )
+        for message in deduplicator.dedupe(
+            lambda: self._read_entries(
+                planned, start, end, workers, ordered, read_ahead
+            )
+        ):
+            if all(predicate.matches(message["record"]) for predicate in predicates):
+                yield message if fields is None else project_message(message, fields)
+
+    def _read_entries(
+        self,
+        entries: t.Iterable["StreamFileEntry"],
+        start: datetime | None,
+        end: datetime | None,
+        workers: int | None,
+        ordered: bool,
+        read_ahead: int,
+        predicates: t.Sequence[Predicate] = (),
+        fields: t.Sequence[str] | None = None,
+        raw: bool = False,
+    ) -> t.Iterator[t.Any]:
+        """Read the records of committed files, serially or in parallel."""
+        if workers is None and not ordered:
+            for entry in entries:
+                yield from SingerFileReader(stream=self, entry=entry).read_records(
+                    start=start, end=end, predicates=predicates, fields=fields, raw=raw
+                )
+            return
+
+        yield from ParallelReader(
+            stream=self,
+            entries=entries,
+            start=start,
+            end=end,
+            workers=workers or 1,
+            read_ahead=read_ahead,
+            ordered=ordered,
+            predicates=predicates,
+            fields=fields,
+            raw=raw,
+        )
+
+    def _get_key_properties(self, entries: t.Sequence["StreamFileEntry"]) -> list:
+        """Return the SCHEMA key properties shared by committed files.
+
+        Raises:
+            ValueError: If schema versions of the files have different keys.
+        """
+        key_properties_by_hash: t.Dict[str, list] = {}
+        for entry in entries:
+            if entry.schema_hash not in key_properties_by_hash:
+                schema = self.schema_registry.get_schema(entry.schema_hash, entry)
+                key_properties_by_hash[entry.schema_hash] = list(
+                    schema.get("key_properties") or []
+                )
+        key_properties = {
+            tuple(key_properties) for key_properties in key_properties_by_hash.values()
+        }
+        if len(key_properties) > 1:
+            raise ValueError("Schema versions have different key properties.")
+        return list(key_properties.pop()) if key_properties else []
+
+    def export_parquet(
+        self,
+        output_dir: Path,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        batch_size: int = 10000,
+    ) -> t.List[Path]:
+        """Export committed files overlapping [start, end) to Parquet.
+
+        The Parquet files mirror the stream's schema hash and partition layout
+        below `{output_dir}/{tap_id}/{stream_id}`. Requires the 'parquet' extra.
+
+        Args:
+            output_dir: Root directory of the exported files.
+            start: Inclusive lower bound of time extracted, or None.
+            end: Exclusive upper bound of time extracted, or None.
+            batch_size: Number of records converted per Parquet row group.
+
+        Returns:
+            The paths of the Parquet files written.
+        """
+        from singerlake.export import ParquetExporter
+
+        return ParquetExporter(
+            stream=self, output_dir=output_dir, batch_size=batch_size
+        ).export(start=start, end=end)
+
+    def compact(self) -> t.List["CompactionResult"]:
+        """Merge small committed files into target-sized files.
+
+        See `CompactionService` and the `compaction` config.
+        """
+        from singerlake.compaction import CompactionService
+
+        return CompactionService(singerlake=self.singerlake).compact_stream(self)
+
+    def commit(self) -> t.List["CommitResult"]:
+        """Commit stream files to storage.
+
+        Raises:
+            CommitError: If any stream file failed to commit.
+            CommitConflict: If a concurrent commit touched the same files.
+        """
+        results = self.singerlake.store.commit_stream_files(stream_files=self.files)
+        if not all(result.success for result in results):
+            raise CommitError(results)
+        return results
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import queue
+import threading
+import typing as t
+
+if t.TYPE_CHECKING:
+    from singerlake.stream.file_writer import SingerFile
+
+    from .record_writer import RecordWriter
+
+
+class ThreadedRecordWriter:
+    """Write records to a stream on a background thread.
+
+    Records are collected into batches and passed through a bounded queue to a
+    thread that runs `RecordWriter.write_many`, so partitioning, serialization
+    and disk I/O overlap with the caller reading messages. A full queue blocks
+    the caller (backpressure). Errors raised on the writer thread are re-raised
+    in the caller on the next write, or on `finalize()`.
+    """
+
+    def __init__(
+        self,
+        record_writer: "RecordWriter",
+        batch_size: int = 1000,
+        queue_size: int = 8,
+    ) -> None:
+        self.record_writer = record_writer
+        self.batch_size = batch_size
+
+        self._queue: queue.Queue[t.Tuple[dict, t.List[dict]] | None] = queue.Queue(
+            maxsize=queue_size
+        )
+        self._schema: dict | None = None
+        self._batch: list[dict] = []
+        self._error: BaseException | None = None
+        self._thread = threading.Thread(
+            target=self._run, name="singerlake-record-writer", daemon=True
+        )
+        self._thread.start()
+
+    @property
+    def singer_files(self) -> list["SingerFile"]:
+        """Return the finalized singer files."""
+        return self.record_writer.singer_files
+
+    @property
+    def is_finalized(self) -> bool:
+        """Return True if the writer has been finalized."""
+        return self.record_writer.is_finalized
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            if self._error is not None:
+                # keep draining so the producer never blocks on a dead writer
+                continue
+            try:
+                self.record_writer.write_many(*item)
+            except BaseException as ex:  # noqa: BLE001
+                self._error = ex
+
+    def _raise_error(self) -> None:
+        if self._error is not None:
+            raise self._error
+
+    def _put_batch(self) -> None:
+        if self._batch:
+            # records are only batched once a schema has been written
+            assert self._schema is not None
+            self._queue.put((self._schema, self._batch))
+            self._batch = []
+
+    def write(self, schema: dict, record: dict) -> None:
+        """Queue a record to be written to the stream."""
+        self._raise_error()
+        if schema is not self._schema:
+            self._put_batch()
+            self._schema = schema
+        self._batch.append(record)
+        if len(self._batch) >= self.batch_size:
+            self._put_batch()
+
+    def write_many(self, schema: dict, records: t.Iterable[dict]) -> None:
+        """Queue a batch of records to be written to the stream."""
+        self._raise_error()
+        self._put_batch()
+        self._schema = schema
+        self._queue.put((schema, list(records)))
+
+    def finalize(self) -> None:
+        """Flush queued records, stop the writer thread and finalize the stream."""
+        try:
+            if self._thread.is_alive():
+                self._put_batch()
+                self._queue.put(None)
+                self._thread.join()
+        finally:
+            if not self.record_writer.is_finalized:
+                self.record_writer.finalize()
+        self._raise_error()
@@ -87,3 +87,24 @@ def write_singerlake(write_singerlake_config: dict):
     yield singerlake
     singerlake.clean_working_dir()
     _clean_lake_dir(lake_root, {"lake_id": "merry-lizard"})
+
+
+@pytest.fixture()
+def tmp_singerlake_config(tmp_path: Path):
+    """Config for an empty, writable lake in a temporary directory."""
+    lake_root = tmp_path / "lake"
+    lake_root.mkdir()
+    _clean_lake_dir(lake_root, {"lake_id": "tmp-lake"})
+    return {
+        "store": {
+            "store_type": "local",
+            "path": {
+                "path_type": "hive",
+                "lake_root": {"segments": lake_root.parts},
+            },
+            "lock": {
+                "lock_type": "local",
+            },
+        },
+        "working_dir": {"segments": (tmp_path / "working").parts},
+    }
@@ -0,0 +1,32 @@
+import pytest
+
+from singerlake.singer.codec import CODECS, StdlibJSONCodec, get_codec
+
+
+@pytest.mark.parametrize("name", sorted(CODECS))
+def test_codec_roundtrip(name):
+    try:
+        codec = get_codec(name)
+    except ImportError:
+        pytest.skip(f"{name} is not installed")
+
+    message = {"type": "RECORD", "stream": "region", "record": {"name": "Zürich"}}
+    line = codec.dumps_line(message)
+    assert line.endswith(b"\n")
+    assert "Zürich".encode("utf-8") in line
+    assert codec.loads(line) == message
+
+
+def test_codec_auto():
+    assert get_codec("auto").name in CODECS
+
+
+def test_orjson_codec_fallback():
+    try:
+        codec = get_codec("orjson")
+    except ImportError:
+        pytest.skip("orjson is not installed")
+
+    # integers wider than 64 bits are handled by the stdlib fallback
+    message = {"value": 2**70}
+    assert codec.dumps(message) == StdlibJSONCodec().dumps(message)
@@ -0,0 +1,180 @@
+import shutil
+from pathlib import Path
+
+import pytest
+
+from singerlake import Singerlake
+from singerlake.compaction.compaction_service import CompactionService
+from singerlake.store import CommitConflict
+from tests.utils import TestStreamWriter, write_record_versions
+
+INPUTS_DIR = Path.cwd() / "tests" / "data" / "test_inputs"
+
+
+def _key(record):
+    return record["record"]["_sdc_extracted_at"], record["record"]["id"]
+
+
+@pytest.fixture
+def small_files_singerlake(tmp_singerlake_config):
+    tmp_singerlake_config["store"]["rollover"] = {"max_records": 50}
+    singerlake = Singerlake(config=tmp_singerlake_config)
+    stream = singerlake.get_tap("tap-carbon-intensity").get_stream("entry")
+    TestStreamWriter(INPUTS_DIR / "entry.jsonl").write_messages_to_stream(stream)
+    stream.commit()
+    return singerlake
+
+
+def _stream_files(singerlake):
+    stream_dir = singerlake.store.path_manager.get_stream_relative_path(
+        "tap-carbon-intensity", "entry", ""
+    )
+    return sorted(path.name for path in stream_dir.rglob("*.singer"))
+
+
+def test_compact_stream(small_files_singerlake):
+    singerlake = small_files_singerlake
+    stream = singerlake.get_tap("tap-carbon-intensity").get_stream("entry")
+    records = sorted(stream.read_records(), key=_key)
+    assert len(_stream_files(singerlake)) == 18
+
+    (result,) = stream.compact()
+    assert len(result.removed) == 17
+    (merged,) = result.added
+    assert merged.record_count == 822
+    assert [partition.value for partition in result.partitions] == [2023, 9, 20, 14]
+
+    # the 2020 partition holds a single file, so is left alone
+    files = _stream_files(singerlake)
+    assert len(files) == 2
+    assert merged.name in files
+    manifest = singerlake.store.get_stream_manifest("tap-carbon-intensity", "entry")
+    assert sorted(entry.path.rsplit("/", 1)[-1] for entry in manifest.files) == files
+
+    assert sorted(stream.read_records(), key=_key) == records
+    assert stream.compact() == []
+
+
+def test_compact_stream_max_files(small_files_singerlake):
+    singerlake = small_files_singerlake
+    singerlake.config.compaction.max_files = 5
+    stream = singerlake.get_tap("tap-carbon-intensity").get_stream("entry")
+    records = sorted(stream.read_records(), key=_key)
+
+    results = stream.compact()
+    assert [len(result.removed) for result in results] == [5, 5, 5, 2]
+    files = _stream_files(singerlake)
+    assert len(files) == 5
+    assert sorted(stream.read_records(), key=_key) == records
+
+
+def test_compact_stream_target_size(small_files_singerlake):
+    singerlake = small_files_singerlake
+    singerlake.config.compaction.target_file_bytes = 100_000
+    singerlake.config.compaction.small_file_bytes = 50_000
+    stream = singerlake.get_tap("tap-carbon-intensity").get_stream("entry")
+    records = sorted(stream.read_records(), key=_key)
+
+    (result,) = stream.compact()
+    assert len(result.added) > 1
+    assert all(singer_file.size_bytes >= 100_000 for singer_file in result.added[:-1])
+    assert sorted(stream.read_records(), key=_key) == records
+
+
+def test_compact_compressed_stream_settles(tmp_singerlake_config):
+    tmp_singerlake_config["store"]["rollover"] = {"max_records": 50}
+    tmp_singerlake_config["writer"] = {"compression": "gz"}
+    tmp_singerlake_config["compaction"] = {"target_file_bytes": 100_000}
+    singerlake = Singerlake(config=tmp_singerlake_config)
+    stream = singerlake.get_tap("tap-carbon-intensity").get_stream("entry")
+    TestStreamWriter(INPUTS_DIR / "entry.jsonl").write_messages_to_stream(stream)
+    stream.commit()
+
+    # merged files are small when compressed, but not by uncompressed size
+    (result,) = stream.compact()
+    assert len(result.added) > 2
+    assert all(
+        singer_file.size_bytes < 50_000 <= singer_file.uncompressed_bytes
+        for singer_file in result.added[:-1]
+    )
+    assert stream.compact() == []
+    assert len(list(stream.read_records())) == 833
+
+
+def test_compact_stream_commit_failure(small_files_singerlake, monkeypatch):
+    singerlake = small_files_singerlake
+    stream = singerlake.get_tap("tap-carbon-intensity").get_stream("entry")
+    files = _stream_files(singerlake)
+    store = singerlake.store
+    commit_stream_file = store.commit_stream_file
+    calls = []
+
+    def _commit_stream_file(stream_file, path):
+        calls.append(stream_file)
+        if len(calls) > 1:
+            raise OSError("disk full")
+        commit_stream_file(stream_file=stream_file, path=path)
+
+    singerlake.config.compaction.target_file_bytes = 100_000
+    monkeypatch.setattr(store, "commit_stream_file", _commit_stream_file)
+    with pytest.raises(Exception, match="disk full|failed"):
+        stream.compact()
+    assert _stream_files(singerlake) == files
+
+
+def test_compact_stream_without_log(small_files_singerlake):
+    singerlake = small_files_singerlake
+    store = singerlake.store
+    shutil.rmtree(
+        store.path_manager.get_stream_log_path("tap-carbon-intensity", "entry", "")
+    )
+    store.manifest_cache.invalidate()
+    stream = singerlake.get_tap("tap-carbon-intensity").get_stream("entry")
+
+    # listed files are imported as the version the compaction was planned from
+    assert stream.compact()
+    assert len(_stream_files(singerlake)) < 18
+    assert len(list(stream.read_records())) == 833
+
+
+def test_compact_stream_concurrent_removal(
+    small_files_singerlake, tmp_singerlake_config, monkeypatch
+):
+    singerlake = small_files_singerlake
+    other = Singerlake(config=tmp_singerlake_config)
+    stream = singerlake.get_tap("tap-carbon-intensity").get_stream("entry")
+    files = _stream_files(singerlake)
+    write_merged = CompactionService._write_merged
+    removed = []
+
+    def _write_merged(self, stream, task, output_dir):
+        singer_files = write_merged(self, stream, task, output_dir)
+        # another instance removes an original after it was merged
+        removed.append(task.entries[0])
+        other.store.remove_stream_files(
+            "tap-carbon-intensity", "entry", [task.entries[0].path]
+        )
+        return singer_files
+
+    monkeypatch.setattr(CompactionService, "_write_merged", _write_merged)
+    with pytest.raises(CommitConflict):
+        stream.compact()
+    (entry,) = removed
+    assert len(_stream_files(singerlake)) == len(files) - 1
+    assert len(list(stream.read_records())) == 833 - entry.record_count
+
+
+def test_compact_stream_dedupe(tmp_singerlake_config):
+    tmp_singerlake_config["store"]["rollover"] = {"max_records": 10}
+    tmp_singerlake_config["compaction"] = {"dedupe": True}
+    singerlake = Singerlake(config=tmp_singerlake_config)
+    stream = singerlake.get_tap("tap-carbon-intensity").get_stream("entry")
+    write_record_versions(stream)
+    stream.commit()
+
+    (result,) = stream.compact()
+    assert len(result.removed) == 6
+    (merged,) = result.added
+    assert merged.record_count == 30
+    records = list(stream.read_records())
+    assert {record["record"]["forecast"] for record in records} == {1}
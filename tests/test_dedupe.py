@@ -0,0 +1,56 @@
+import numpy as np
+
+from singerlake.stream.dedupe import Deduplicator, KeyIndex
+
+
+def _records(count, versions):
+    return [
+        {
+            "type": "RECORD",
+            "record": {"id": position % count, "version": position // count},
+            "time_extracted": f"2023-09-20T14:{position // count:02d}:00",
+        }
+        for position in range(count * versions)
+    ]
+
+
+def test_key_index_latest_wins():
+    index = KeyIndex()
+    for key_hash, time_extracted in [(1, 10), (2, 10), (1, 20), (2, 5), (1, 20)]:
+        index.add(key_hash, time_extracted)
+    # ties on time extracted go to the later record
+    assert index.latest().tolist() == [False, True, False, False, True]
+
+
+def test_key_index_spill(tmp_path):
+    rng = np.random.default_rng(0)
+    hashes = rng.integers(0, 500, size=5000, dtype="uint64")
+    times = rng.integers(0, 50, size=5000)
+
+    in_memory = KeyIndex()
+    spilled = KeyIndex(spill_dir=tmp_path, max_memory_keys=256, spill_buckets=8)
+    for key_hash, time_extracted in zip(hashes.tolist(), times.tolist()):
+        in_memory.add(key_hash, time_extracted)
+        spilled.add(key_hash, time_extracted)
+
+    assert list(tmp_path.glob("*.keys"))
+    assert (spilled.latest() == in_memory.latest()).all()
+    assert in_memory.latest().sum() == len(np.unique(hashes))
+
+
+def test_deduplicator(tmp_path):
+    records = _records(count=100, versions=3)
+    deduplicator = Deduplicator(
+        key_properties=["id"],
+        dumps=lambda value: repr(value).encode(),
+        working_dir=tmp_path,
+        max_memory_keys=64,
+    )
+    deduped = list(deduplicator.dedupe(lambda: iter(records)))
+    assert deduped == records[-100:]
+    # spill files are cleaned up
+    assert not list(tmp_path.iterdir())
+
+    # without key properties, every record is kept
+    deduplicator.key_properties = []
+    assert list(deduplicator.dedupe(lambda: iter(records))) == records
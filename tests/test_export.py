@@ -0,0 +1,75 @@
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+
+from singerlake import Singerlake
+from tests.utils import TestStreamWriter
+
+pq = pytest.importorskip("pyarrow.parquet")
+
+from singerlake.export.parquet import json_schema_to_arrow_schema  # noqa: E402
+
+INPUTS_DIR = Path.cwd() / "tests" / "data" / "test_inputs"
+
+
+def test_json_schema_to_arrow_schema():
+    import pyarrow as pa
+
+    schema, converter = json_schema_to_arrow_schema(
+        {
+            "type": "object",
+            "properties": {
+                "id": {"type": "integer"},
+                "at": {"type": ["null", "string"], "format": "date-time"},
+                "tags": {"type": "array", "items": {"type": "string"}},
+                "nested": {
+                    "type": "object",
+                    "properties": {"perc": {"type": ["null", "number"]}},
+                },
+                "any": {"anyOf": [{"type": "string"}, {"type": "integer"}]},
+            },
+        },
+        dumps=str,
+    )
+    assert schema.field("id").type == pa.int64()
+    assert schema.field("at").type == pa.timestamp("us", tz="UTC")
+    assert schema.field("tags").type == pa.list_(pa.string())
+    assert schema.field("nested").type == pa.struct([("perc", pa.float64())])
+    assert schema.field("any").type == pa.string()
+    assert converter({"at": "2023-09-20T14:01Z", "nested": {"perc": 1}, "any": 2}) == {
+        "at": datetime(2023, 9, 20, 14, 1, tzinfo=timezone.utc),
+        "nested": {"perc": 1.0},
+        "any": "2",
+    }
+
+
+@pytest.mark.parametrize("compression", ["none", "gz"])
+def test_export_parquet(tmp_singerlake_config, tmp_path, compression):
+    tmp_singerlake_config["writer"] = {"compression": compression}
+    singerlake = Singerlake(config=tmp_singerlake_config)
+    stream = singerlake.get_tap("tap-carbon-intensity").get_stream("entry")
+    TestStreamWriter(INPUTS_DIR / "entry.jsonl").write_messages_to_stream(stream)
+    stream.commit()
+
+    output_dir = tmp_path / "parquet"
+    paths = stream.export_parquet(output_dir, batch_size=100)
+    assert len(paths) == 2
+    relative_paths = [
+        path.relative_to(output_dir / "tap-carbon-intensity" / "entry").parts
+        for path in paths
+    ]
+    assert relative_paths[0][1:-1] == ("year=2020", "month=8", "day=19", "hour=13")
+    assert all(path.suffix == ".parquet" for path in paths)
+
+    table = pq.read_table(paths[-1])
+    assert table.num_rows == 822
+    assert table.schema.field("forecast").type.bit_width == 64
+    assert table.column("id").to_pylist() == [
+        record["record"]["id"]
+        for record in stream.read_records(start=datetime(2023, 1, 1))
+    ]
+    assert pq.ParquetFile(paths[-1]).num_row_groups == 9
+
+    # only files overlapping the range are exported
+    assert stream.export_parquet(output_dir, end=datetime(2021, 1, 1)) == paths[:1]
@@ -0,0 +1,63 @@
+import json
+from datetime import datetime
+
+import pytest
+
+from singerlake.singer.lazy import LazyRecord
+
+MESSAGE = {
+    "type": "RECORD",
+    "stream": "crm",
+    "record": {
+        "nested": {"id": 1, "text": '"id": 5'},
+        'quoted"id': 2,
+        "items": [{"id": 3}],
+        "id": 4,
+        "é": "ü",
+        "empty": None,
+    },
+    "id": 9,
+    "time_extracted": "2023-09-20T14:01:56",
+}
+
+
+@pytest.mark.parametrize("ensure_ascii", [True, False])
+@pytest.mark.parametrize("separators", [(", ", ": "), (",", ":")])
+def test_lazy_record(ensure_ascii, separators):
+    line = json.dumps(MESSAGE, ensure_ascii=ensure_ascii, separators=separators)
+    record = LazyRecord(line.encode())
+
+    # only top-level record fields match
+    assert record["id"] == 4
+    assert record["nested"] == MESSAGE["record"]["nested"]
+    assert record["é"] == "ü"
+    assert record.get("text") is None
+    assert "empty" in record
+    assert "missing" not in record
+    with pytest.raises(KeyError):
+        record["missing"]
+    assert record.time_extracted == datetime(2023, 9, 20, 14, 1, 56)
+    assert record.project(["id", "é", "missing"]) == {
+        "type": "RECORD",
+        "stream": "crm",
+        "record": {"id": 4, "é": "ü"},
+        "time_extracted": "2023-09-20T14:01:56",
+    }
+    assert record.message == MESSAGE
+
+
+def test_lazy_record_time_extracted_fallback():
+    record = LazyRecord(
+        b'{"type": "RECORD", "record": {"_sdc_extracted_at": "2020-08-19T13:01:56"}}'
+    )
+    assert record.time_extracted == datetime(2020, 8, 19, 13, 1, 56)
+    with pytest.raises(ValueError, match="time_extracted"):
+        LazyRecord(b'{"type": "RECORD", "record": {}}').time_extracted
+
+
+def test_lazy_record_skips_later_objects():
+    record = LazyRecord(b'{"type":"RECORD","record":{"a":1},"meta":{"id":3}}')
+    assert record.get("id") is None
+    assert record["a"] == 1
+    record = LazyRecord(b'{"type":"RECORD","record":{"a":[1]},"id":3}')
+    assert "id" not in record
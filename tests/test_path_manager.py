@@ -0,0 +1,124 @@
+import json
+import sys
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from singerlake.config import PartitionBy, PathConfig
+from singerlake.store.path_manager import (
+    BasePathManager,
+    Partition,
+    PartitionResolver,
+)
+from singerlake.store.path_manager.partition import (
+    PARTITION_CACHE_SIZE,
+    partition_interval,
+)
+
+
+def test_partition_resolver_buckets():
+    resolver = PartitionResolver(
+        [PartitionBy(by="year"), PartitionBy(by="month"), PartitionBy(by="day")]
+    )
+    first = resolver.resolve(datetime(2023, 9, 20, 14, 1, 56, 245769))
+    second = resolver.resolve(
+        datetime(2023, 9, 20, 23, 59, 59, tzinfo=timezone(timedelta(hours=1)))
+    )
+    assert first == (
+        Partition(name="year", value=2023),
+        Partition(name="month", value=9),
+        Partition(name="day", value=20),
+    )
+    # same bucket returns the same cached tuple
+    assert first is second
+
+
+def test_partition_resolver_resolve_many():
+    resolver = PartitionResolver([PartitionBy(by="day"), PartitionBy(by="hour")])
+    timestamps = [
+        "2023-09-20T14:01:56.245769",
+        "2020-08-19T13:01:56",
+        "2023-09-20 14:59:00+01:00",
+        "2023-09-20T15:00:00Z",
+    ]
+    expected = [
+        resolver.resolve(datetime.fromisoformat(timestamp.replace("Z", "+00:00")))
+        for timestamp in timestamps
+    ]
+    resolved = resolver.resolve_many(timestamps)
+    assert resolved == expected
+    assert resolved[0] is resolved[2]
+    assert PartitionResolver([]).resolve_many(timestamps) == [()] * 4
+
+
+@pytest.mark.skipif(
+    sys.version_info < (3, 11), reason="basic format parsing requires Python 3.11"
+)
+def test_partition_resolver_resolve_many_basic_format():
+    resolver = PartitionResolver([PartitionBy(by="day"), PartitionBy(by="hour")])
+    assert resolver.resolve_many(["20230920T140156", "2023-09-20T15:00:00"]) == [
+        (Partition(name="day", value=20), Partition(name="hour", value=14)),
+        (Partition(name="day", value=20), Partition(name="hour", value=15)),
+    ]
+
+
+def test_partition_resolver_cache_size():
+    resolver = PartitionResolver([PartitionBy(by="second")])
+    first = datetime(2023, 9, 20)
+    partitions = resolver.resolve(first)
+    for second in range(1, PARTITION_CACHE_SIZE + 1):
+        resolver.resolve(first + timedelta(seconds=second))
+    # least recently used buckets are evicted
+    assert len(resolver._cache) == PARTITION_CACHE_SIZE
+    assert first not in resolver._cache
+    assert resolver.resolve(first) == partitions
+
+
+def test_partition_interval():
+    assert partition_interval(
+        (Partition(name="year", value=2023), Partition(name="month", value=12))
+    ) == (datetime(2023, 12, 1), datetime(2024, 1, 1))
+    assert partition_interval(
+        (
+            Partition(name="year", value=2023),
+            Partition(name="month", value=9),
+            Partition(name="day", value=20),
+            Partition(name="hour", value=14),
+        )
+    ) == (datetime(2023, 9, 20, 14), datetime(2023, 9, 20, 15))
+    # non-hierarchical partitions don't map to a single interval
+    assert partition_interval((Partition(name="hour", value=14),)) is None
+
+
+def test_parse_stream_file_name():
+    parsed = BasePathManager.parse_stream_file_name(
+        "my-stream-20230920T140156Z-20230920T150000Z-2.singer.gz"
+    )
+    assert parsed == (
+        "my-stream",
+        datetime(2023, 9, 20, 14, 1, 56),
+        datetime(2023, 9, 20, 15),
+        2,
+        "gz",
+    )
+    assert BasePathManager.parse_stream_file_name("manifest.json") is None
+
+
+def test_hash_stream_schema_memoized(monkeypatch):
+    path_manager = BasePathManager(
+        PathConfig(lake_root={"segments": ("lake",), "relative": True})
+    )
+    schema = {"type": "SCHEMA", "stream": "entry", "schema": {"properties": {}}}
+    schema_hash = path_manager.hash_stream_schema(schema)
+
+    calls = []
+    dumps = json.dumps
+    monkeypatch.setattr(
+        "singerlake.store.path_manager.base.json.dumps",
+        lambda *args, **kwargs: calls.append(args) or dumps(*args, **kwargs),
+    )
+    assert path_manager.hash_stream_schema(schema) == schema_hash
+    assert not calls
+    # equal schemas hash the same, once per schema object
+    assert path_manager.hash_stream_schema(json.loads(dumps(schema))) == schema_hash
+    assert len(calls) == 1
@@ -0,0 +1,336 @@
+import json
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+from singerlake import Singerlake
+from singerlake.store.zone_map import Predicate
+from singerlake.stream import parallel_reader
+from singerlake.stream.index import StreamFileIndex
+from singerlake.stream.parallel_reader import ParallelReader
+from tests.utils import TestStreamWriter, write_record_versions
+
+INPUTS_DIR = Path.cwd() / "tests" / "data" / "test_inputs"
+
+
+def _commit_stream(singerlake: Singerlake, stream_id: str):
+    stream = singerlake.get_tap("tap-carbon-intensity").get_stream(stream_id)
+    TestStreamWriter(INPUTS_DIR / f"{stream_id}.jsonl").write_messages_to_stream(stream)
+    stream.commit()
+    return stream
+
+
+@pytest.mark.parametrize("compression", ["none", "gz"])
+def test_read_records(tmp_singerlake_config, compression):
+    tmp_singerlake_config["writer"] = {"compression": compression}
+    singerlake = Singerlake(config=tmp_singerlake_config)
+    stream = _commit_stream(singerlake, "entry")
+
+    records = list(stream.read_records())
+    assert len(records) == 833
+    assert all(record["type"] == "RECORD" for record in records)
+
+
+def test_read_records_partition_pruning(tmp_singerlake_config, monkeypatch):
+    singerlake = Singerlake(config=tmp_singerlake_config)
+    stream = _commit_stream(singerlake, "entry")
+
+    store = singerlake.store
+    listed = []
+    list_dir = store.list_dir
+
+    def _list_dir(path):
+        listed.append(path)
+        return list_dir(path)
+
+    monkeypatch.setattr(store, "list_dir", _list_dir)
+    records = list(
+        stream.read_records(start=datetime(2020, 8, 19), end=datetime(2020, 8, 20))
+    )
+    assert len(records) == 11
+    assert all(
+        record["record"]["_sdc_extracted_at"].startswith("2020-08-19T13")
+        for record in records
+    )
+    assert not any("year=2023" in str(path) for path in listed)
+
+    # files are pruned on the time range in their names
+    assert list(stream.read_records(start=datetime(2020, 8, 19, 13, 5))) == [
+        record
+        for record in stream.read_records()
+        if record["record"]["_sdc_extracted_at"] >= "2020-08-19T13:05"
+    ]
+
+
+@pytest.mark.parametrize("ordered", [False, True])
+def test_read_records_parallel(tmp_singerlake_config, ordered):
+    tmp_singerlake_config["store"]["rollover"] = {"max_records": 50}
+    singerlake = Singerlake(config=tmp_singerlake_config)
+    stream = _commit_stream(singerlake, "entry")
+
+    def _key(record):
+        return record["record"]["_sdc_extracted_at"], str(record["record"])
+
+    serial = list(stream.read_records())
+    records = list(stream.read_records(workers=4, ordered=ordered, read_ahead=7))
+    assert sorted(records, key=_key) == sorted(serial, key=_key)
+    if ordered:
+        times = [record["record"]["_sdc_extracted_at"] for record in records]
+        assert times == sorted(times)
+
+
+def _write_minutes(stream, minutes):
+    """Write records of a single partition with the given time extracted minutes."""
+    messages = [
+        json.loads(line)
+        for line in (INPUTS_DIR / "entry.jsonl").read_text().splitlines()
+    ]
+    schema = next(message for message in messages if message["type"] == "SCHEMA")
+    records = [message for message in messages if message["type"] == "RECORD"]
+    with stream.record_writer() as writer:
+        for minute, record in zip(minutes, records[-len(minutes) :]):
+            record["record"]["_sdc_extracted_at"] = f"2023-09-20T14:{minute:02d}:00"
+            writer.write(schema, record)
+    return records[-len(minutes) :]
+
+
+def test_read_records_ordered_unsorted_file(tmp_singerlake_config):
+    singerlake = Singerlake(config=tmp_singerlake_config)
+    stream = singerlake.get_tap("tap-carbon-intensity").get_stream("entry")
+    records = _write_minutes(stream, range(59, -1, -1))
+    assert [singer_file.is_sorted for singer_file in stream.files] == [False]
+    stream.commit()
+
+    times = [
+        record["record"]["_sdc_extracted_at"]
+        for record in stream.read_records(workers=2, ordered=True, read_ahead=7)
+    ]
+    assert len(times) == len(records)
+    assert times == sorted(times)
+
+
+@pytest.mark.parametrize("raw", [False, True])
+def test_read_records_ordered_max_open_files(tmp_singerlake_config, monkeypatch, raw):
+    singerlake = Singerlake(config=tmp_singerlake_config)
+    stream = singerlake.get_tap("tap-carbon-intensity").get_stream("entry")
+    # overlapping, unsorted files
+    for offset in range(5):
+        _write_minutes(stream, range(59 - offset, -1, -5))
+    stream.commit()
+
+    open_files = []
+    file_records = parallel_reader.SingerFileReader.read_records
+
+    def _read_records(self, *args, **kwargs):
+        assert len(open_files) < 2
+        open_files.append(self.entry.path)
+        try:
+            yield from file_records(self, *args, **kwargs)
+        finally:
+            open_files.remove(self.entry.path)
+
+    monkeypatch.setattr(parallel_reader.SingerFileReader, "read_records", _read_records)
+    entries = list(singerlake.store.plan_stream_files("tap-carbon-intensity", "entry"))
+    reader = ParallelReader(
+        stream, entries, ordered=True, read_ahead=3, max_open_files=2, raw=raw
+    )
+    records = [record.message if raw else record for record in reader]
+    times = [record["record"]["_sdc_extracted_at"] for record in records]
+    assert len(times) == 60
+    assert times == sorted(times)
+    # spilled runs are removed
+    assert not any((singerlake.working_dir / ".merge").iterdir())
+
+
+def test_stream_file_index_round_trip():
+    index = StreamFileIndex()
+    index.add(100, datetime(2023, 1, 1, 0, 5))
+    index.add(200, datetime(2023, 1, 1, 0, 10))
+    loaded = StreamFileIndex.from_bytes(index.to_bytes(300), 300)
+    assert loaded.offsets == [100, 200]
+    assert loaded.seek_offset(datetime(2023, 1, 1)) is None
+    assert loaded.seek_offset(datetime(2023, 1, 1, 0, 6)) == 100
+    assert loaded.seek_offset(datetime(2023, 1, 1, 1)) == 200
+    # an index of a different file size is stale
+    assert StreamFileIndex.from_bytes(index.to_bytes(300), 301) is None
+
+
+@pytest.mark.parametrize("order", ["sorted", "shuffled"])
+def test_read_records_index_seek(tmp_singerlake_config, order):
+    tmp_singerlake_config["writer"] = {"index_interval": 7}
+    singerlake = Singerlake(config=tmp_singerlake_config)
+    stream = singerlake.get_tap("tap-carbon-intensity").get_stream("entry")
+    minutes = list(range(60))
+    if order == "shuffled":
+        minutes = minutes[::3] + minutes[1::3] + minutes[2::3]
+    _write_minutes(stream, minutes)
+    (singer_file,) = stream.files
+    assert singer_file.indexed
+    assert singer_file.is_sorted == (order == "sorted")
+    stream.commit()
+
+    committed = singerlake.store.path_manager.get_stream_file_path(singer_file)
+    index = StreamFileIndex.from_bytes(
+        committed.with_name(f"{committed.name}.idx").read_bytes(),
+        committed.stat().st_size,
+    )
+    assert len(index) == 8
+    if order == "sorted":
+        assert index.seek_offset(datetime(2023, 9, 20, 14, 30)) is not None
+
+    all_records = list(stream.read_records())
+    for minute in [0, 13, 14, 30, 59]:
+        start = datetime(2023, 9, 20, 14, minute)
+        assert list(stream.read_records(start=start)) == [
+            record
+            for record in all_records
+            if record["record"]["_sdc_extracted_at"] >= start.isoformat()
+        ]
+
+
+def test_read_records_dedupe(tmp_singerlake_config):
+    singerlake = Singerlake(config=tmp_singerlake_config)
+    stream = singerlake.get_tap("tap-carbon-intensity").get_stream("entry")
+    write_record_versions(stream)
+    stream.commit()
+
+    assert len(list(stream.read_records())) == 60
+    records = list(stream.read_records(dedupe=True))
+    assert len(records) == 30
+    assert {record["record"]["forecast"] for record in records} == {1}
+    assert list(stream.read_records(workers=2, ordered=True, dedupe=True)) == records
+    with pytest.raises(ValueError, match="ordered"):
+        list(stream.read_records(workers=2, dedupe=True))
+
+
+def test_read_records_filters(tmp_singerlake_config, monkeypatch):
+    tmp_singerlake_config["store"]["rollover"] = {"max_records": 50}
+    tmp_singerlake_config["writer"] = {"zone_map_fields": ["region_id", "forecast"]}
+    singerlake = Singerlake(config=tmp_singerlake_config)
+    stream = _commit_stream(singerlake, "entry")
+    all_records = list(stream.read_records())
+
+    manifest = singerlake.store.get_stream_manifest("tap-carbon-intensity", "entry")
+    assert all(
+        set(entry.zone_maps) == {"region_id", "forecast"} for entry in manifest.files
+    )
+
+    store = singerlake.store
+    opened = []
+    open_stream_file = store.open_stream_file
+
+    def _open_stream_file(tap_id, stream_id, entry):
+        opened.append(entry.path)
+        return open_stream_file(tap_id=tap_id, stream_id=stream_id, entry=entry)
+
+    monkeypatch.setattr(store, "open_stream_file", _open_stream_file)
+    for filters in [
+        [("region_id", "==", 3)],
+        [("region_id", "in", [3, 17]), ("forecast", ">=", 100)],
+    ]:
+        opened.clear()
+        records = list(stream.read_records(filters=filters))
+        assert records
+        assert records == [
+            record
+            for record in all_records
+            if all(
+                Predicate.parse(predicate).matches(record["record"])
+                for predicate in filters
+            )
+        ]
+        assert len(set(opened)) < len(manifest.files) / 4
+
+
+def test_read_records_projection(tmp_singerlake_config):
+    singerlake = Singerlake(config=tmp_singerlake_config)
+    stream = _commit_stream(singerlake, "entry")
+    messages = list(stream.read_records())
+    filters = [("region_id", "in", [1, 2])]
+
+    projected = list(stream.read_records(fields=["id", "forecast"], filters=filters))
+    assert projected == [
+        {
+            "type": "RECORD",
+            "stream": "entry",
+            "record": {
+                "id": message["record"]["id"],
+                "forecast": message["record"]["forecast"],
+            },
+            "time_extracted": message["record"]["_sdc_extracted_at"],
+        }
+        for message in messages
+        if message["record"]["region_id"] in (1, 2)
+    ]
+    assert (
+        list(
+            stream.read_records(
+                fields=["id", "forecast"], filters=filters, workers=2, ordered=True
+            )
+        )
+        == projected
+    )
+
+    raw = list(stream.read_records(raw=True, start=datetime(2023, 1, 1)))
+    assert [record["id"] for record in raw] == [
+        message["record"]["id"] for message in messages[11:]
+    ]
+    assert raw[0].message == messages[11]
+
+
+def test_read_records_schema_versions(tmp_singerlake_config):
+    singerlake = Singerlake(config=tmp_singerlake_config)
+    stream = singerlake.get_tap("tap-carbon-intensity").get_stream("entry")
+    messages = [json.loads(line) for line in (INPUTS_DIR / "entry.jsonl").open()]
+    schema = next(message for message in messages if message["type"] == "SCHEMA")
+    records = [message for message in messages if message["type"] == "RECORD"][-20:]
+    evolved_schema = json.loads(json.dumps(schema))
+    evolved_schema["schema"]["properties"]["note"] = {"type": ["string", "null"]}
+
+    def _write(schema, hour, note=None):
+        with stream.record_writer() as writer:
+            for minute, record in enumerate(records):
+                record = json.loads(json.dumps(record))
+                record["record"]["_sdc_extracted_at"] = (
+                    f"2023-09-20T{hour:02d}:{minute:02d}:00"
+                )
+                if note is not None:
+                    record["record"]["note"] = note
+                writer.write(schema, record)
+        stream.commit()
+        stream.files = []
+
+    # the evolved schema is committed first, for later records
+    _write(evolved_schema, hour=15, note="evolved")
+    _write(schema, hour=14)
+    _write(evolved_schema, hour=16, note="evolved")
+
+    path_manager = singerlake.store.path_manager
+    manifest = singerlake.store.get_stream_manifest("tap-carbon-intensity", "entry")
+    assert [version.schema_hash for version in manifest.versions] == [
+        path_manager.hash_stream_schema(schema),
+        path_manager.hash_stream_schema(evolved_schema),
+    ]
+    assert manifest.versions[0].first_observed == "2023-09-20T14:00:00"
+    assert manifest.versions[1].first_observed == "2023-09-20T15:00:00"
+
+    registry = stream.schema_registry
+    assert registry.versions() == manifest.versions
+    assert registry.get_latest_schema() == evolved_schema
+
+    # versions are read one after another, in first observed order
+    read = list(stream.read_records())
+    assert [message["record"]["_sdc_extracted_at"][11:13] for message in read] == (
+        ["14"] * 20 + ["15"] * 20 + ["16"] * 20
+    )
+    assert "note" not in read[0]["record"]
+
+    upcast = list(stream.read_records(upcast=True))
+    assert [message["record"]["note"] for message in upcast] == (
+        [None] * 20 + ["evolved"] * 40
+    )
+    projected = list(stream.read_records(upcast=True, fields=["id", "note"]))
+    assert projected[0]["record"] == {"id": records[0]["record"]["id"], "note": None}
+    with pytest.raises(ValueError, match="upcast"):
+        list(stream.read_records(upcast=True, raw=True))
@@ -0,0 +1,154 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from singerlake import Singerlake
+from singerlake.store import S3Path, S3Store
+from singerlake.store.s3 import CONDITIONAL_BODY_CACHE_SIZE
+from tests.utils import TestStreamWriter
+
+boto3 = pytest.importorskip("boto3")
+moto = pytest.importorskip("moto")
+
+INPUTS_DIR = Path.cwd() / "tests" / "data" / "test_inputs"
+BUCKET = "singerlake-test"
+
+
+@pytest.fixture()
+def s3_singerlake_config(tmp_path: Path, monkeypatch):
+    """Config for a lake in a mocked S3 bucket."""
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setenv("AWS_SESSION_TOKEN", "testing")
+    with moto.mock_aws():
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket=BUCKET)
+        client.put_object(
+            Bucket=BUCKET,
+            Key="lake/raw/manifest.json",
+            Body=json.dumps({"lake_id": "s3-lake", "taps": ["tap-carbon-intensity"]}),
+        )
+        client.put_object(
+            Bucket=BUCKET,
+            Key="lake/raw/tap-carbon-intensity/manifest.json",
+            Body=json.dumps(
+                {"tap_id": "tap-carbon-intensity", "streams": ["entry", "region"]}
+            ),
+        )
+        yield {
+            "store": {
+                "store_type": "s3",
+                "path": {
+                    "path_type": "hive",
+                    "lake_root": {"segments": (BUCKET, "lake")},
+                },
+                "lock": {
+                    "lock_type": "local",
+                    "path": {"segments": (tmp_path / "locks").parts},
+                },
+                "s3": {"region_name": "us-east-1"},
+            },
+            "working_dir": {"segments": (tmp_path / "working").parts},
+        }
+
+
+def test_s3_commit_and_read(s3_singerlake_config):
+    singerlake = Singerlake(config=s3_singerlake_config)
+    assert isinstance(singerlake.store, S3Store)
+    assert singerlake.list_taps() == ["tap-carbon-intensity"]
+
+    stream = singerlake.get_tap("tap-carbon-intensity").get_stream("entry")
+    TestStreamWriter(INPUTS_DIR / "entry.jsonl").write_messages_to_stream(stream)
+    stream.commit()
+
+    for stream_file in stream.files:
+        path = singerlake.store.path_manager.get_stream_file_path(stream_file)
+        assert isinstance(path, S3Path)
+        assert path.key.startswith("lake/raw/tap-carbon-intensity/entry/")
+        with singerlake.store.open_file(path) as committed:
+            assert committed.read() == stream_file.path.read_bytes()
+
+    # read back by another instance
+    other = Singerlake(config=s3_singerlake_config)
+    other_stream = other.get_tap("tap-carbon-intensity").get_stream("entry")
+    manifest = other.store.get_stream_manifest("tap-carbon-intensity", "entry")
+    assert len(manifest.files) == 2
+    assert len(list(other_stream.read_records())) == 833
+    assert [
+        entry.path
+        for entry in other.store.list_stream_files("tap-carbon-intensity", "entry")
+    ] == [entry.path for entry in manifest.files]
+
+    # compaction takes its locks in the local lock directory
+    with other.store.locker.lock("tap-carbon-intensity", "entry"):
+        pass
+
+
+def test_s3_conditional_manifest_reads(s3_singerlake_config, monkeypatch):
+    singerlake = Singerlake(config=s3_singerlake_config)
+    store = singerlake.store
+    requests = []
+    get_object = store.client.get_object
+    monkeypatch.setattr(
+        store.client,
+        "get_object",
+        lambda **kwargs: requests.append(kwargs) or get_object(**kwargs),
+    )
+
+    # a changed manifest is read in one request, an unchanged one validated
+    assert store.lake_manifest.taps == ["tap-carbon-intensity"]
+    assert len(requests) == 1
+    assert store.lake_manifest.taps == ["tap-carbon-intensity"]
+    assert len(requests) == 2
+    assert "IfNoneMatch" in requests[-1]
+    assert not store.lake_manifest_has_changed
+
+    store.write_file(
+        store.path_manager.lake_manifest_path, b'{"lake_id": "s3-lake", "taps": []}'
+    )
+    assert store.lake_manifest.taps == []
+    assert len(requests) == 4
+
+    # objects whose version is only checked aren't kept indefinitely
+    for index in range(2 * CONDITIONAL_BODY_CACHE_SIZE):
+        path = S3Path(BUCKET, f"lake/raw/{index}.json")
+        store.write_file(path, b"{}")
+        assert store.get_file_version(path) is not None
+    assert len(store._bodies) == CONDITIONAL_BODY_CACHE_SIZE
+
+
+def test_s3_exclusive_write(s3_singerlake_config):
+    store = Singerlake(config=s3_singerlake_config).store
+    path = S3Path(BUCKET, "lake/raw/exclusive.json")
+    store.write_file(path, b"{}", exclusive=True)
+    with pytest.raises(FileExistsError):
+        store.write_file(path, b"[]", exclusive=True)
+    store.write_file(path, b"[]")
+    with store.open_file(path) as stored:
+        assert stored.read() == b"[]"
+
+    store.delete_file(path)
+    with pytest.raises(FileNotFoundError):
+        store.open_file(path)
+    assert store.get_file_version(path) is None
+
+
+def test_s3_multipart_upload(s3_singerlake_config, tmp_path: Path):
+    s3_singerlake_config["store"]["s3"].update(
+        multipart_threshold=5 * 1024 * 1024, multipart_chunksize=5 * 1024 * 1024
+    )
+    store = Singerlake(config=s3_singerlake_config).store
+    source = tmp_path / "large.singer"
+    source.write_bytes(b"x" * (6 * 1024 * 1024))
+    path = S3Path(BUCKET, "lake/large.singer")
+    store._upload_file(source, path)
+
+    # multipart uploads have an ETag suffixed with their number of parts
+    assert store.client.head_object(Bucket=BUCKET, Key=path.key)["ETag"].endswith('-2"')
+    assert store.get_file_size(path) == 6 * 1024 * 1024
+
+    # uploads never replace an existing object
+    with pytest.raises(FileExistsError):
+        store._upload_file(source, path)
+    assert not store.client.list_multipart_uploads(Bucket=BUCKET).get("Uploads")
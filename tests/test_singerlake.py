@@ -1,3 +1,4 @@
+import json
 from pathlib import Path
 
 import pytest  # noqa: F401
@@ -79,3 +80,22 @@ def test_stream_commit(write_singerlake):
         / "entry-20230920T140156Z-20230920T140156Z.singer"
     )
     assert stream_file_2_path.exists()
+
+
+def test_stream_writer_many(read_singerlake):
+    input_file_path = Path.cwd() / "tests" / "data" / "test_inputs" / "entry.jsonl"
+    tap = read_singerlake.get_tap("tap-carbon-intensity")
+    stream = tap.get_stream("entry")
+    stream_writer = TestStreamWriter(input_stream_path=input_file_path, batch_size=100)
+    stream = stream_writer.write_messages_to_stream(stream=stream)
+    assert [file.name for file in stream.files] == [
+        "entry-20200819T130156Z-20200819T130156Z.singer",
+        "entry-20230920T140156Z-20230920T140156Z.singer",
+    ]
+    record_counts = []
+    for file in stream.files:
+        with file.path.open("r", encoding="utf-8") as singer_file:
+            lines = singer_file.readlines()
+        assert json.loads(lines[0])["type"] == "SCHEMA"
+        record_counts.append(len(lines) - 1)
+    assert sum(record_counts) == 833
@@ -0,0 +1,451 @@
+import hashlib
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import filelock
+import pytest
+
+from singerlake import Singerlake
+from singerlake.store import CommitConflict, CommitError
+from singerlake.store.base import snapshot_version
+from singerlake.store.locker.base import LockLost
+from singerlake.store.manifest import StreamFileEntry
+from tests.utils import TestStreamWriter
+
+INPUTS_DIR = Path.cwd() / "tests" / "data" / "test_inputs"
+
+
+def _write_stream(singerlake: Singerlake, stream_id: str):
+    stream = singerlake.get_tap("tap-carbon-intensity").get_stream(stream_id)
+    return TestStreamWriter(INPUTS_DIR / f"{stream_id}.jsonl").write_messages_to_stream(
+        stream
+    )
+
+
+def test_local_commit_hardlinks(tmp_singerlake_config):
+    singerlake = Singerlake(config=tmp_singerlake_config)
+    stream = _write_stream(singerlake, "entry")
+    stream.commit()
+
+    # no per-file temporary directories are left behind
+    staging_dir = singerlake.working_dir / ".staging"
+    assert list(staging_dir.iterdir()) == []
+
+    for stream_file in stream.files:
+        committed = singerlake.store.path_manager.get_stream_file_path(stream_file)
+        assert os.path.samefile(committed, stream_file.path)
+
+
+def test_local_commit_copy_fallback(tmp_singerlake_config, monkeypatch):
+    def _link(*args, **kwargs):
+        raise OSError("hard links not supported")
+
+    monkeypatch.setattr(os, "link", _link)
+    singerlake = Singerlake(config=tmp_singerlake_config)
+    stream = _write_stream(singerlake, "entry")
+    stream.commit()
+
+    for stream_file in stream.files:
+        committed = singerlake.store.path_manager.get_stream_file_path(stream_file)
+        assert not os.path.samefile(committed, stream_file.path)
+        assert committed.read_bytes() == stream_file.path.read_bytes()
+        assert sorted(path.name for path in committed.parent.iterdir()) == [
+            committed.name
+        ] + ([f"{committed.name}.idx"] if stream_file.indexed else [])
+
+
+def test_commit_results(tmp_singerlake_config, monkeypatch):
+    tmp_singerlake_config["store"]["rollover"] = {"max_records": 1000}
+    singerlake = Singerlake(config=tmp_singerlake_config)
+    stream = _write_stream(singerlake, "generationmix")
+    results = stream.commit()
+    assert len(results) == len(stream.files) == 8
+    assert all(result.success and result.path.exists() for result in results)
+
+    store = singerlake.store
+    commit_stream_file = store.commit_stream_file
+
+    def _commit_stream_file(stream_file, path):
+        if stream_file is stream.files[0]:
+            raise OSError("disk full")
+        commit_stream_file(stream_file, path)
+
+    monkeypatch.setattr(store, "commit_stream_file", _commit_stream_file)
+    with pytest.raises(CommitError) as exc_info:
+        stream.commit()
+    assert [result.success for result in exc_info.value.results] == [False] + [True] * 7
+
+
+def test_commit_writes_stream_manifest(tmp_singerlake_config, monkeypatch):
+    tmp_singerlake_config["writer"] = {"compression": "gz"}
+    singerlake = Singerlake(config=tmp_singerlake_config)
+    stream = _write_stream(singerlake, "entry")
+    results = stream.commit()
+
+    manifest = singerlake.store.get_stream_manifest("tap-carbon-intensity", "entry")
+    assert [entry.path for entry in manifest.files] == [
+        str(result.path.relative_to(result.path.parents[5])) for result in results
+    ]
+    assert sum(entry.record_count for entry in manifest.files) == 833
+    for entry, result in zip(manifest.files, results):
+        assert entry.compression == "gz"
+        assert entry.schema_hash == result.path.parents[4].name
+        assert entry.size_bytes == result.path.stat().st_size
+        assert entry.checksum == hashlib.md5(result.path.read_bytes()).hexdigest()
+
+    # reads are planned from the manifest without listing directories
+    def _list_dir(path):
+        raise AssertionError("directories should not be listed")
+
+    monkeypatch.setattr(singerlake.store, "list_dir", _list_dir)
+    assert len(list(stream.read_records())) == 833
+
+
+def test_commit_never_replaces_files(tmp_singerlake_config, tmp_path):
+    singerlake = Singerlake(config=tmp_singerlake_config)
+    other_config = {
+        **tmp_singerlake_config,
+        "working_dir": {"segments": (tmp_path / "other").parts},
+    }
+    other = Singerlake(config=other_config)
+    stream = _write_stream(singerlake, "entry")
+    other_stream = _write_stream(other, "entry")
+    names = [stream_file.name for stream_file in stream.files]
+    assert [stream_file.name for stream_file in other_stream.files] == names
+    stream.commit()
+    committed = [stream_file.path.read_bytes() for stream_file in stream.files]
+
+    # files of the same name are committed under the next sequence number
+    other_stream.commit()
+    assert [stream_file.sequence for stream_file in other_stream.files] == [1, 1]
+    assert all(
+        stream_file.parent_dir == other.working_dir and stream_file.path.exists()
+        for stream_file in other_stream.files
+    )
+    for stream_file, data in zip(stream.files, committed):
+        path = singerlake.store.path_manager.get_stream_file_path(stream_file)
+        assert path.read_bytes() == data
+    manifest = singerlake.store.get_stream_manifest("tap-carbon-intensity", "entry")
+    assert len(manifest.files) == 4
+    assert len(list(stream.read_records())) == 2 * 833
+
+
+def test_local_file_lock(tmp_singerlake_config):
+    tmp_singerlake_config["store"]["lock"]["timeout"] = 0.01
+    locker = Singerlake(config=tmp_singerlake_config).store.locker
+    other_locker = Singerlake(config=tmp_singerlake_config).store.locker
+
+    with locker:
+        # re-entrant within an instance
+        with locker:
+            pass
+        with pytest.raises(filelock.Timeout):
+            other_locker.acquire()
+    with other_locker:
+        pass
+
+
+def test_scoped_locks(tmp_singerlake_config):
+    tmp_singerlake_config["store"]["lock"]["timeout"] = 0.01
+    locker = Singerlake(config=tmp_singerlake_config).store.locker
+    other_locker = Singerlake(config=tmp_singerlake_config).store.locker
+    tap_id = "tap-carbon-intensity"
+
+    with locker.lock(tap_id=tap_id, stream_id="entry"):
+        # streams lock independently
+        with other_locker.lock(tap_id=tap_id, stream_id="region"):
+            pass
+        with other_locker.lock(tap_id="other-tap"):
+            pass
+        # overlapping scopes exclude other instances, but not this one
+        for tap_scope, stream_scope in [
+            (tap_id, "entry"),
+            (tap_id, None),
+            (None, None),
+        ]:
+            with pytest.raises(filelock.Timeout):
+                other_locker.acquire(tap_id=tap_scope, stream_id=stream_scope)
+        with locker:
+            pass
+    with other_locker.lock(tap_id=tap_id):
+        with pytest.raises(filelock.Timeout):
+            locker.acquire(tap_id=tap_id, stream_id="entry")
+    with pytest.raises(ValueError):
+        locker.acquire(stream_id="entry")
+
+
+def test_thread_locks(tmp_singerlake_config):
+    tmp_singerlake_config["store"]["lock"]["timeout"] = 0.5
+    locker = Singerlake(config=tmp_singerlake_config).store.locker
+    tap_id = "tap-carbon-intensity"
+
+    def _acquire(tap_scope, stream_scope):
+        locker.acquire(tap_id=tap_scope, stream_id=stream_scope)
+        locker.release(tap_id=tap_scope, stream_id=stream_scope)
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        with locker.lock(tap_id=tap_id, stream_id="entry"):
+            # other threads of the instance are excluded from overlapping scopes
+            for tap_scope, stream_scope in [(tap_id, "entry"), (tap_id, None)]:
+                with pytest.raises(filelock.Timeout):
+                    executor.submit(_acquire, tap_scope, stream_scope).result()
+            executor.submit(_acquire, tap_id, "region").result()
+            with pytest.raises(RuntimeError):
+                executor.submit(locker.release, tap_id, "entry").result()
+
+        # and take the lock once it is released
+        with locker.lock(tap_id=tap_id):
+            future = executor.submit(_acquire, tap_id, "entry")
+            time.sleep(0.05)
+        future.result()
+
+
+def test_lock_leases(tmp_singerlake_config):
+    tmp_singerlake_config["store"]["lock"].update(
+        {"timeout": 0.01, "lease_seconds": 0.3, "refresh_interval": 0.05}
+    )
+    locker = Singerlake(config=tmp_singerlake_config).store.locker
+    other_locker = Singerlake(config=tmp_singerlake_config).store.locker
+
+    # held leases are refreshed in the background
+    with locker:
+        time.sleep(0.6)
+        with pytest.raises(filelock.Timeout):
+            other_locker.acquire()
+
+    # a holder that stops refreshing, e.g. by crashing, loses its lease
+    locker.refresh_interval = 3600
+    locker.acquire()
+    time.sleep(0.4)
+    with other_locker:
+        pass
+    with pytest.raises(LockLost):
+        locker.release()
+
+
+def test_manifest_cache(tmp_singerlake_config, monkeypatch):
+    singerlake = Singerlake(config=tmp_singerlake_config)
+    store = singerlake.store
+    reads = []
+    read_tap_manifest = store.read_tap_manifest
+    monkeypatch.setattr(
+        store,
+        "read_tap_manifest",
+        lambda tap_id: reads.append(tap_id) or read_tap_manifest(tap_id),
+    )
+
+    tap = singerlake.get_tap("tap-carbon-intensity")
+    assert singerlake.get_tap("tap-carbon-intensity").tap_manifest == tap.tap_manifest
+    assert len(reads) == 1
+
+    # changes by other writers are seen
+    manifest_path = store.path_manager.get_tap_manifest_path("tap-carbon-intensity")
+    manifest_path.write_text(
+        '{"tap_id": "tap-carbon-intensity", "streams": ["entry"]}', encoding="utf-8"
+    )
+    assert singerlake.get_tap("tap-carbon-intensity").stream_ids == ["entry"]
+    assert len(reads) == 2
+
+    lake_manifest_path = store.path_manager.lake_manifest_path
+    lake_manifest_path.write_text('{"lake_id": "tmp-lake"}', encoding="utf-8")
+    assert singerlake.list_taps() == []
+    assert not store.lake_manifest_has_changed
+    lake_manifest_path.write_text(
+        '{"lake_id": "tmp-lake", "taps": ["tap-carbon-intensity"]}', encoding="utf-8"
+    )
+    assert store.lake_manifest_has_changed
+    assert singerlake.list_taps() == ["tap-carbon-intensity"]
+
+
+def test_manifest_cache_ttl(tmp_singerlake_config):
+    tmp_singerlake_config["store"]["manifest_cache_ttl"] = 3600
+    singerlake = Singerlake(config=tmp_singerlake_config)
+    store = singerlake.store
+    store.path_manager.lake_manifest_path.write_text(
+        '{"lake_id": "tmp-lake"}', encoding="utf-8"
+    )
+    assert singerlake.list_taps() == []
+
+    # within the TTL, manifests are trusted without checking the stored file
+    store.path_manager.lake_manifest_path.write_text(
+        '{"lake_id": "tmp-lake", "taps": ["tap-carbon-intensity"]}', encoding="utf-8"
+    )
+    assert singerlake.list_taps() == []
+    store.manifest_cache.invalidate()
+    assert singerlake.list_taps() == ["tap-carbon-intensity"]
+
+    # but this process's own writes are seen at once
+    stream = _write_stream(singerlake, "entry")
+    assert store.get_stream_manifest("tap-carbon-intensity", "entry") is None
+    stream.commit()
+    manifest = store.get_stream_manifest("tap-carbon-intensity", "entry")
+    assert len(manifest.files) == 2
+    assert len(list(stream.read_records())) == 833
+
+
+def test_stream_log(tmp_singerlake_config):
+    tmp_singerlake_config["store"]["checkpoint_interval"] = 2
+    singerlake = Singerlake(config=tmp_singerlake_config)
+    store = singerlake.store
+    tap_id, stream_id = "tap-carbon-intensity", "entry"
+
+    paths = []
+    for _ in range(3):
+        stream = _write_stream(singerlake, stream_id)
+        results = stream.commit()
+        paths.append(
+            [str(result.path.relative_to(result.path.parents[5])) for result in results]
+        )
+        for result in results:
+            # recommitting the same file names replaces their entries
+            result.path.unlink()
+    store.remove_stream_files(tap_id, stream_id, paths[-1][:1])
+
+    log_dir = store.path_manager.get_stream_log_path(tap_id, stream_id, "")
+    assert sorted(path.name for path in log_dir.iterdir()) == [
+        "00000000000000000000.json",
+        "00000000000000000001.json",
+        "00000000000000000002.checkpoint.json",
+        "00000000000000000002.json",
+        "00000000000000000003.json",
+        "_last_checkpoint",
+    ]
+    manifest = store.get_stream_manifest(tap_id, stream_id)
+    assert manifest.version == 3
+    assert [entry.path for entry in manifest.files] == paths[-1][1:]
+    assert [version.schema_hash for version in manifest.versions] == ["Y8Mjkb4i9yM"]
+
+    # a new reader starts from the checkpoint, and sees the same snapshot
+    reader = Singerlake(config=tmp_singerlake_config)
+    assert reader.store.get_stream_manifest(tap_id, stream_id) == manifest
+    # listing skips the log directory
+    assert list(store.list_stream_files(tap_id, stream_id)) == []
+
+    # versions can't be overwritten
+    with pytest.raises(FileExistsError):
+        store.write_file(log_dir / "00000000000000000003.json", b"{}", exclusive=True)
+
+
+def test_stream_log_imports_manifest(tmp_singerlake_config):
+    singerlake = Singerlake(config=tmp_singerlake_config)
+    store = singerlake.store
+    tap_id, stream_id = "tap-carbon-intensity", "entry"
+    stream = _write_stream(singerlake, stream_id)
+    results = stream.commit()
+    manifest = store.get_stream_manifest(tap_id, stream_id)
+
+    # rewrite the stream as a stream without a log
+    log_dir = store.path_manager.get_stream_log_path(tap_id, stream_id, "")
+    for path in log_dir.iterdir():
+        path.unlink()
+    store.manifest_cache.invalidate()
+    manifest_path = store.path_manager.get_stream_manifest_path(tap_id, stream_id)
+    manifest_path.write_text(
+        manifest.copy(update={"version": None, "versions": []}).json(),
+        encoding="utf-8",
+    )
+    assert store.get_stream_manifest(tap_id, stream_id).version is None
+
+    store.remove_stream_files(tap_id, stream_id, [manifest.files[0].path])
+    snapshot = store.get_stream_manifest(tap_id, stream_id)
+    assert snapshot.version == 1
+    assert snapshot.files == manifest.files[1:]
+    assert snapshot.versions == manifest.versions
+    assert not results[0].path.exists()
+
+
+def test_stream_log_imports_listed_files(tmp_singerlake_config):
+    singerlake = Singerlake(config=tmp_singerlake_config)
+    store = singerlake.store
+    tap_id, stream_id = "tap-carbon-intensity", "entry"
+    _write_stream(singerlake, stream_id).commit()
+
+    # rewrite the stream as one committed before streams had a log
+    shutil.rmtree(store.path_manager.get_stream_log_path(tap_id, stream_id, ""))
+    store.manifest_cache.invalidate()
+
+    stream = _write_stream(Singerlake(config=tmp_singerlake_config), stream_id)
+    stream.commit()
+    manifest = store.get_stream_manifest(tap_id, stream_id)
+    assert manifest.version == 1
+    assert len(manifest.files) == 4
+    assert len(list(stream.read_records())) == 2 * 833
+
+
+def _entry(path: str) -> StreamFileEntry:
+    return StreamFileEntry(
+        path=path,
+        schema_hash="Y8Mjkb4i9yM",
+        min_time_extracted=datetime(2023, 9, 20, 14),
+        max_time_extracted=datetime(2023, 9, 20, 14),
+    )
+
+
+def test_optimistic_commits(tmp_singerlake_config):
+    tap_id, stream_id = "tap-carbon-intensity", "entry"
+    stores = [Singerlake(config=tmp_singerlake_config).store for _ in range(4)]
+
+    def _commit(position):
+        store = stores[position]
+        for commit in range(5):
+            store.add_stream_manifest_files(
+                tap_id, stream_id, [_entry(f"Y8Mjkb4i9yM/{position}-{commit}.singer")]
+            )
+
+    # concurrent writers of disjoint files are rebased onto each other
+    with ThreadPoolExecutor(max_workers=len(stores)) as executor:
+        list(executor.map(_commit, range(len(stores))))
+    manifest = stores[0].get_stream_manifest(tap_id, stream_id)
+    assert manifest.version == 19
+    assert len({entry.path for entry in manifest.files}) == 20
+
+
+def test_optimistic_commit_conflict(tmp_singerlake_config, monkeypatch):
+    tap_id, stream_id = "tap-carbon-intensity", "entry"
+    store = Singerlake(config=tmp_singerlake_config).store
+    other_store = Singerlake(config=tmp_singerlake_config).store
+    store.add_stream_manifest_files(tap_id, stream_id, [_entry("a"), _entry("b")])
+
+    # both writers read version 0, then the other commits first
+    monkeypatch.setattr(store, "_get_stream_log_version", lambda *args: 0)
+    other_store.add_stream_manifest_files(tap_id, stream_id, [], remove_paths=["a"])
+    with pytest.raises(CommitConflict):
+        store.add_stream_manifest_files(
+            tap_id, stream_id, [_entry("c")], remove_paths=["a"]
+        )
+    # disjoint changes are rebased
+    action = store.add_stream_manifest_files(
+        tap_id, stream_id, [_entry("c")], remove_paths=["b"]
+    )
+    assert action.version == 2
+    manifest = other_store.get_stream_manifest(tap_id, stream_id)
+    assert [entry.path for entry in manifest.files] == ["c"]
+
+
+def test_optimistic_commit_base_version(tmp_singerlake_config):
+    tap_id, stream_id = "tap-carbon-intensity", "entry"
+    store = Singerlake(config=tmp_singerlake_config).store
+    other_store = Singerlake(config=tmp_singerlake_config).store
+    store.add_stream_manifest_files(tap_id, stream_id, [_entry("a"), _entry("b")])
+    base_version = snapshot_version(store.get_stream_manifest(tap_id, stream_id))
+
+    # versions committed after the snapshot a change was computed from are
+    # checked, even if they were committed before the change
+    other_store.add_stream_manifest_files(tap_id, stream_id, [], remove_paths=["a"])
+    with pytest.raises(CommitConflict):
+        store.add_stream_manifest_files(
+            tap_id, stream_id, [], remove_paths=["a"], base_version=base_version
+        )
+    other_store.add_stream_manifest_files(tap_id, stream_id, [_entry("b")])
+    with pytest.raises(CommitConflict):
+        store.add_stream_manifest_files(
+            tap_id, stream_id, [], remove_paths=["b"], base_version=base_version
+        )
+    action = store.add_stream_manifest_files(
+        tap_id, stream_id, [_entry("c")], base_version=base_version
+    )
+    assert (action.base_version, action.version) == (base_version, 3)
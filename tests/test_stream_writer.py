@@ -0,0 +1,182 @@
+import time
+from pathlib import Path
+
+import pytest
+
+from singerlake import Singerlake
+from singerlake.stream.compression import open_reader, zstandard
+from tests.utils import TestStreamWriter
+
+INPUTS_DIR = Path.cwd() / "tests" / "data" / "test_inputs"
+
+
+@pytest.mark.parametrize(
+    "compression,threaded",
+    [("gz", False), ("gz", True), ("bz2", False), ("zst", False), ("zst", True)],
+)
+def test_compressed_stream_writer(tmp_singerlake_config, compression, threaded):
+    if compression == "zst" and zstandard is None:
+        pytest.skip("zstandard is not installed")
+
+    tmp_singerlake_config["writer"] = {
+        "compression": compression,
+        "threaded_compression": threaded,
+    }
+    singerlake = Singerlake(config=tmp_singerlake_config)
+    stream = singerlake.get_tap("tap-carbon-intensity").get_stream("region")
+    TestStreamWriter(INPUTS_DIR / "region.jsonl").write_messages_to_stream(stream)
+
+    assert [file.name for file in stream.files] == [
+        f"region-20230920T140156Z-20230920T140156Z.singer.{compression}"
+    ]
+    with open_reader(stream.files[0].path.open("rb"), compression) as reader:
+        lines = reader.read().splitlines()
+    assert len(lines) == 18
+    assert [singerlake.codec.loads(line)["type"] for line in lines[:2]] == [
+        "SCHEMA",
+        "RECORD",
+    ]
+
+
+@pytest.mark.parametrize("batch_size", [None, 500])
+@pytest.mark.parametrize(
+    "rollover",
+    [{"max_records": 1000}, {"max_records": None, "max_bytes": 256 * 1024}],
+)
+def test_stream_writer_rollover(tmp_singerlake_config, rollover, batch_size):
+    tmp_singerlake_config["store"]["rollover"] = rollover
+    singerlake = Singerlake(config=tmp_singerlake_config)
+    stream = singerlake.get_tap("tap-carbon-intensity").get_stream("generationmix")
+    TestStreamWriter(
+        INPUTS_DIR / "generationmix.jsonl", batch_size=batch_size
+    ).write_messages_to_stream(stream)
+
+    names = [file.name for file in stream.files]
+    assert len(names) == len(set(names)) > 1
+    assert all(file.path.exists() for file in stream.files)
+
+    record_count = 0
+    for file in stream.files:
+        with file.path.open("rb") as singer_file:
+            lines = singer_file.read().splitlines()
+        if rollover["max_records"] is not None:
+            assert len(lines) - 1 <= rollover["max_records"]
+        record_count += len(lines) - 1
+    assert record_count == 7497
+
+
+def test_stream_writer_open_file_pool(tmp_singerlake_config):
+    tmp_singerlake_config["writer"] = {"max_open_files": 2}
+    singerlake = Singerlake(config=tmp_singerlake_config)
+    stream = singerlake.get_tap("tap-carbon-intensity").get_stream("region")
+    schema = {"type": "SCHEMA", "stream": "region", "schema": {}, "key_properties": []}
+
+    with stream.record_writer() as writer:
+        for index in range(20):
+            # cycle through five hourly partitions
+            time_extracted = f"2023-09-20T{10 + index % 5:02d}:00:00"
+            writer.write(
+                schema=schema,
+                record={
+                    "type": "RECORD",
+                    "stream": "region",
+                    "record": {"id": index},
+                    "time_extracted": time_extracted,
+                },
+            )
+            assert len(writer._open_files) <= 2
+
+    names = [file.name for file in stream.files]
+    assert len(names) == len(set(names)) == 20
+    assert sum(1 for name in names if "T110000Z-" in name) == 4
+
+
+def test_stream_writer_max_age(tmp_singerlake_config):
+    tmp_singerlake_config["store"]["rollover"] = {"max_age_seconds": 0.2}
+    singerlake = Singerlake(config=tmp_singerlake_config)
+    stream = singerlake.get_tap("tap-carbon-intensity").get_stream("region")
+    schema = {"type": "SCHEMA", "stream": "region", "schema": {}, "key_properties": []}
+
+    def _record(index: int) -> dict:
+        return {
+            "type": "RECORD",
+            "stream": "region",
+            "record": {"id": index},
+            "time_extracted": f"2023-09-20T{10 + index:02d}:00:00",
+        }
+
+    with stream.record_writer() as writer:
+        writer.write(schema=schema, record=_record(0))
+        deadline = writer._age_deadline
+        # open files are only checked once the oldest may have aged
+        writer.write(schema=schema, record=_record(2))
+        assert writer._age_deadline == deadline
+        time.sleep(0.3)
+        # writing to another partition finalizes the idle, aged files
+        writer.write(schema=schema, record=_record(1))
+        assert [file.name for file in writer.singer_files] == [
+            "region-20230920T100000Z-20230920T100000Z.singer",
+            "region-20230920T120000Z-20230920T120000Z.singer",
+        ]
+        assert len(writer._open_files) == 1
+        assert writer._age_deadline > deadline
+
+    assert len(stream.files) == 3
+
+
+def test_threaded_stream_writer(tmp_singerlake_config):
+    tmp_singerlake_config["writer"] = {"threaded": True, "thread_batch_size": 100}
+    singerlake = Singerlake(config=tmp_singerlake_config)
+    stream = singerlake.get_tap("tap-carbon-intensity").get_stream("entry")
+    TestStreamWriter(INPUTS_DIR / "entry.jsonl").write_messages_to_stream(stream)
+    assert [file.name for file in stream.files] == [
+        "entry-20200819T130156Z-20200819T130156Z.singer",
+        "entry-20230920T140156Z-20230920T140156Z.singer",
+    ]
+
+
+def test_threaded_stream_writer_error(tmp_singerlake_config):
+    singerlake = Singerlake(config=tmp_singerlake_config)
+    stream = singerlake.get_tap("tap-carbon-intensity").get_stream("entry")
+    schema = {"type": "SCHEMA", "stream": "entry", "schema": {}, "key_properties": []}
+
+    with pytest.raises(ValueError, match="time_extracted"):
+        with stream.record_writer(threaded=True) as writer:
+            writer.write_many(schema=schema, records=[{"type": "RECORD", "record": {}}])
+    assert writer.is_finalized
+
+
+@pytest.mark.parametrize("processes", [1, 3])
+def test_ingest_file(tmp_singerlake_config, processes):
+    tmp_singerlake_config["store"]["rollover"] = {"max_records": 1000}
+    singerlake = Singerlake(config=tmp_singerlake_config)
+    stream = singerlake.get_tap("tap-carbon-intensity").get_stream("generationmix")
+    singer_files = stream.ingest_file(
+        INPUTS_DIR / "generationmix.jsonl", processes=processes
+    )
+    assert stream.files == singer_files
+
+    names = [file.name for file in singer_files]
+    assert len(names) == len(set(names))
+    record_count = 0
+    for file in singer_files:
+        assert file.parent_dir == singerlake.working_dir
+        with file.path.open("rb") as singer_file:
+            lines = singer_file.read().splitlines()
+        assert singerlake.codec.loads(lines[0])["type"] == "SCHEMA"
+        record_count += len(lines) - 1
+    assert record_count == 7497
+    assert not (singerlake.working_dir / ".ingest").exists() or not any(
+        (singerlake.working_dir / ".ingest").iterdir()
+    )
+    assert all(result.success for result in stream.commit())
+
+
+def test_ingest_file_failure(tmp_singerlake_config, tmp_path):
+    singerlake = Singerlake(config=tmp_singerlake_config)
+    stream = singerlake.get_tap("tap-carbon-intensity").get_stream("entry")
+    input_path = tmp_path / "entry.jsonl"
+    input_path.write_text('{"type": "RECORD", "stream": "entry", "record": {}}\n')
+    with pytest.raises(ValueError, match="before its SCHEMA"):
+        stream.ingest_file(input_path, processes=1)
+    assert not any((singerlake.working_dir / ".ingest").iterdir())
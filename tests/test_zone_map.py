@@ -0,0 +1,60 @@
+import pytest
+
+from singerlake.store.manifest import FieldStats
+from singerlake.store.zone_map import Predicate, ZoneMapCollector, parse_predicates
+
+
+def test_zone_map_collector():
+    collector = ZoneMapCollector(["id", "name", "mixed", "nested"])
+    for record in [
+        {"id": 3, "name": "b", "mixed": 1, "nested": {"a": 1}},
+        {"id": 1, "name": None, "mixed": "x"},
+        {"id": 2, "name": "a", "mixed": 2},
+    ]:
+        collector.update(record)
+
+    stats = collector.stats()
+    assert stats["id"] == FieldStats(min=1, max=3, null_count=0)
+    assert stats["name"] == FieldStats(min="a", max="b", null_count=1)
+    # values that can't be ordered leave min/max unset
+    assert stats["mixed"] == FieldStats(null_count=0)
+    assert stats["nested"] == FieldStats(null_count=2)
+
+
+@pytest.mark.parametrize(
+    ("predicate", "expected"),
+    [
+        (("id", "==", 5), True),
+        (("id", "==", 11), False),
+        (("id", "in", [0, 11]), False),
+        (("id", "in", [0, 10]), True),
+        (("id", ">", 10), False),
+        (("id", ">=", 10), True),
+        (("id", "<", 1), False),
+        (("id", "<=", 1), True),
+        (("id", "!=", 5), True),
+        (("id", "==", None), False),
+        (("id", "==", "5"), True),
+        (("other", "==", 5), True),
+    ],
+)
+def test_predicate_might_match(predicate, expected):
+    stats = {"id": FieldStats(min=1, max=10, null_count=0)}
+    (predicate,) = parse_predicates([predicate])
+    assert predicate.might_match(stats.get(predicate.field), 100) is expected
+
+
+def test_predicate_all_null():
+    stats = FieldStats(null_count=10)
+    assert not Predicate.parse(("id", "==", 1)).might_match(stats, 10)
+    assert Predicate.parse(("id", "==", None)).might_match(stats, 10)
+
+
+def test_predicate_matches():
+    record = {"id": 5, "name": "a"}
+    assert Predicate.parse(("id", "in", [4, 5])).matches(record)
+    assert not Predicate.parse(("id", ">", 5)).matches(record)
+    assert not Predicate.parse(("name", ">", 5)).matches(record)
+    assert Predicate.parse(("missing", "==", None)).matches(record)
+    with pytest.raises(ValueError, match="operator"):
+        Predicate.parse(("id", "~", 1))
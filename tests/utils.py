@@ -1,29 +1,63 @@
 import json
 import typing as t
+from pathlib import Path
 
 if t.TYPE_CHECKING:
-    from pathlib import Path
-
     from singerlake.stream import Stream
 
+ENTRY_INPUT_PATH = Path.cwd() / "tests" / "data" / "test_inputs" / "entry.jsonl"
+
 
 class TestStreamWriter:
-    def __init__(self, input_stream_path: "Path"):
+    __test__ = False
+
+    def __init__(self, input_stream_path: "Path", batch_size: t.Optional[int] = None):
         self.input_stream_path = input_stream_path
+        self.batch_size = batch_size
         self.stream_schema: dict | None = None
 
     def write_messages_to_stream(self, stream: "Stream"):
         """Write messages from a file to a stream."""
 
         with stream.record_writer() as writer:
+            batch: list[dict] = []
             with open(self.input_stream_path, "r", encoding="utf-8") as input_stream:
                 for line in input_stream:
                     message = json.loads(line)
 
                     if message["type"] == "SCHEMA":
+                        if batch:
+                            writer.write_many(schema=self.stream_schema, records=batch)
+                            batch = []
                         self.stream_schema = message
 
                     if message["type"] == "RECORD":
-                        writer.write(schema=self.stream_schema, record=message)
+                        if self.batch_size is None:
+                            writer.write(schema=self.stream_schema, record=message)
+                        else:
+                            batch.append(message)
+                            if len(batch) == self.batch_size:
+                                writer.write_many(
+                                    schema=self.stream_schema, records=batch
+                                )
+                                batch = []
+
+            if batch:
+                writer.write_many(schema=self.stream_schema, records=batch)
 
         return stream
+
+
+def write_record_versions(stream: "Stream", versions: int = 2, count: int = 30) -> None:
+    """Write `versions` versions of the same records, later versions later."""
+    messages = [json.loads(line) for line in ENTRY_INPUT_PATH.read_text().splitlines()]
+    schema = next(message for message in messages if message["type"] == "SCHEMA")
+    records = [message for message in messages if message["type"] == "RECORD"]
+    with stream.record_writer() as writer:
+        for version in range(versions):
+            for position, record in enumerate(records[-count:]):
+                record = json.loads(json.dumps(record))
+                minute = version * count + position
+                record["record"]["_sdc_extracted_at"] = f"2023-09-20T14:{minute:02d}:00"
+                record["record"]["forecast"] = version
+                writer.write(schema, record)